@@ -0,0 +1,52 @@
+# Micro-benchmark for removing EMPTY_CHAR markers from generated word forms.
+# This compares the original loop of regexp substitutions (one per vowel)
+# against insert_apostrophes().
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_apostrophe
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import re
+import timeit
+from wiktfinnish.inflect import EMPTY_CHAR, insert_apostrophes
+
+
+def legacy_insert_apostrophes(v):
+    """The original implementation from process_template()."""
+    for ch in "aeiouyäöAEIOUYÄÖ":
+        v = re.sub("([aeiouyäöAEIOUYÄÖ]" + ch + ")" + EMPTY_CHAR +
+                   "(" + ch + ")", r"\1'\2", v)
+    v = re.sub(EMPTY_CHAR, "", v)
+    return v
+
+
+WORDS = [
+    "liu" + EMPTY_CHAR + "un",          # liu'un
+    "ha" + EMPTY_CHAR + "an",           # haan
+    "rei" + EMPTY_CHAR + "istä",        # rei'istä
+    "ruo" + EMPTY_CHAR + "on",          # ruo'on
+    "vaa" + EMPTY_CHAR + "assa",        # vaa'assa
+    "pyy" + EMPTY_CHAR + "yn",          # pyy'yn
+    "lie" + EMPTY_CHAR + "ssä",         # liessä
+    "yhteistyökumppanuusliu" + EMPTY_CHAR + "uissakaankohan",
+]
+
+
+if __name__ == "__main__":
+    for w in WORDS:
+        assert legacy_insert_apostrophes(w) == insert_apostrophes(w), w
+    number = 20000
+
+    def legacy():
+        for w in WORDS:
+            legacy_insert_apostrophes(w)
+
+    def single_pass():
+        for w in WORDS:
+            insert_apostrophes(w)
+
+    t1 = min(timeit.repeat(legacy, number=number, repeat=3))
+    t2 = min(timeit.repeat(single_pass, number=number, repeat=3))
+    n = number * len(WORDS)
+    print("legacy regexp loop {:7.2f}us/word  single pass {:7.2f}us/word  "
+          "speedup {:.1f}x".format(t1 / n * 1e6, t2 / n * 1e6, t1 / t2))
@@ -0,0 +1,63 @@
+# Benchmark for inflecting a lexicon in batch.  This compares calling
+# inflect() for each word and form against a single call of inflect_batch().
+# The lexicon consists of the words in the test cases, each also with a
+# number of prefixes added to its stem, so that each declension and
+# conjugation has many words, as in a real lexicon.
+#
+# Usage (in the top-level directory):
+#   python3 -m benchmarks.bench_batch [copies]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import sys
+import time
+import contextlib
+from wiktfinnish import inflect, inflect_batch, all_forms_list
+from wiktfinnish.tests.test_inflect import testcases
+
+# Prefixes added to the stems of the words in the test cases
+PREFIXES = ["", "esi", "ali", "yli", "koti", "keski", "perus", "pika",
+            "suur", "pien", "vanh", "uusi", "iso", "lähi", "kauko", "vasta"]
+
+
+def lexicon(copies):
+    entries = []
+    for prefix in (PREFIXES * (copies // len(PREFIXES) + 1))[:copies]:
+        for lst in testcases:
+            args = dict(lst[1])
+            args["template_name"] = lst[0]
+            if isinstance(args.get("1"), str):
+                args["1"] = prefix + args["1"]
+            entries.append(args)
+    return entries
+
+
+def bench(entries, forms, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warnings about invalid forms are printed to stdout
+        t = time.perf_counter()
+        ref = [{form: inflect(args, form) for form in forms}
+               for args in entries]
+        t1 = time.perf_counter() - t
+        t = time.perf_counter()
+        ret = inflect_batch(entries, forms, **kwargs)
+        t2 = time.perf_counter() - t
+    assert ret == ref
+    print("{:5d} words x {:5d} forms  {:<19} per-form {:8.1f}ms  "
+          "batch {:7.1f}ms  speedup {:.1f}x"
+          "".format(len(entries), len(forms), str(kwargs), t1 * 1e3,
+                    t2 * 1e3, t1 / t2))
+
+
+if __name__ == "__main__":
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    entries = lexicon(copies)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up, e.g., import NumPy (if installed) before timing
+        inflect_batch(entries, [("", "", "", "", "")], use_numpy=True)
+    for forms in (all_forms_list("noun", no_poss=True, no_clitic=True),
+                  all_forms_list("noun", no_clitic=True),
+                  all_forms_list("verb", no_poss=True, no_clitic=True)):
+        for use_numpy in (False, True):
+            bench(entries, forms, use_numpy=use_numpy)
@@ -0,0 +1,58 @@
+# Benchmark for the code generation backend.  This compares computing all
+# template forms of a declension/conjugation with the compiled template
+# interpreter against a single call of the generated function, and
+# generating full paradigms with each template backend.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_codegen
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import timeit
+from wiktfinnish import codegen
+from wiktfinnish.inflect import set_template_backend
+from wiktfinnish.paradigm import inflect_paradigm
+
+
+def bench(name, args, number=2000):
+    assert not codegen.verify(name, args)
+
+    def interpreted():
+        codegen.interpreted_forms(name, args)
+
+    def generated():
+        codegen.template_forms(name, args)
+
+    t1 = min(timeit.repeat(interpreted, number=number, repeat=3))
+    t2 = min(timeit.repeat(generated, number=number, repeat=3))
+    print("{:<16} interpreter {:8.1f}us  generated {:8.1f}us  speedup {:.2f}x"
+          "".format(name, t1 / number * 1e6, t2 / number * 1e6, t1 / t2))
+
+
+def bench_paradigm(args, pos, number=20):
+    def paradigm():
+        inflect_paradigm(args, pos)
+
+    set_template_backend("interpreter")
+    t1 = min(timeit.repeat(paradigm, number=number, repeat=3))
+    set_template_backend("generated")
+    t2 = min(timeit.repeat(paradigm, number=number, repeat=3))
+    set_template_backend("interpreter")
+    print("{:<16} paradigm interpreter {:6.2f}ms  generated {:6.2f}ms  "
+          "speedup {:.2f}x".format(args["template_name"],
+                                   t1 / number * 1e3, t2 / number * 1e3,
+                                   t1 / t2))
+
+
+if __name__ == "__main__":
+    codegen.paradigm_function("fi-decl-valo")  # Load outside timing
+    bench("fi-decl-valo",
+          {"1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"})
+    bench("fi-decl-palvelu", {"1": "palvelu", "2": "a"})
+    bench("fi-conj-sanoa",
+          {"1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"})
+    bench_paradigm({"template_name": "fi-decl-valo",
+                    "1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"},
+                   "noun")
+    bench_paradigm({"template_name": "fi-conj-sanoa",
+                    "1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"},
+                   "verb")
@@ -0,0 +1,57 @@
+# Benchmark for compact paradigms.  This keeps the paradigms of the words in
+# the test cases in memory, as an in-memory lexicon would, both as
+# dictionaries returned by inflect_paradigm() and as Paradigm objects
+# returned by compact_paradigm(), and reports the memory retained (as
+# measured by tracemalloc), the time to build them and the time to look up
+# all forms.  Clitics are left out to keep the running time reasonable
+# under tracemalloc.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_compact
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import time
+import contextlib
+import tracemalloc
+from wiktfinnish import inflect_paradigm, compact_paradigm
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        pos = "verb" if lst[0].startswith("fi-conj") else \
+            args.get("pos", "noun")
+        entries.append((args, pos))
+    return entries
+
+
+def bench(name, func, entries):
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up the caches of forms and declensions outside measurement
+        for args, pos in entries:
+            func(args, pos, no_clitic=True)
+        tracemalloc.start()
+        t = time.time()
+        paradigms = [func(args, pos, no_clitic=True) for args, pos in entries]
+        t1 = time.time() - t
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    t = time.time()
+    cnt = 0
+    for p in paradigms:
+        for form in p:
+            cnt += len(p[form])
+    t2 = time.time() - t
+    print("{:<18} {:8.1f}MB  build {:6.2f}s  lookup {:6.2f}s  ({} words)"
+          "".format(name, size / 1e6, t1, t2, cnt))
+    return paradigms
+
+
+if __name__ == "__main__":
+    entries = lexicon()
+    bench("inflect_paradigm", inflect_paradigm, entries)
+    bench("compact_paradigm", compact_paradigm, entries)
@@ -0,0 +1,48 @@
+# Benchmark for inflecting adjectives into all forms of all_forms_list("adj"),
+# most of which are comparative or superlative forms.  The comparison forms
+# are computed once per adjective by inflect_paradigm() and reused for all
+# cases, possessive suffixes and clitics.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_comparison
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import time
+from wiktfinnish import inflect, all_forms_list
+from wiktfinnish.paradigm import inflect_paradigm
+
+adjectives = [
+    {"template_name": "fi-decl-valo", "pos": "adj",
+     "1": "val", "2": "", "3": "", "4": "o", "5": "a"},
+    {"template_name": "fi-decl-risti", "pos": "adj",
+     "1": "pien", "2": "", "3": "", "4": "ä"},
+    {"template_name": "fi-decl-nainen", "pos": "adj",
+     "1": "iloi", "2": "a"},
+    {"template_name": "fi-decl-hame", "pos": "adj",
+     "1": "tii", "2": "v", "3": "viv", "4": "ä"},
+    {"template_name": "fi-decl-kala", "pos": "adj",
+     "1": "ma", "2": "t", "3": "t", "4": "a"},
+]
+
+
+def bench(args, number=3):
+    forms = all_forms_list("adj")
+    comp_forms = [form for form in forms if form[1]]
+    t = time.perf_counter()
+    for i in range(number):
+        ref = {form: inflect(args, form) for form in forms}
+    t1 = (time.perf_counter() - t) / number
+    t = time.perf_counter()
+    for i in range(number):
+        ret = inflect_paradigm(args, "adj")
+    t2 = (time.perf_counter() - t) / number
+    assert ret == ref
+    print("{:<16} {:6d} forms ({:6d} comparison)  per-form {:8.1f}ms  "
+          "paradigm {:7.1f}ms  speedup {:.1f}x"
+          "".format(args["template_name"], len(forms), len(comp_forms),
+                    t1 * 1e3, t2 * 1e3, t1 / t2))
+
+
+if __name__ == "__main__":
+    for args in adjectives:
+        bench(args)
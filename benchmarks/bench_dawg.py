@@ -0,0 +1,65 @@
+# Benchmark for minimal acyclic automata of inflected forms.  This inflects
+# the words in the test cases into all forms and compares keeping the
+# distinct forms in a Python set with a Dawg built from them, reporting the
+# memory retained (as measured by tracemalloc for the set and by the sizes
+# of the arrays for the automaton), the size of the serialized automaton and
+# membership test times.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_dawg
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import sys
+import time
+import contextlib
+import tracemalloc
+from wiktfinnish import iter_paradigm, build_dawg, Dawg
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def surfaces():
+    ret = set()
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        pos = "verb" if lst[0].startswith("fi-conj") else \
+            args.get("pos", "noun")
+        ret.update(v for form, v in iter_paradigm(args, pos))
+    return sorted(ret)
+
+
+if __name__ == "__main__":
+    with contextlib.redirect_stdout(io.StringIO()):
+        words = surfaces()
+    # Copies, so that the measured structures don't share the strings
+    tracemalloc.start()
+    s = set(w.encode("utf-8").decode("utf-8") for w in words)
+    set_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    t = time.time()
+    dawg = build_dawg(words)
+    t1 = time.time() - t
+    dawg_size = sum(sys.getsizeof(x) for x in (dawg.offsets, dawg.labels,
+                                               dawg.targets, dawg.finals))
+    t = time.time()
+    data = dawg.to_bytes()
+    dawg = Dawg.from_bytes(data)
+    t2 = time.time() - t
+    t = time.time()
+    for w in words:
+        w in s
+    t3 = time.time() - t
+    t = time.time()
+    for w in words:
+        w in dawg
+    t4 = time.time() - t
+    print("{} distinct forms, {} characters".format(
+        len(words), sum(len(w) for w in words)))
+    print("set:   {:7.1f}MB in memory  lookup {:5.2f}us"
+          "".format(set_size / 1e6, t3 / len(words) * 1e6))
+    print("dawg:  {:7.3f}MB in memory  {:7.3f}MB serialized  "
+          "lookup {:5.2f}us".format(dawg_size / 1e6, len(data) / 1e6,
+                                    t4 / len(words) * 1e6))
+    print("       {} states, {} edges, build {:.2f}s, load {:.2f}ms"
+          "".format(dawg.num_states(), dawg.num_edges(), t1, t2 * 1e3))
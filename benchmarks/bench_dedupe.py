@@ -0,0 +1,49 @@
+# Benchmark for declensions with many alternative forms, where the
+# alternatives produced by the templates are deduplicated.  This times
+# calling inflect() for each form, inflect_paradigm() and running
+# inflect_using() directly for each case.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_dedupe
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+from wiktfinnish import inflect, all_forms_list, nounspecs
+from wiktfinnish.formnames import CASE_FORMS
+from wiktfinnish.inflect import inflect_using
+from wiktfinnish.paradigm import inflect_paradigm
+from benchmarks.timing import best
+
+words = [
+    {"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"},
+    {"template_name": "fi-decl-sisar", "1": "kauno", "2": "t", "3": "tt",
+     "4": "ar", "5": "a"},
+    {"template_name": "fi-decl-käsi-kulkija",
+     1: "Uu", 2: "a", "space": "-", 3: "Kaledoni", 4: "a"},
+]
+
+
+def bench(args):
+    forms = all_forms_list("noun")
+    name = args["template_name"]
+
+    def per_form():
+        for form in forms:
+            inflect(args, form)
+
+    def using():
+        for case in CASE_FORMS:
+            for use_poss in (False, True):
+                inflect_using(nounspecs.noun_decls, name, args, case,
+                              use_poss, False)
+
+    t1 = best(per_form, 2)
+    t2 = best(lambda: inflect_paradigm(args, "noun"), 5)
+    t3 = best(using, 200)
+    print("{:<22} per-form {:7.1f}ms  paradigm {:6.1f}ms  "
+          "inflect_using {:6.3f}ms"
+          "".format(name, t1 * 1e3, t2 * 1e3, t3 * 1e3))
+
+
+if __name__ == "__main__":
+    for args in words:
+        bench(args)
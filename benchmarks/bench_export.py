@@ -0,0 +1,68 @@
+# Benchmark for exporting inflected forms into SQLite.  This compares
+# export_sqlite() with inflecting each form separately using inflect() and
+# inserting each row with a separate statement into indexed tables.  A
+# subset of the words in the test cases is used, without clitics, to keep
+# the running time of the separate inserts reasonable.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_export
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import time
+import sqlite3
+import tempfile
+import contextlib
+from wiktfinnish import inflect, all_forms_list, encode_form
+from wiktfinnish.export import export_sqlite
+from wiktfinnish.export import SQLITE_SCHEMA, SQLITE_INDEXES
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases[::4]:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        pos = "verb" if lst[0].startswith("fi-conj") else \
+            args.get("pos", "noun")
+        entries.append((lst[0], args, pos))
+    return entries
+
+
+def export_separately(entries, path):
+    # Each form is inflected with inflect() and inserted separately into
+    # tables whose indexes already exist
+    conn = sqlite3.connect(path)
+    for sql in SQLITE_SCHEMA + SQLITE_INDEXES:
+        conn.execute(sql)
+    num = 0
+    for i, (lemma, args, pos) in enumerate(entries):
+        conn.execute("INSERT INTO lemmas (id, lemma, pos) VALUES (?, ?, ?)",
+                     (i + 1, lemma, pos))
+        for form in all_forms_list(pos, no_clitic=True):
+            for v in inflect(args, form):
+                conn.execute("INSERT INTO words (surface, lemma_id, form_id) "
+                             "VALUES (?, ?, ?)", (v, i + 1, encode_form(form)))
+                num += 1
+        conn.commit()
+    conn.close()
+    return num
+
+
+if __name__ == "__main__":
+    entries = lexicon()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            t = time.time()
+            num1 = export_separately(entries, os.path.join(tmpdir, "a.db"))
+            t1 = time.time() - t
+            t = time.time()
+            stats = export_sqlite(entries, os.path.join(tmpdir, "b.db"),
+                                  no_clitic=True)
+            t2 = time.time() - t
+    assert num1 == stats["words"]
+    print("{} lemmas, {} words".format(len(entries), num1))
+    print("separate inserts {:6.2f}s  export_sqlite {:6.2f}s  {:5.1f}x"
+          "".format(t1, t2, t1 / t2))
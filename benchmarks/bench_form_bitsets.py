@@ -0,0 +1,50 @@
+# Benchmark for form bitsets.  This compares enumerating the forms of a
+# part-of-speech for a new combination of restrictions using all_forms_iter()
+# and using the precomputed bitsets, and times an ad-hoc query for all verb
+# forms with a given clitic.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_form_bitsets
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import time
+from wiktfinnish import formnames
+from wiktfinnish.formnames import (all_forms_iter, form_table, forms_bitset,
+                                   component_bitset, bitset_forms)
+from benchmarks.timing import best
+
+
+def bench(pos, **kwargs):
+    t = time.time()
+    form_table(pos)
+    t0 = time.time() - t
+    t1 = best(lambda: tuple(all_forms_iter(pos, **kwargs)), 20)
+    t2 = best(lambda: bitset_forms(pos, forms_bitset(pos, **kwargs)), 20)
+    print("{:<5} {:6d} forms  table {:6.1f}ms  iter {:6.2f}ms  "
+          "bitsets {:6.2f}ms  {:5.1f}x"
+          "".format(pos, len(bitset_forms(pos, forms_bitset(pos, **kwargs))),
+                    t0 * 1e3, t1 * 1e3, t2 * 1e3, t1 / t2))
+
+
+def bench_query():
+    def iterate():
+        return tuple(x for x in all_forms_iter("verb") if x[4] == "hAn")
+
+    def query():
+        return bitset_forms("verb", forms_bitset("verb") &
+                            component_bitset("verb", clitic="hAn"))
+
+    assert iterate() == query()
+    t1 = best(iterate, 20)
+    t2 = best(query, 20)
+    print("verb forms with hAn: {} forms  iter {:6.2f}ms  bitsets {:6.2f}ms  "
+          "{:5.1f}x".format(len(query()), t1 * 1e3, t2 * 1e3, t1 / t2))
+
+
+if __name__ == "__main__":
+    formnames.form_tables.clear()
+    bench("noun", no_poss=True)
+    bench("adj", no_clitic=True)
+    bench("verb", no_case=True)
+    bench("verb", transitive=False, no_poss=True)
+    bench_query()
@@ -0,0 +1,43 @@
+# Benchmark for form IDs.  This compares form tuples and the corresponding
+# integer form IDs as dictionary keys, in memory, and as the form argument of
+# inflect().
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_form_ids
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+from wiktfinnish import inflect, all_forms_list, all_form_ids
+from benchmarks.timing import best
+
+
+def bench(pos):
+    forms = all_forms_list(pos)
+    ids = all_form_ids(pos)
+    size1 = sum(sys.getsizeof(x) for x in forms)
+    size2 = sum(sys.getsizeof(x) for x in ids)
+    d1 = dict.fromkeys(forms)
+    d2 = dict.fromkeys(ids)
+    t1 = best(lambda: [d1[x] for x in forms], 20)
+    t2 = best(lambda: [d2[x] for x in ids], 20)
+    print("{:<5} {:6d} forms  tuples {:7.0f}kB {:6.2f}ms  "
+          "IDs {:7.0f}kB {:6.2f}ms"
+          "".format(pos, len(forms), size1 / 1024, t1 * 1e3, size2 / 1024,
+                    t2 * 1e3))
+
+
+def bench_inflect():
+    args = {"template_name": "fi-decl-valo",
+            "1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+    forms = all_forms_list("noun", no_poss=True, no_clitic=True)
+    ids = all_form_ids("noun", no_poss=True, no_clitic=True)
+    t1 = best(lambda: [inflect(args, x) for x in forms], 20)
+    t2 = best(lambda: [inflect(args, x) for x in ids], 20)
+    print("inflect() {} forms  tuples {:6.2f}ms  IDs {:6.2f}ms"
+          "".format(len(forms), t1 * 1e3, t2 * 1e3))
+
+
+if __name__ == "__main__":
+    for pos in ("noun", "adj", "verb"):
+        bench(pos)
+    bench_inflect()
@@ -0,0 +1,56 @@
+# Benchmark for persisted form tables.  This compares building the form
+# tables of all parts-of-speech with loading them from a file, as a worker
+# process would, and the memory used by a verb paradigm stored as a
+# dictionary keyed by form tuples and as a flat list indexed by form
+# position.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_form_tables
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import sys
+import time
+import tempfile
+from wiktfinnish import formnames
+from wiktfinnish import inflect_paradigm, form_positions, all_forms_list
+
+
+def bench_load():
+    formnames.form_tables.clear()
+    t = time.time()
+    for pos in formnames.ALL_POS:
+        formnames.form_table(pos)
+    t1 = time.time() - t
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "forms.bin")
+        formnames.save_form_tables(path)
+        size = os.path.getsize(path)
+        formnames.form_tables.clear()
+        t = time.time()
+        assert formnames.load_form_tables(path)
+        t2 = time.time() - t
+    print("form tables: build {:6.1f}ms  load {:6.1f}ms ({:.0f}kB)  {:5.1f}x"
+          "".format(t1 * 1e3, t2 * 1e3, size / 1024, t1 / t2))
+
+
+def bench_memory():
+    args = {"template_name": "fi-conj-sanoa",
+            "1": "sano", "2": "", "3": "", "4": "a"}
+    ret = inflect_paradigm(args, "verb")
+    forms = all_forms_list("verb")
+    positions = form_positions("verb")
+    flat = [None] * len(forms)
+    for form, v in ret.items():
+        flat[positions[form]] = v
+    assert all(flat[positions[x]] is ret[x] for x in forms)
+    # Size of the containers themselves; the forms and the result lists are
+    # the same in both
+    print("verb paradigm: dict {:6.0f}kB  flat list {:6.0f}kB"
+          "".format(sys.getsizeof(ret) / 1024,
+                    sys.getsizeof(flat) / 1024))
+
+
+if __name__ == "__main__":
+    bench_load()
+    bench_memory()
@@ -0,0 +1,54 @@
+# Benchmark for finite-state export.  This exports the words in the test
+# cases as lexc continuation classes and as an AT&T format transducer, and
+# reports the time, the number of continuation classes shared by the words
+# and the size of the output compared with listing every inflected form.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_fst
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import time
+import contextlib
+from wiktfinnish import inflect, iter_paradigm
+from wiktfinnish.export import export_lexc, export_att
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        if lst[0].startswith("fi-conj"):
+            pos = "verb"
+            form = ("inf1", "", "", "", "")
+        else:
+            pos = args.get("pos", "noun")
+            form = ("", "", "", "", "")
+        lemma = (inflect(args, form) or [""])[0]
+        entries.append((lemma, args, pos))
+    return entries
+
+
+if __name__ == "__main__":
+    with contextlib.redirect_stdout(io.StringIO()):
+        entries = lexicon()
+        num = sum(1 for lemma, args, pos in entries
+                  for x in iter_paradigm(args, pos))
+        t = time.time()
+        f1 = io.StringIO()
+        stats1 = export_lexc(entries, f1)
+        t1 = time.time() - t
+        t = time.time()
+        f2 = io.StringIO()
+        stats2 = export_att(entries, f2)
+        t2 = time.time() - t
+    print("{} words, {} inflected forms, {} continuation classes"
+          "".format(len(entries), num, stats1["lexicons"] - 1))
+    print("lexc: {:6.2f}s  {} entries ({:.1%} of forms)  {:.1f}MB"
+          "".format(t1, stats1["entries"], stats1["entries"] / num,
+                    len(f1.getvalue()) / 1e6))
+    print("AT&T: {:6.2f}s  {} states  {} arcs  {:.1f}MB"
+          "".format(t2, stats2["states"], stats2["arcs"],
+                    len(f2.getvalue()) / 1e6))
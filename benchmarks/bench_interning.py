@@ -0,0 +1,64 @@
+# Benchmark for interning inflected forms.  This keeps the paradigms of the
+# words in the test cases in memory, as an in-memory lexicon would, with and
+# without an Interner, and reports the memory retained (as measured by
+# tracemalloc) and the statistics of the interner.  The interner table is
+# cleared once the lexicon has been built; the results keep sharing the
+# canonical strings.  Clitics are left out to keep the running time
+# reasonable under tracemalloc.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_interning
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import time
+import contextlib
+import tracemalloc
+from wiktfinnish import inflect_paradigm, compact_paradigm, Interner
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        pos = "verb" if lst[0].startswith("fi-conj") else \
+            args.get("pos", "noun")
+        entries.append((args, pos))
+    return entries
+
+
+def bench(name, func, entries, interner):
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm up the caches of forms and declensions outside measurement
+        for args, pos in entries:
+            func(args, pos, no_clitic=True)
+        tracemalloc.start()
+        t = time.time()
+        paradigms = [func(args, pos, no_clitic=True, interner=interner)
+                     for args, pos in entries]
+        t = time.time() - t
+        peak = tracemalloc.get_traced_memory()[1]
+        stats = interner.stats() if interner is not None else None
+        if interner is not None:
+            interner.clear()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    print("{:<18} {:<9} {:7.1f}MB  peak {:7.1f}MB  {:6.2f}s"
+          "".format(name, "interned" if interner is not None else "",
+                    size / 1e6, peak / 1e6, t))
+    if stats is not None:
+        print("    {} forms, {} distinct, {} replaced ({:.0%}), "
+              "{:.1f}MB saved".format(stats["lookups"], stats["size"],
+                                      stats["hits"], stats["hit_rate"],
+                                      stats["saved_bytes"] / 1e6))
+    return paradigms
+
+
+if __name__ == "__main__":
+    entries = lexicon()
+    for name, func in (("inflect_paradigm", inflect_paradigm),
+                       ("compact_paradigm", compact_paradigm)):
+        bench(name, func, entries, None)
+        bench(name, func, entries, Interner())
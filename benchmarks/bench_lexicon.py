@@ -0,0 +1,87 @@
+# Benchmark for binary lexicon files.  This builds a lexicon of the words in
+# the test cases and compares opening it using mmap with building the same
+# lookup table as a Python dictionary, as each worker process would
+# otherwise do, and reports the memory retained by the dictionary (as
+# measured by tracemalloc) and lookup times.  Clitics are left out to keep
+# the running time reasonable.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_lexicon
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import time
+import tempfile
+import contextlib
+import tracemalloc
+from wiktfinnish import inflect, iter_paradigm, encode_paradigm
+from wiktfinnish.lexicon import build_lexicon, Lexicon
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        if lst[0].startswith("fi-conj"):
+            pos = "verb"
+            form = ("inf1", "", "", "", "")
+        else:
+            pos = args.get("pos", "noun")
+            form = ("", "", "", "", "")
+        lemma = (inflect(args, form) or [""])[0]
+        entries.append((lemma, args, pos))
+    return entries
+
+
+def dict_lexicon(entries):
+    ret = {}
+    for lemma, args, pos in entries:
+        stem, code = encode_paradigm(args)
+        if code is None:
+            continue
+        for form, v in iter_paradigm(args, pos, no_clitic=True):
+            if v not in ret:
+                ret[v] = []
+            ret[v].append((lemma, (stem, code, pos), form))
+    return ret
+
+
+if __name__ == "__main__":
+    with contextlib.redirect_stdout(io.StringIO()):
+        entries = lexicon()
+        t = time.time()
+        tracemalloc.start()
+        d = dict_lexicon(entries)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        t1 = time.time() - t
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "lexicon.bin")
+        with contextlib.redirect_stdout(io.StringIO()):
+            t = time.time()
+            stats = build_lexicon(entries, path, no_clitic=True)
+            t2 = time.time() - t
+        t = time.time()
+        lex = Lexicon(path)
+        t3 = time.time() - t
+        words = list(d)
+        t = time.time()
+        for w in words:
+            d[w]
+        t4 = time.time() - t
+        t = time.time()
+        for w in words:
+            lex.lookup(w)
+        t5 = time.time() - t
+        print("{} surfaces, {} records".format(stats["surfaces"],
+                                               stats["records"]))
+        print("dict:  build {:6.2f}s  {:7.1f}MB in memory  "
+              "lookup {:5.2f}us".format(t1, size / 1e6,
+                                        t4 / len(words) * 1e6))
+        print("mmap:  build {:6.2f}s  {:7.1f}MB file  open {:6.2f}ms  "
+              "lookup {:5.2f}us".format(t2, os.path.getsize(path) / 1e6,
+                                        t3 * 1e3, t5 / len(words) * 1e6))
+        lex.close()
@@ -0,0 +1,102 @@
+# Benchmark for generating full paradigms.  This compares calling inflect()
+# separately for each form returned by all_forms_list() against a single
+# call of inflect_paradigm().  The per-form loop is timed with the current
+# inflect() and, if a git revision is given, also with inflect() of that
+# revision (e.g., the revision before inflect_paradigm() and the other
+# optimizations were added), which is run in a subprocess from a copy of
+# its sources.
+#
+# Usage (in the top-level directory):
+#   python3 -m benchmarks.bench_paradigm [revision]
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import sys
+import json
+import tarfile
+import tempfile
+import subprocess
+from wiktfinnish import inflect, all_forms_list
+from wiktfinnish.paradigm import inflect_paradigm
+from benchmarks.timing import best
+
+WORDS = [
+    ({"template_name": "fi-decl-valo",
+      "1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"}, "noun"),
+    ({"template_name": "fi-decl-kala",
+      "1": "ka", "2": "", "3": "", "4": "a"}, "noun"),
+    ({"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"}, "noun"),
+    ({"template_name": "fi-decl-nainen", "1": "nai", "2": "a"}, "noun"),
+    ({"template_name": "fi-decl-valo", "pos": "adj",
+      "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "adj"),
+    ({"template_name": "fi-conj-sanoa",
+      "1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"}, "verb"),
+    ({"template_name": "fi-conj-muistaa",
+      "1": "astu", "2": "tt", "3": "t", "4": "a"}, "verb"),
+]
+
+# Times the per-form loop for each word in WORDS (read from stdin) using the
+# wiktfinnish package found first on sys.path, and prints the times as JSON
+PER_FORM_SCRIPT = """
+import sys, json, time, io, contextlib
+from wiktfinnish import inflect, all_forms_list
+ret = []
+for args, pos, number in json.load(sys.stdin):
+    forms = all_forms_list(pos)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for form in forms:  # Warm up
+            inflect(args, form)
+        best = None
+        for i in range(7):
+            t = time.perf_counter()
+            for j in range(number):
+                {form: inflect(args, form) for form in forms}
+            t = (time.perf_counter() - t) / number
+            best = t if best is None else min(best, t)
+    ret.append(best)
+print(json.dumps(ret))
+"""
+
+
+def number_for(pos):
+    return 1 if pos in ("adj", "verb") else 20
+
+
+def revision_times(revision):
+    """Times the per-form loop with inflect() of the git ``revision``."""
+    data = subprocess.check_output(["git", "archive", revision,
+                                    "wiktfinnish"])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            tar.extractall(tmpdir)
+        env = dict(os.environ, PYTHONPATH=tmpdir)
+        words = [(args, pos, number_for(pos)) for args, pos in WORDS]
+        out = subprocess.run([sys.executable, "-c", PER_FORM_SCRIPT],
+                             input=json.dumps(words), env=env, cwd=tmpdir,
+                             stdout=subprocess.PIPE, universal_newlines=True,
+                             check=True).stdout
+    return json.loads(out)
+
+
+if __name__ == "__main__":
+    revision = sys.argv[1] if len(sys.argv) > 1 else None
+    ref_times = revision_times(revision) if revision else None
+    for i, (args, pos) in enumerate(WORDS):
+        forms = all_forms_list(pos)
+        number = number_for(pos)
+        ref = {form: inflect(args, form) for form in forms}
+        assert inflect_paradigm(args, pos) == ref
+        t1 = best(lambda: {form: inflect(args, form) for form in forms},
+                  number, repeat=7)
+        t2 = best(lambda: inflect_paradigm(args, pos), number, repeat=7)
+        line = ("{:<16} {:<4} {:5d} forms  per-form {:7.1f}ms  paradigm "
+                "{:6.2f}ms  speedup {:5.1f}x"
+                "".format(args["template_name"], pos, len(forms), t1 * 1e3,
+                          t2 * 1e3, t1 / t2))
+        if ref_times is not None:
+            t0 = ref_times[i]
+            line += ("  |  {} per-form {:7.1f}ms  speedup {:5.1f}x"
+                     "".format(revision, t0 * 1e3, t0 / t2))
+        print(line)
@@ -0,0 +1,86 @@
+# Benchmark for compound words with split declensions (e.g.,
+# fi-decl-käsi-kulkija).  This measures the time and peak memory of
+# generating all forms of compound words, and the peak memory of joining
+# the parts lazily with split_product() compared to building the cross
+# product eagerly.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_split
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import time
+import tracemalloc
+from wiktfinnish import inflect, all_forms_list
+from wiktfinnish.paradigm import inflect_paradigm
+from wiktfinnish.inflect import split_product
+
+compounds = [
+    {"template_name": "fi-decl-käsi-kulkija",
+     1: "Uu", 2: "a", "space": "-", 3: "Kaledoni", 4: "a"},
+    {"template_name": "fi-decl-valo-kala",
+     "1": "val", "2": "", "3": "", "4": "o", "5": "a",
+     "6": "kal", "7": "t", "8": "d", "9": "a"},
+    {"template_name": "fi-decl-koira-vieras",
+     "1": "kov", "2": "", "3": "", "4": "a", "5": "viera", "6": "a"},
+    {"template_name": "fi-decl-pieni-uni",
+     "1": "Pien", "2": "i", "3": "Kar", "4": "i", "5": "a"},
+]
+
+
+def measure(func):
+    tracemalloc.start()
+    t = time.perf_counter()
+    ret = func()
+    t = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return ret, t, peak
+
+
+def bench_paradigm(args):
+    forms = all_forms_list("noun")
+    ref, t1, m1 = measure(lambda: {form: inflect(args, form)
+                                   for form in forms})
+    ret, t2, m2 = measure(lambda: inflect_paradigm(args, "noun"))
+    assert ret == ref
+    print("{:<22} {:5d} forms  per-form {:7.1f}ms {:6.0f}kB  "
+          "paradigm {:6.1f}ms {:6.0f}kB"
+          "".format(args["template_name"], len(forms), t1 * 1e3, m1 / 1024,
+                    t2 * 1e3, m2 / 1024))
+
+
+def eager_product(rets, space):
+    # The cross product as it was built before split_product()
+    results = []
+    for ret in rets:
+        if not results:
+            results.extend(ret)
+        else:
+            new_results = []
+            for x in results:
+                for y in ret:
+                    new_results.append(x + space + y)
+            results = new_results
+    return results
+
+
+def bench_product(num_parts, num_alts, number=100):
+    rets = [["osa{}vaihtoehto{}".format(i, j) for j in range(num_alts)]
+            for i in range(num_parts)]
+    ref, t1, m1 = measure(lambda: [len(eager_product(rets, " "))
+                                   for i in range(number)])
+    ret, t2, m2 = measure(lambda: [sum(1 for x in split_product(rets, " "))
+                                   for i in range(number)])
+    assert ret == ref
+    print("{} parts x {} alternatives  eager {:7.1f}ms {:6.0f}kB  "
+          "lazy {:7.1f}ms {:6.0f}kB"
+          "".format(num_parts, num_alts, t1 * 1e3, m1 / 1024, t2 * 1e3,
+                    m2 / 1024))
+
+
+if __name__ == "__main__":
+    for args in compounds:
+        bench_paradigm(args)
+    bench_product(2, 3)
+    bench_product(3, 4)
+    bench_product(4, 6)
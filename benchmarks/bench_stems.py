@@ -0,0 +1,49 @@
+# Benchmark for per-word stem tables.  This runs all templates of a
+# declension/conjugation for one word with run_template() and with
+# run_template_stems() (which computes each stem only once per word).
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_stems
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import timeit
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish.inflect import (compile_template, run_template,
+                                 run_template_stems, split_template)
+from wiktfinnish.codegen import template_items
+
+
+def bench(name, decl, args, number=2000):
+    templates = [t for k, v in template_items(decl) for t in v]
+    programs = [compile_template(t) for t in templates]
+    stems = {}
+    for t, p in zip(templates, programs):
+        assert run_template_stems(t, args, stems) == run_template(p, args)
+    nstems = len(set(split_template(t)[0] for t in templates))
+
+    def interpreted():
+        for p in programs:
+            run_template(p, args)
+
+    def with_stems():
+        stems = {}
+        for t in templates:
+            run_template_stems(t, args, stems)
+
+    t1 = min(timeit.repeat(interpreted, number=number, repeat=5))
+    t2 = min(timeit.repeat(with_stems, number=number, repeat=5))
+    print("{:<16} {:4d} templates {:3d} stems  run_template {:7.1f}us  "
+          "stem table {:7.1f}us  speedup {:.2f}x"
+          "".format(name, len(templates), nstems, t1 / number * 1e6,
+                    t2 / number * 1e6, t1 / t2))
+
+
+if __name__ == "__main__":
+    bench("fi-decl-valo", nounspecs.noun_decls["fi-decl-valo"],
+          {"1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"})
+    bench("fi-decl-kala", nounspecs.noun_decls["fi-decl-kala"],
+          {"1": "helky", "2": "nt", "3": "nn", "4": "ä"})
+    bench("fi-conj-sanoa", verbspecs.verb_conjs["fi-conj-sanoa"],
+          {"1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"})
+    bench("fi-conj-tulla", verbspecs.verb_conjs["fi-conj-tulla"],
+          {"1": "est", "2": "", "3": "", "4": "el", "5": "ä"})
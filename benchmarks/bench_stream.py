@@ -0,0 +1,63 @@
+# Benchmark for exporting all forms of a lexicon.  This compares collecting
+# the paradigms with inflect_paradigm() before writing them against
+# streaming the forms from iter_paradigm() directly to the output, and
+# reports the time and peak memory (as measured by tracemalloc) of each.
+# Clitics are left out to keep the running time reasonable under
+# tracemalloc.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_stream
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import time
+import contextlib
+import tracemalloc
+from wiktfinnish import inflect_paradigm, iter_paradigm
+from wiktfinnish.tests.test_inflect import testcases
+
+
+def lexicon():
+    entries = []
+    for lst in testcases:
+        args = dict(lst[1])
+        args["template_name"] = lst[0]
+        pos = "verb" if lst[0].startswith("fi-conj") else \
+            args.get("pos", "noun")
+        entries.append((args, pos))
+    return entries
+
+
+def export_collected(entries, f):
+    paradigms = [(args, inflect_paradigm(args, pos, no_clitic=True))
+                 for args, pos in entries]
+    for args, paradigm in paradigms:
+        for form, results in paradigm.items():
+            for v in results:
+                f.write("{}\t{}\n".format("|".join(form), v))
+
+
+def export_streamed(entries, f):
+    for args, pos in entries:
+        for form, v in iter_paradigm(args, pos, no_clitic=True):
+            f.write("{}\t{}\n".format("|".join(form), v))
+
+
+def bench(name, func, entries):
+    with open(os.devnull, "w") as f:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tracemalloc.start()
+            t = time.perf_counter()
+            func(entries, f)
+            t = time.perf_counter() - t
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    print("{:<10} {:4d} words  {:8.1f}ms  peak {:8.1f}MB"
+          "".format(name, len(entries), t * 1e3, peak / 1e6))
+
+
+if __name__ == "__main__":
+    entries = lexicon()
+    bench("collected", export_collected, entries)
+    bench("streamed", export_streamed, entries)
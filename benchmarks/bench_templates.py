@@ -0,0 +1,155 @@
+# Benchmark for compiled inflection templates.  This compares the original
+# character-by-character template interpreter against the compiled
+# programs executed by run_template(), on full paradigms of fi-decl-valo
+# and fi-conj-sanoa.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_templates
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import re
+import timeit
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish.inflect import (EMPTY_CHAR, compile_template, run_template,
+                                 needs_aou, word_to_aae, last_char_to_vowel)
+
+
+def legacy_process_template(template, args, ill_sg_vowel=None):
+    """The template interpreter as it was before templates were compiled.
+    This parses the template string on every call."""
+    parts = []
+    delparts = []
+    for x in template:
+        if x.isdigit():
+            k = int(x)
+            if k in args:
+                v = args[k]
+            else:
+                v = args.get(x, "")
+            if v == "(')":
+                v = ""
+            if x == "9":
+                if "par_sg_a" in args:
+                    parts.append(args["par_sg_a"])
+                else:
+                    if not delparts:
+                        return None
+                    parts.append(delparts[-1])
+            if x == "3" and not v:
+                v = EMPTY_CHAR
+            for y in v:
+                parts.append(y)
+        elif x == "@":
+            if ill_sg_vowel is not None:
+                parts.append(ill_sg_vowel)
+            else:
+                p = "".join(parts + delparts)
+                m = re.search(r"([aeiouyåäöAEIOUYÅÄÖ])"
+                              r"[^aeiouyåäöAEIOUYÅÄÖ]*$",
+                              p)
+                if m:
+                    parts.append(m.group(1).lower())
+                else:
+                    m = re.search(r"[éÉ]"
+                                  r"[^aeiouyåäöAEIOUYÅÄÖ]*$",
+                                  p)
+                    if m:
+                        parts.append("e")
+                    elif p:
+                        parts.append(last_char_to_vowel(p[-1]))
+                    else:
+                        return None
+        elif x == "A":
+            a = args.get("par_sg_a", None)
+            if a:
+                parts.append(a)
+            else:
+                p = "".join(parts + delparts)
+                parts.append(word_to_aae(p))
+        elif x == "O":
+            p = "".join(parts + delparts)
+            parts.append("o" if needs_aou(p) else "ö")
+        elif x == "U":
+            p = "".join(parts + delparts)
+            parts.append("u" if needs_aou(p) else "y")
+        elif x == "D":
+            p = "".join(parts)
+            if not p:
+                return None
+            if p[-1] in "rnml":
+                parts.append(p[-1])
+            else:
+                parts.append("d")
+        elif x == "I":
+            if not delparts:
+                return None
+            if delparts[-1] == "i":
+                parts.append("e")
+            else:
+                parts.append(delparts[-1])
+        elif x == "-":
+            if not parts:
+                return None
+            p = parts.pop()
+            if p not in "aeiouyäöp":
+                return None
+            delparts.append(p)
+        elif x == "/":
+            if len(parts) < 2:
+                return None
+            p = parts.pop()
+            if p not in "aeiouyäö":
+                return None
+            p2 = parts.pop()
+            if p2 not in "aeiouyäö":
+                return None
+            parts.append(p)
+        else:
+            parts.append(x)
+    v = "".join(parts)
+    if v.find(EMPTY_CHAR) >= 0:
+        for ch in "aeiouyäöAEIOUYÄÖ":
+            v = re.sub("([aeiouyäöAEIOUYÄÖ]" + ch + ")" + EMPTY_CHAR +
+                       "(" + ch + ")", r"\1'\2", v)
+        v = re.sub(EMPTY_CHAR, "", v)
+    return v
+
+
+def paradigm_templates(decl):
+    """Returns a list of all template strings in a declension/conjugation."""
+    templates = []
+    for k, v in decl.items():
+        if isinstance(v, str) and k not in ("split",):
+            templates.append(v)
+        elif isinstance(v, list):
+            templates.extend(v)
+    return templates
+
+
+def bench(name, decl, args, number=2000):
+    templates = paradigm_templates(decl)
+    programs = [compile_template(t) for t in templates]
+    for t, p in zip(templates, programs):
+        assert legacy_process_template(t, args) == run_template(p, args)
+
+    def legacy():
+        for t in templates:
+            legacy_process_template(t, args)
+
+    def compiled():
+        for p in programs:
+            run_template(p, args)
+
+    t1 = min(timeit.repeat(legacy, number=number, repeat=3))
+    t2 = min(timeit.repeat(compiled, number=number, repeat=3))
+    print("{:<16} {:4d} templates  legacy {:8.1f}us  compiled {:8.1f}us  "
+          "speedup {:.2f}x"
+          "".format(name, len(templates), t1 / number * 1e6,
+                    t2 / number * 1e6, t1 / t2))
+
+
+if __name__ == "__main__":
+    bench("fi-decl-valo", nounspecs.noun_decls["fi-decl-valo"],
+          {"1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"})
+    bench("fi-conj-sanoa", verbspecs.verb_conjs["fi-conj-sanoa"],
+          {"1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"})
@@ -0,0 +1,66 @@
+# Benchmark for computing the template forms of many words of the same
+# declension.  This compares the template interpreter, the generated code
+# (called separately for each word) and batch_template_forms() with and
+# without NumPy.
+#
+# Usage (in the top-level directory): python3 -m benchmarks.bench_vectorized
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import random
+import time
+from wiktfinnish import codegen
+from wiktfinnish import vectorized
+
+
+def random_stems(n, seed=1):
+    rnd = random.Random(seed)
+    stems = []
+    for i in range(n):
+        stem = ""
+        for j in range(rnd.randint(1, 3)):
+            stem += rnd.choice("ptkshlmnrv") + rnd.choice("aeiouyäö")
+        stems.append(stem + rnd.choice(["l", "n", "r", "s", "t", ""]))
+    return stems
+
+
+def bench(name, args_list, number=1):
+    t = time.perf_counter()
+    for i in range(number):
+        ref = [codegen.interpreted_forms(name, args) for args in args_list]
+    t1 = (time.perf_counter() - t) / number
+    t = time.perf_counter()
+    for i in range(number):
+        gen = [codegen.template_forms(name, args) for args in args_list]
+    t2 = (time.perf_counter() - t) / number
+    t = time.perf_counter()
+    for i in range(number):
+        ret = vectorized.batch_template_forms(name, args_list,
+                                              use_numpy=False)
+    t3 = (time.perf_counter() - t) / number
+    assert ret == ref and gen == ref
+    line = ("{:<16} {:6d} words  interpreted {:7.1f}ms  generated {:7.1f}ms  "
+            "batch {:7.1f}ms".format(name, len(args_list), t1 * 1e3,
+                                     t2 * 1e3, t3 * 1e3))
+    if vectorized.np is not None:
+        t = time.perf_counter()
+        for i in range(number):
+            ret = vectorized.batch_template_forms(name, args_list,
+                                                  use_numpy=True)
+        t4 = (time.perf_counter() - t) / number
+        assert ret == ref
+        line += "  numpy {:7.1f}ms".format(t4 * 1e3)
+    else:
+        line += "  (NumPy not installed)"
+    print(line)
+
+
+if __name__ == "__main__":
+    stems = random_stems(20000)
+    bench("fi-decl-valo",
+          [{"1": x, "2": "", "3": "", "4": "o", "5": "a"} for x in stems])
+    bench("fi-decl-palvelu", [{"1": x + "u", "2": "a"} for x in stems])
+    bench("fi-decl-risti", [{"1": x, "2": "", "3": "", "4": "ä"}
+                            for x in stems])
+    bench("fi-conj-sanoa",
+          [{"1": x, "2": "", "3": "", "4": "o", "5": "a"} for x in stems])
@@ -0,0 +1,12 @@
+# Timing helper shared by the benchmarks.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import timeit
+
+
+def best(func, number, repeat=5):
+    """Calls ``func`` ``number`` times in each of ``repeat`` runs and
+    returns the time per call in seconds in the fastest run, as the timings
+    are noisy."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
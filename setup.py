@@ -19,6 +19,7 @@ setup(name="wiktfinnish",
       download_url="https://github.com/tatuylonen/wiktfinnish",
       packages=["wiktfinnish"],
       # install_requires=[],
+      extras_require={"numpy": ["numpy"]},
       classifiers=[
           "Development Status :: 3 - Alpha",
           "Intended Audience :: Developers",
@@ -5,15 +5,44 @@
 from wiktfinnish.formnames import COMPARATIVE_FORMS, CASE_FORMS
 from wiktfinnish.formnames import POSSESSIVE_FORMS, VERB_FORMS, CLITIC_FORMS
 from wiktfinnish.formnames import all_forms_list, all_forms_iter
+from wiktfinnish.formnames import encode_form, decode_form, all_form_ids
+from wiktfinnish.formnames import forms_bitset, component_bitset
+from wiktfinnish.formnames import bitset_forms, bitset_form_ids
+from wiktfinnish.formnames import form_positions
+from wiktfinnish.formnames import save_form_tables, load_form_tables
 from wiktfinnish.inflect import inflect
 from wiktfinnish.inflect import add_clitic
 from wiktfinnish.inflect import last_char_to_vowel, last_char_to_aou
 from wiktfinnish.inflect import word_to_aae
+from wiktfinnish.inflect import ParadigmArgs, normalize_args
+from wiktfinnish.paradigm import inflect_paradigm, inflect_batch
+from wiktfinnish.paradigm import iter_paradigm, iter_inflect
+from wiktfinnish.paradigm import Paradigm, compact_paradigm
+from wiktfinnish.cache import InflectCache
+from wiktfinnish.interning import Interner
+from wiktfinnish.dawg import (Dawg, DawgBuilder, build_dawg, forms_dawg,
+                              sorted_forms, sorted_words)
 from wiktfinnish.stem import encode_paradigm, decode_paradigm, valid_unknown_stem, is_exceptional, is_compound_declension, is_guessable, paradigm_nargs, get_blocked_paradigms
 
 
 __all__ = (
     "inflect",
+    "inflect_paradigm",
+    "inflect_batch",
+    "iter_paradigm",
+    "iter_inflect",
+    "Paradigm",
+    "compact_paradigm",
+    "ParadigmArgs",
+    "normalize_args",
+    "InflectCache",
+    "Interner",
+    "Dawg",
+    "DawgBuilder",
+    "build_dawg",
+    "forms_dawg",
+    "sorted_forms",
+    "sorted_words",
     "add_clitic",
     "COMPARATIVE_FORMS",
     "CASE_FORMS",
@@ -22,6 +51,16 @@ __all__ = (
     "CLITIC_FORMS",
     "all_forms_list",
     "all_forms_iter",
+    "encode_form",
+    "decode_form",
+    "all_form_ids",
+    "forms_bitset",
+    "component_bitset",
+    "bitset_forms",
+    "bitset_form_ids",
+    "form_positions",
+    "save_form_tables",
+    "load_form_tables",
     "last_char_to_vowel",
     "last_char_to_aou",
     "word_to_aae",
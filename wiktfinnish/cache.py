@@ -0,0 +1,94 @@
+# Optional caching layer for inflect().  Typical workloads inflect a
+# relatively small set of common words over and over, and this allows
+# reusing previously computed forms.  The cache has a bounded size and
+# keeps statistics that can be used for sizing it.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import collections
+from wiktfinnish.formnames import decode_form
+from wiktfinnish.inflect import inflect, ParadigmArgs
+
+# Supported eviction policies.  "lru" evicts the least recently used entry,
+# "fifo" evicts the oldest entry regardless of use.
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+def args_key(args):
+    """Returns a hashable key for the conjugation/declension arguments
+    ``args``.  Integer and string argument names (e.g., 1 and "1") are
+    treated as the same name, unless both are present.  Raises TypeError if
+    some argument value is not hashable."""
+    if type(args) is ParadigmArgs:
+        return args  # Already hashable
+    items = [(str(k), v) for k, v in args.items()]
+    if len(set(k for k, v in items)) != len(items):
+        # Both 1 and "1" present; these must be kept separate.
+        items = [((str(k), isinstance(k, int)), v) for k, v in args.items()]
+    items.sort()
+    return tuple(items)
+
+
+class InflectCache(object):
+    """A bounded cache of inflect() results.  Call the ``inflect`` method
+    instead of wiktfinnish.inflect().  Results are stored as tuples and
+    returned as new lists, so callers may modify the returned lists."""
+    __slots__ = ("maxsize", "policy", "hits", "misses", "evictions",
+                 "cache")
+
+    def __init__(self, maxsize=100000, policy="lru"):
+        assert isinstance(maxsize, int) and maxsize > 0
+        assert policy in EVICTION_POLICIES
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.cache = collections.OrderedDict()
+
+    def inflect(self, args, form, force_n=False):
+        """Same as wiktfinnish.inflect(), but uses the cache.  ``form`` may
+        also be a form ID."""
+        if isinstance(form, int):
+            form = decode_form(form)
+        try:
+            key = (args_key(args), tuple(form), force_n)
+        except TypeError:
+            # Some argument is not hashable; don't cache
+            self.misses += 1
+            return inflect(args, form, force_n=force_n)
+        cache = self.cache
+        ret = cache.get(key)
+        if ret is not None:
+            self.hits += 1
+            if self.policy == "lru":
+                cache.move_to_end(key)
+            return list(ret)
+        self.misses += 1
+        results = inflect(args, form, force_n=force_n)
+        cache[key] = tuple(results)
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return list(results)
+
+    def clear(self):
+        """Removes all entries from the cache and resets statistics."""
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        """Returns a dictionary of cache statistics: hits, misses,
+        evictions, size, maxsize and hit_rate."""
+        total = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.cache),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def __len__(self):
+        return len(self.cache)
@@ -0,0 +1,398 @@
+# Code generation backend for inflection templates.  Each declension in
+# nounspecs.noun_decls and each conjugation in verbspecs.verb_conjs is
+# translated into Python source for a function that takes the declension
+# arguments and returns all template forms of that declension in one call.
+# Templates that consist only of arguments, literals and vowel harmony
+# become straight-line string concatenations; the rest (deletions, "9",
+# "I" etc.) call the compiled template interpreter.  The generated source is
+# cached on disk together with its compiled code object.  The generated
+# functions are used for generating all forms of words when selected as the
+# template backend (see inflect.TEMPLATE_BACKENDS).
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import hashlib
+import marshal
+import importlib.util
+from wiktfinnish import nounspecs
+from wiktfinnish import verbspecs
+from wiktfinnish.formnames import CACHE_ENV
+from wiktfinnish.inflect import (EMPTY_CHAR, OP_LITERAL, OP_ARG, OP_ARG_WEAK,
+                                 OP_ILLATIVE, OP_A, OP_O, OP_U, OP_D,
+                                 compile_template, run_template,
+                                 insert_apostrophes, scan_vowel_state,
+                                 word_back,
+                                 last_char_to_vowel, default_args,
+                                 ParadigmArgs)
+
+# Version of the generated code.  Increment this whenever the generator
+# changes in a way that affects its output, so that stale cache files are
+# not used.
+GENERATOR_VERSION = 1
+
+# Keys in declension/conjugation definitions that are not form templates.
+NON_TEMPLATE_KEYS = set(["nargs", "split", "internal", "default",
+                         "min-stem-len", "ignore-extra-args", "no-poss"])
+
+# Opcodes that can be translated into straight-line code.
+STRAIGHT_OPS = set([OP_LITERAL, OP_ARG, OP_ARG_WEAK, OP_ILLATIVE, OP_A, OP_O,
+                    OP_U, OP_D])
+
+
+class TemplateFailed(Exception):
+    """Raised by the helpers of generated code when a template cannot be
+    applied to the arguments (run_template() would return None)."""
+    pass
+
+
+def _arg(args, k, x):
+    if type(args) is ParadigmArgs:
+        return args.positional[k]
+    if k in args:
+        v = args[k]
+    else:
+        v = args.get(x, "")
+    if v == "(')":
+        v = ""
+    return v
+
+
+def _add(results, v):
+    if v and v not in results:
+        results.append(v)
+
+
+def _apos(v):
+    if EMPTY_CHAR in v:
+        return insert_apostrophes(v)
+    return v
+
+
+# The helpers below are called with the word built so far, which rarely
+# repeats, so its vowel state is not cached.
+
+def _harm_a(v, par_sg_a):
+    if par_sg_a:
+        return par_sg_a
+    return "a" if word_back(v) else "ä"
+
+
+def _harm_o(v):
+    return "o" if word_back(v) else "ö"
+
+
+def _harm_u(v):
+    return "u" if word_back(v) else "y"
+
+
+def _ill(v, ill_sg_vowel):
+    if ill_sg_vowel is not None:
+        return ill_sg_vowel
+    back, vowel, acute = scan_vowel_state(v)
+    if vowel is not None:
+        return vowel
+    if acute:
+        return "e"
+    if not v:
+        raise TemplateFailed
+    return last_char_to_vowel(v[-1])
+
+
+def _d(v):
+    if not v:
+        raise TemplateFailed
+    if v[-1] in "rnml":
+        return v[-1]
+    return "d"
+
+
+# Namespace in which generated code is executed.
+HELPERS = {
+    "EMPTY_CHAR": EMPTY_CHAR,
+    "TemplateFailed": TemplateFailed,
+    "_arg": _arg,
+    "_add": _add,
+    "_apos": _apos,
+    "_harm_a": _harm_a,
+    "_harm_o": _harm_o,
+    "_harm_u": _harm_u,
+    "_ill": _ill,
+    "_d": _d,
+    "_run": run_template,
+}
+
+
+def template_items(decl):
+    """Returns a list of (key, templates) for the form templates in the
+    declension/conjugation ``decl``.  ``templates`` is a list of template
+    strings (empty if the form does not exist)."""
+    items = []
+    for k, v in decl.items():
+        if k in NON_TEMPLATE_KEYS:
+            continue
+        if v is None:
+            v = []
+        elif isinstance(v, str):
+            v = [v]
+        assert isinstance(v, (list, tuple))
+        items.append((k, list(v)))
+    return items
+
+
+def generate_template(lines, template, programs, ill):
+    """Appends to ``lines`` the code that evaluates a single template and
+    adds its result to the list ``r``.  ``programs`` collects compiled
+    programs needed by the code for templates that cannot be translated
+    into straight-line code.  ``ill`` is the expression for the illative
+    vowel."""
+    program = compile_template(template)
+    if not all(op in STRAIGHT_OPS for op, val in program):
+        programs.append(program)
+        lines.append("_add(r, _run(P[{}], args, {}))"
+                     "".format(len(programs) - 1, ill))
+        return
+    body = []
+    cur = []
+    weak = False
+    can_fail = False
+    for op, val in program:
+        if op == OP_LITERAL:
+            cur.append(repr(val))
+            continue
+        if op in (OP_ARG, OP_ARG_WEAK):
+            if op == OP_ARG_WEAK:
+                cur.append("w{}".format(val[0]))
+                weak = True
+            else:
+                cur.append("a{}".format(val[0]))
+            continue
+        # The remaining operations depend on the word built so far
+        body.append("v = {}".format(" + ".join(cur) or '""'))
+        if op == OP_ILLATIVE:
+            cur = ["v", "_ill(v, {})".format(ill)]
+            can_fail = True
+        elif op == OP_A:
+            cur = ["v", "_harm_a(v, pa)"]
+        elif op == OP_O:
+            cur = ["v", "_harm_o(v)"]
+        elif op == OP_U:
+            cur = ["v", "_harm_u(v)"]
+        else:
+            assert op == OP_D
+            cur = ["v", "_d(v)"]
+            can_fail = True
+    v = " + ".join(cur) or '""'
+    if weak:
+        v = "_apos({})".format(v)
+    body.append("_add(r, {})".format(v))
+    if can_fail:
+        lines.append("try:")
+        lines.extend("    " + x for x in body)
+        lines.append("except TemplateFailed:")
+        lines.append("    pass")
+    else:
+        lines.extend(body)
+
+
+def generate_function(fname, name, decl, programs):
+    """Returns the source code for a function named ``fname`` that
+    computes all template forms of the declension/conjugation ``decl``.
+    The function returns a dictionary mapping template keys (e.g., "ine-sg"
+    or "gen-pl-poss") to lists of word forms."""
+    items = template_items(decl)
+    used = set()
+    weak = set()
+    uses_a = False
+    for k, templates in items:
+        for template in templates:
+            for op, val in compile_template(template):
+                if op in (OP_ARG, OP_ARG_WEAK):
+                    used.add(val[0])
+                    if op == OP_ARG_WEAK:
+                        weak.add(val[0])
+                elif op == OP_A:
+                    uses_a = True
+
+    lines = ["def {}(args):".format(fname),
+             "    # {}".format(name)]
+    for k in sorted(used):
+        lines.append("    a{} = _arg(args, {}, {!r})".format(k, k, str(k)))
+    for k in sorted(weak):
+        lines.append("    w{} = a{} or EMPTY_CHAR".format(k, k))
+    if uses_a:
+        lines.append("    pa = args.get(\"par_sg_a\", None)")
+    lines.append("    ill1 = args.get(\"ill_sg_vowel\", None)")
+    lines.append("    ill2 = args.get(\"ill_sg_vowel2\", None)")
+    lines.append("    forms = {}")
+    for k, templates in items:
+        lines.append("    # {}: {}".format(k or "nom-sg", templates))
+        lines.append("    r = []")
+        if k.startswith("ill-sg"):
+            # Certain words have two vowel choices in ill-sg
+            code = []
+            for template in templates:
+                generate_template(code, template, programs, "ill1")
+                tmp = []
+                generate_template(tmp, template, programs, "ill2")
+                code.append("if ill2 is not None:")
+                code.extend("    " + x for x in tmp)
+        else:
+            code = []
+            for template in templates:
+                generate_template(code, template, programs, "None")
+        lines.extend("    " + x for x in code)
+        lines.append("    forms[{!r}] = r".format(k))
+    lines.append("    return forms")
+    return "\n".join(lines) + "\n"
+
+
+def generate_source():
+    """Generates Python source code for all declensions and conjugations.
+    The source defines ``FUNCTIONS``, a dictionary mapping names to the
+    generated functions."""
+    programs = []
+    parts = ["# Generated by wiktfinnish.codegen (version {}).  "
+             "Do not edit.\n".format(GENERATOR_VERSION)]
+    names = []
+    for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+        for name, decl in decls.items():
+            fname = "f{}".format(len(names))
+            names.append((name, fname))
+            parts.append(generate_function(fname, name, decl, programs))
+    parts.append("FUNCTIONS = {\n" +
+                 "".join("    {!r}: {},\n".format(name, fname)
+                         for name, fname in names) +
+                 "}\n")
+    # Compiled programs for templates that are run by the interpreter
+    parts.insert(1, "P = {!r}\n".format(tuple(programs)))
+    return "\n\n".join(parts)
+
+
+def specs_hash():
+    """Returns a hash identifying the current declension/conjugation
+    specifications and generator version.  This is used as the key for the
+    on-disk cache."""
+    h = hashlib.sha1()
+    h.update(str(GENERATOR_VERSION).encode("utf-8"))
+    h.update(repr(nounspecs.noun_decls).encode("utf-8"))
+    h.update(repr(verbspecs.verb_conjs).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def write_file(path, data):
+    """Atomically writes ``data`` (bytes) to ``path``."""
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_functions(cache_dir=None):
+    """Generates, compiles and returns the dictionary mapping
+    declension/conjugation names to generated functions.  If ``cache_dir``
+    is given (or the WIKTFINNISH_CACHE environment variable is set), the
+    generated source and compiled code are stored there and reused by later
+    calls.  Set ``cache_dir`` to False to disable the disk cache."""
+    if cache_dir is None:
+        cache_dir = os.environ.get(CACHE_ENV, None)
+    code = None
+    if cache_dir:
+        base = os.path.join(cache_dir, "decls-" + specs_hash())
+        src_path = base + ".py"
+        code_path = "{}-{}.bin".format(base,
+                                       importlib.util.MAGIC_NUMBER.hex())
+        if os.path.exists(code_path):
+            try:
+                with open(code_path, "rb") as f:
+                    code = marshal.load(f)
+            except (OSError, EOFError, ValueError, TypeError):
+                code = None
+    if code is None:
+        source = generate_source()
+        code = compile(source, src_path if cache_dir else "<wiktfinnish>",
+                       "exec")
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                write_file(src_path, source.encode("utf-8"))
+                write_file(code_path, marshal.dumps(code))
+            except OSError:
+                pass  # Cache directory not writable; just don't cache
+    namespace = dict(HELPERS)
+    exec(code, namespace)
+    return namespace["FUNCTIONS"]
+
+
+# Generated functions, indexed by declension/conjugation name.  These are
+# loaded on first use by paradigm_function(), which is also used by
+# inflect.generated_function().
+generated_functions = None
+
+
+def paradigm_function(name):
+    """Returns the generated function for the declension/conjugation
+    ``name``, or None if there is no such declension/conjugation."""
+    global generated_functions
+    if generated_functions is None:
+        generated_functions = load_functions()
+    name = nounspecs.decl_name_map.get(name, name)
+    return generated_functions.get(name, None)
+
+
+def template_forms(name, args):
+    """Computes all template forms of the declension/conjugation ``name``
+    for the arguments ``args`` using generated code.  This applies the same
+    argument defaulting as inflect_using().  Returns a dictionary mapping
+    template keys to lists of word forms, or None if ``name`` is not a known
+    declension/conjugation.  Exception arguments in ``args`` (e.g.,
+    "gen_pl") are not considered here."""
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = nounspecs.noun_decls.get(name) or verbspecs.verb_conjs.get(name)
+    if decl is None:
+        return None
+    func = paradigm_function(name)
+    return func(default_args(decl, args))
+
+
+def interpreted_forms(name, args):
+    """Computes the same result as template_forms(), but using the template
+    interpreter.  This is the reference implementation for checking the
+    generated code."""
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = nounspecs.noun_decls.get(name) or verbspecs.verb_conjs.get(name)
+    if decl is None:
+        return None
+    args = default_args(decl, args)
+    ill1 = args.get("ill_sg_vowel", None)
+    ill2 = args.get("ill_sg_vowel2", None)
+    forms = {}
+    for k, templates in template_items(decl):
+        if not k.startswith("ill-sg"):
+            ills = [None]
+        elif ill2 is not None:
+            ills = [ill1, ill2]
+        else:
+            ills = [ill1]
+        r = []
+        for template in templates:
+            program = compile_template(template)
+            for ill in ills:
+                _add(r, run_template(program, args, ill_sg_vowel=ill))
+        forms[k] = r
+    return forms
+
+
+def verify(name, args):
+    """Checks the generated code for ``name`` against the template
+    interpreter.  Returns a list of (key, generated, interpreted) for the
+    template keys where the results differ."""
+    gen = template_forms(name, args)
+    ref = interpreted_forms(name, args)
+    if gen is None or ref is None:
+        return []
+    diffs = []
+    for k in ref:
+        if gen.get(k) != ref[k]:
+            diffs.append((k, gen.get(k), ref[k]))
+    return diffs
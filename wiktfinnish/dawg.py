@@ -0,0 +1,305 @@
+# Minimal acyclic deterministic automata (DAWGs) for sets of words.  Words
+# are added in sorted order, and the automaton is minimized incrementally
+# as they are added, so that the whole set of words need not be kept in
+# memory.  The finished automaton is stored in a few flat arrays, and its
+# size depends on the number of distinct prefixes and suffixes rather than
+# on the total length of the words.  This is useful for membership tests
+# (e.g., spell checking) over all inflected forms of a lexicon.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import array
+import heapq
+import bisect
+import struct
+import tempfile
+from wiktfinnish.paradigm import iter_paradigm
+
+# Identifies serialized DAWGs
+DAWG_MAGIC = b"WFDG"
+
+# Version of the serialization format.  Increment this whenever the format
+# changes.
+DAWG_VERSION = 1
+
+# Header: magic, version, number of states, edges and words
+DAWG_HEADER = struct.Struct("=4s4I")
+
+
+class DawgBuilder(object):
+    """Builds a Dawg from words added in sorted order.  Each state of the
+    automaton is a list [final, edges], where edges maps characters to
+    states.  As words are added in sorted order, the edges of each state
+    are in sorted order of their characters.  States are minimized
+    (replaced by an equivalent registered state) as soon as no more words
+    can be added below them."""
+    __slots__ = ("root", "register", "unchecked", "previous", "count")
+
+    def __init__(self):
+        self.root = [False, {}]
+        # Minimized states, indexed by (final, characters, ids of states)
+        self.register = {}
+        # Path of (state, ch, child) for the previous word that has not
+        # been minimized yet
+        self.unchecked = []
+        self.previous = ""
+        self.count = 0
+
+    def minimize(self, depth):
+        """Minimizes the states of the previous word below ``depth``."""
+        register = self.register
+        unchecked = self.unchecked
+        while len(unchecked) > depth:
+            state, ch, child = unchecked.pop()
+            edges = child[1]
+            key = (child[0], tuple(edges), tuple(map(id, edges.values())))
+            other = register.get(key)
+            if other is None:
+                register[key] = child
+            else:
+                state[1][ch] = other
+
+    def add(self, word):
+        """Adds ``word``, which must not sort before the previously added
+        word.  Raises ValueError if it does.  Adding the same word again
+        has no effect."""
+        previous = self.previous
+        if word <= previous:
+            if word == previous and self.count:
+                return
+            if word < previous:
+                raise ValueError("words not in sorted order: {!r} after {!r}"
+                                 "".format(word, previous))
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        self.minimize(common)
+        unchecked = self.unchecked
+        state = unchecked[-1][2] if unchecked else self.root
+        for ch in word[common:]:
+            child = [False, {}]
+            state[1][ch] = child
+            unchecked.append((state, ch, child))
+            state = child
+        state[0] = True
+        self.previous = word
+        self.count += 1
+
+    def finish(self):
+        """Minimizes the remaining states and returns the Dawg."""
+        self.minimize(0)
+        # Number the states in depth-first order, starting from the root
+        numbers = {id(self.root): 0}
+        order = [self.root]
+        stack = [self.root]
+        while stack:
+            state = stack.pop()
+            for child in reversed(list(state[1].values())):
+                if id(child) not in numbers:
+                    numbers[id(child)] = len(order)
+                    order.append(child)
+                    stack.append(child)
+        offsets = array.array("I", [0])
+        labels = array.array("I")
+        targets = array.array("I")
+        finals = bytearray(len(order))
+        for i, state in enumerate(order):
+            if state[0]:
+                finals[i] = 1
+            for ch, child in state[1].items():
+                labels.append(ord(ch))
+                targets.append(numbers[id(child)])
+            offsets.append(len(labels))
+        return Dawg(offsets, labels, targets, bytes(finals), self.count)
+
+
+def build_dawg(words):
+    """Returns a Dawg containing ``words``, an iterable of strings in
+    sorted order (duplicates are allowed).  Raises ValueError if the words
+    are not sorted."""
+    builder = DawgBuilder()
+    for word in words:
+        builder.add(word)
+    return builder.finish()
+
+
+def sorted_chunk(chunk):
+    """Returns the words of the set ``chunk`` in sorted order.  Raises
+    ValueError if a word contains a newline, as the chunks of
+    sorted_words() are written into files one word per line."""
+    for word in chunk:
+        if "\n" in word:
+            raise ValueError("newline in word {!r}".format(word))
+    return sorted(chunk)
+
+
+def sorted_words(words, chunk_size=1000000):
+    """Generates the distinct words of the iterable ``words`` in sorted
+    order.  The words are collected in chunks of at most ``chunk_size``
+    distinct words; each full chunk is sorted and written into a temporary
+    file (one word per line), and the sorted chunks are merged, so that at
+    most one chunk is kept in memory.  Raises ValueError if a word contains
+    a newline, regardless of whether it is written into a file."""
+    assert isinstance(chunk_size, int) and chunk_size > 0
+    files = []
+    try:
+        chunk = set()
+        for word in words:
+            chunk.add(word)
+            if len(chunk) >= chunk_size:
+                # Only "\n" ends lines, so that words may contain "\r"
+                f = tempfile.TemporaryFile("w+", encoding="utf-8",
+                                           newline="\n")
+                files.append(f)
+                for word in sorted_chunk(chunk):
+                    f.write(word)
+                    f.write("\n")
+                f.seek(0)
+                chunk = set()
+        runs = [(line[:-1] for line in f) for f in files]
+        runs.append(sorted_chunk(chunk))
+        chunk = None
+        previous = None
+        for word in heapq.merge(*runs):
+            if word != previous:
+                yield word
+                previous = word
+    finally:
+        for f in files:
+            f.close()
+
+
+def sorted_forms(entries, chunk_size=1000000, **kwargs):
+    """Inflects ``entries``, a sequence of (lemma, args, pos), into all forms
+    (restricted by keyword arguments as for all_forms_list()) and generates
+    the distinct inflected forms in sorted order, keeping at most
+    ``chunk_size`` of them in memory (see sorted_words())."""
+    return sorted_words((v for lemma, args, pos in entries
+                         for form, v in iter_paradigm(args, pos, **kwargs)),
+                        chunk_size=chunk_size)
+
+
+def forms_dawg(entries, chunk_size=1000000, **kwargs):
+    """Inflects ``entries``, a sequence of (lemma, args, pos), into all forms
+    (restricted by keyword arguments as for all_forms_list()) and returns a
+    Dawg of the distinct inflected forms.  The forms are fed to the
+    DawgBuilder in sorted order by sorted_forms(), which keeps at most
+    ``chunk_size`` forms in memory.  If the forms are already available in
+    sorted order, build_dawg() can be used on them directly."""
+    return build_dawg(sorted_forms(entries, chunk_size=chunk_size, **kwargs))
+
+
+class Dawg(object):
+    """A minimal acyclic automaton accepting a set of words.  State 0 is
+    the start state.  The edges of state i are at indexes offsets[i] to
+    offsets[i + 1] - 1 of ``labels`` (character codes, in increasing
+    order) and ``targets`` (states), and finals[i] is 1 if state i is
+    final."""
+    __slots__ = ("offsets", "labels", "targets", "finals", "count")
+
+    def __init__(self, offsets, labels, targets, finals, count):
+        self.offsets = offsets
+        self.labels = labels
+        self.targets = targets
+        self.finals = finals
+        self.count = count
+
+    def state(self, prefix):
+        """Returns the state reached by ``prefix``, or -1 if no word
+        starts with it."""
+        offsets = self.offsets
+        labels = self.labels
+        state = 0
+        for ch in prefix:
+            lo = offsets[state]
+            hi = offsets[state + 1]
+            code = ord(ch)
+            i = bisect.bisect_left(labels, code, lo, hi)
+            if i == hi or labels[i] != code:
+                return -1
+            state = self.targets[i]
+        return state
+
+    def __contains__(self, word):
+        state = self.state(word)
+        return state >= 0 and self.finals[state] == 1
+
+    def __len__(self):
+        return self.count
+
+    def iter_prefix(self, prefix):
+        """Generates the words starting with ``prefix`` in sorted order."""
+        state = self.state(prefix)
+        if state < 0:
+            return
+        offsets = self.offsets
+        labels = self.labels
+        targets = self.targets
+        finals = self.finals
+        stack = [(state, prefix)]
+        while stack:
+            state, word = stack.pop()
+            if finals[state]:
+                yield word
+            for i in range(offsets[state + 1] - 1, offsets[state] - 1, -1):
+                stack.append((targets[i], word + chr(labels[i])))
+
+    def __iter__(self):
+        return self.iter_prefix("")
+
+    def num_states(self):
+        """Returns the number of states of the automaton."""
+        return len(self.finals)
+
+    def num_edges(self):
+        """Returns the number of edges of the automaton."""
+        return len(self.labels)
+
+    def to_bytes(self):
+        """Returns the automaton serialized as bytes (see from_bytes())."""
+        return b"".join((DAWG_HEADER.pack(DAWG_MAGIC, DAWG_VERSION,
+                                          len(self.finals), len(self.labels),
+                                          self.count),
+                         self.offsets.tobytes(), self.labels.tobytes(),
+                         self.targets.tobytes(), self.finals))
+
+    @staticmethod
+    def from_bytes(data):
+        """Returns the Dawg serialized by to_bytes().  Raises ValueError if
+        ``data`` is not a serialized Dawg of the current version (written
+        on a machine with the same byte order)."""
+        try:
+            (magic, version, num_states, num_edges,
+             count) = DAWG_HEADER.unpack_from(data)
+        except struct.error:
+            magic = version = None
+        if magic != DAWG_MAGIC or version != DAWG_VERSION:
+            raise ValueError("not a serialized DAWG of version {}"
+                             "".format(DAWG_VERSION))
+        arrays = []
+        pos = DAWG_HEADER.size
+        for n in (num_states + 1, num_edges, num_edges):
+            x = array.array("I")
+            end = pos + n * x.itemsize
+            x.frombytes(data[pos:end])
+            if len(x) != n:
+                raise ValueError("truncated DAWG")
+            arrays.append(x)
+            pos = end
+        finals = bytes(data[pos:pos + num_states])
+        if len(finals) != num_states:
+            raise ValueError("truncated DAWG")
+        return Dawg(arrays[0], arrays[1], arrays[2], finals, count)
+
+    def save(self, path):
+        """Writes the serialized automaton into the file ``path``."""
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        """Reads an automaton written by save() from the file ``path``."""
+        with open(path, "rb") as f:
+            return Dawg.from_bytes(f.read())
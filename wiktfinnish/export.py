@@ -0,0 +1,371 @@
+# Exporting inflected forms of a lexicon into other formats: SQLite
+# databases and finite-state transducers (lexc and AT&T formats).
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sqlite3
+import itertools
+from wiktfinnish.formnames import decode_form
+from wiktfinnish.paradigm import iter_paradigm, inflect_paradigm
+from wiktfinnish.stem import encode_paradigm, SEPARATOR
+
+# Tables of SQLite exports.  Paradigms are identified by the encoding
+# returned by stem.encode_paradigm(); lemmas whose paradigm cannot be encoded
+# have NULL paradigm and stem.  Forms are identified by form IDs (see
+# formnames.encode_form()).
+SQLITE_SCHEMA = (
+    "CREATE TABLE paradigms (id INTEGER PRIMARY KEY, code TEXT NOT NULL)",
+    "CREATE TABLE lemmas (id INTEGER PRIMARY KEY, lemma TEXT NOT NULL, "
+    "pos TEXT NOT NULL, stem TEXT, paradigm_id INTEGER "
+    "REFERENCES paradigms(id))",
+    "CREATE TABLE forms (id INTEGER PRIMARY KEY, verb_form TEXT NOT NULL, "
+    "comparison TEXT NOT NULL, case_form TEXT NOT NULL, "
+    "possessive TEXT NOT NULL, clitic TEXT NOT NULL)",
+    "CREATE TABLE words (surface TEXT NOT NULL, lemma_id INTEGER NOT NULL "
+    "REFERENCES lemmas(id), form_id INTEGER NOT NULL REFERENCES forms(id))",
+)
+
+# Indexes of SQLite exports.  These are created after the data has been
+# inserted, which is much faster than updating them on each insert.
+SQLITE_INDEXES = (
+    "CREATE UNIQUE INDEX paradigms_code ON paradigms (code)",
+    "CREATE INDEX lemmas_lemma ON lemmas (lemma)",
+    "CREATE INDEX words_surface ON words (surface)",
+    "CREATE INDEX words_lemma ON words (lemma_id)",
+)
+
+
+def export_sqlite(entries, path, batch_size=10000, **kwargs):
+    """Inflects ``entries``, a sequence of (lemma, args, pos), into all forms
+    (restricted by keyword arguments as for all_forms_list()) and writes
+    them into a new SQLite database ``path`` (see SQLITE_SCHEMA).  Lemmas
+    and words are inserted together in batches of about ``batch_size`` rows
+    (flushed after the forms of an entry) using executemany() in a single
+    transaction, and the indexes are created after all rows have been
+    inserted.  Returns a dictionary of statistics: lemmas, paradigms, forms
+    and words."""
+    assert isinstance(batch_size, int) and batch_size > 0
+    conn = sqlite3.connect(path)
+    try:
+        # The database is written from scratch; if this fails, it can just
+        # be written again.  Don't wait for the data to reach the disk.
+        conn.execute("PRAGMA journal_mode = MEMORY")
+        conn.execute("PRAGMA synchronous = OFF")
+        for sql in SQLITE_SCHEMA:
+            conn.execute(sql)
+        paradigms = {}
+        form_ids = set()
+        num_lemmas = 0
+        num_words = 0
+        lemma_batch = []
+        batch = []
+        insert_lemmas = ("INSERT INTO lemmas (id, lemma, pos, stem, "
+                         "paradigm_id) VALUES (?, ?, ?, ?, ?)")
+        insert = ("INSERT INTO words (surface, lemma_id, form_id) "
+                  "VALUES (?, ?, ?)")
+        with conn:
+            for lemma, args, pos in entries:
+                num_lemmas += 1
+                stem, code = encode_paradigm(args)
+                paradigm_id = None
+                if code is not None:
+                    paradigm_id = paradigms.get(code)
+                    if paradigm_id is None:
+                        paradigm_id = len(paradigms) + 1
+                        paradigms[code] = paradigm_id
+                lemma_batch.append((num_lemmas, lemma, pos, stem,
+                                    paradigm_id))
+                for form_id, v in iter_paradigm(args, pos, ids=True,
+                                                **kwargs):
+                    form_ids.add(form_id)
+                    batch.append((v, num_lemmas, form_id))
+                if len(batch) >= batch_size or len(lemma_batch) >= batch_size:
+                    conn.executemany(insert_lemmas, lemma_batch)
+                    conn.executemany(insert, batch)
+                    num_words += len(batch)
+                    lemma_batch = []
+                    batch = []
+            conn.executemany(insert_lemmas, lemma_batch)
+            conn.executemany(insert, batch)
+            num_words += len(batch)
+            conn.executemany("INSERT INTO paradigms (id, code) VALUES (?, ?)",
+                             ((v, k) for k, v in paradigms.items()))
+            conn.executemany("INSERT INTO forms (id, verb_form, comparison, "
+                             "case_form, possessive, clitic) "
+                             "VALUES (?, ?, ?, ?, ?, ?)",
+                             ((x,) + decode_form(x)
+                              for x in sorted(form_ids)))
+            for sql in SQLITE_INDEXES:
+                conn.execute(sql)
+    finally:
+        conn.close()
+    return {"lemmas": num_lemmas,
+            "paradigms": len(paradigms),
+            "forms": len(form_ids),
+            "words": num_words}
+
+
+######################################################################
+# Finite-state export.  The inflected forms of a lexicon are written as
+# lexc continuation classes or as an AT&T format transducer, mapping
+# lemma+tags (e.g., "valo+ine-pl+1s+kin") to inflected forms.  Each word
+# is split into a stem (the part common to all of its forms) and a
+# continuation class containing the endings for all forms without
+# possessive suffixes and clitics.  Words of the same paradigm (as encoded
+# by stem.encode_paradigm()) share the continuation class.  Possessive
+# suffixes and clitics are in their own continuation classes, shared by
+# all forms that take the same suffixes with the same vowel harmony.  The
+# classes are computed by running the declension/conjugation
+# specifications, so the transducer generates exactly what inflect()
+# generates for the lexicon.
+######################################################################
+
+# Characters that must be escaped with % in lexc
+LEXC_SPECIAL = set('!%:;<>0"#{}[] \t')
+
+# Symbols that are written specially in AT&T format
+ATT_SYMBOLS = {"": "@0@", " ": "@_SPACE_@", "\t": "@_TAB_@"}
+
+
+def form_tags(form):
+    """Returns a tuple of the tags for ``form`` (vform, comp, case, poss,
+    clitic), e.g., ("+ine-pl", "+1s").  The nominative singular without
+    possessive suffix and clitic has no tags."""
+    return tuple("+" + x for x in form if x)
+
+
+def common_prefix(words):
+    """Returns the longest common prefix of ``words``."""
+    if not words:
+        return ""
+    lo = min(words)
+    hi = max(words)
+    for i, ch in enumerate(lo):
+        if ch != hi[i]:
+            return lo[:i]
+    return lo
+
+
+def suffix_continuations(paradigm, idx):
+    """Splits the forms in ``paradigm`` (a dictionary as returned by
+    inflect_paradigm()) that have a clitic (``idx`` 4) or a possessive
+    suffix and no clitic (``idx`` 3) from the forms without it.  Returns
+    (conts, rest), where conts maps (form without the clitic or possessive
+    suffix, index of alternative) to a list of (clitic or possessive
+    suffix, suffix, index of alternative of the form with it), the suffix
+    being added to the former alternative to get the latter, and rest is a
+    list of (form, index of alternative) for alternatives that are not
+    formed by adding a suffix to an alternative of the form without the
+    clitic or possessive suffix.  Several alternatives may be formed from
+    the same alternative (e.g., talossansa and talossaan from talossa)."""
+    conts = {}
+    rest = []
+    for form, words in paradigm.items():
+        x = form[idx]
+        if not x or (idx < 4 and form[4]):
+            continue
+        base = form[:idx] + ("",) * (5 - idx)
+        bases = paradigm.get(base, ())
+        for j, v in enumerate(words):
+            best = None
+            for i, b in enumerate(bases):
+                if (v.startswith(b) and
+                    (best is None or len(b) > len(bases[best]))):
+                    best = i
+            if best is None:
+                rest.append((form, j))
+                continue
+            k = (base, best)
+            if k not in conts:
+                conts[k] = []
+            conts[k].append((x, v[len(bases[best]):], j))
+    return conts, rest
+
+
+def shared_class(lexicons, classes, prefix, items):
+    """Returns the name of the continuation class containing ``items`` (a
+    tuple), adding it to ``lexicons`` if it is not yet in ``classes`` (a
+    dictionary mapping items to the names of the classes named ``prefix``
+    followed by a number)."""
+    name = classes.get(items)
+    if name is None:
+        name = "{}{}".format(prefix, len(classes) + 1)
+        classes[items] = name
+        lexicons[name] = list(items)
+    return name
+
+
+def clitic_class(lexicons, classes, clitics):
+    """Returns the name of the continuation class for ``clitics`` (a list
+    of (clitic, suffix, index) as returned by suffix_continuations(), or
+    None), or "#" if there are no clitics."""
+    if clitics is None:
+        return "#"
+    items = ((((), "", "#"),) +
+             tuple((("+" + x,), suffix, "#") for x, suffix, j in clitics))
+    return shared_class(lexicons, classes, "Clitic", items)
+
+
+def fst_lexicons(entries, **kwargs):
+    """Computes the continuation classes for inflecting ``entries``, a
+    sequence of (lemma, args, pos), into all forms (restricted by keyword
+    arguments as for all_forms_list()).  Returns a dictionary mapping the
+    name of each continuation class to a list of (upper, lower,
+    continuation), where upper is a tuple of symbols (characters and
+    tags), lower is a string and continuation is the name of a
+    continuation class or "#" for the end of the word.  The words are in
+    the class "Root".  The classes of the words are keyed by their
+    paradigm code (see stem.encode_paradigm()) and the parts of the stem
+    encoding that affect the endings; a word whose endings nevertheless
+    differ (e.g., due to exceptions) gets a class of its own."""
+    root = []
+    lexicons = {"Root": root}
+    classes = {}  # (code, stem parts, pos) -> {endings: class name}
+    clitic_classes = {}  # clitic class items -> class name
+    poss_classes = {}  # possessive class items -> class name
+    for lemma, args, pos in entries:
+        paradigm = inflect_paradigm(args, pos, **kwargs)
+        stem = common_prefix([v for words in paradigm.values()
+                              for v in words])
+        clitic_conts, clitic_rest = suffix_continuations(paradigm, 4)
+        poss_conts, poss_rest = suffix_continuations(paradigm, 3)
+        # Possessive suffixes that replace the end of the form without
+        # them (e.g., talon -> taloni) continue from the common prefix
+        splits = {}  # (form without possessive suffix, prefix) -> items
+        for form, j in poss_rest:
+            v = paradigm[form][j]
+            base = form[:3] + ("", "")
+            prefix = stem
+            for b in paradigm.get(base, ()):
+                b = common_prefix([v, b])
+                if len(b) > len(prefix):
+                    prefix = b
+            k = (base, prefix)
+            if k not in splits:
+                splits[k] = []
+            splits[k].append((("+" + form[3],), v[len(prefix):],
+                              clitic_class(lexicons, clitic_classes,
+                                           clitic_conts.get((form, j)))))
+        endings = []
+        for form, words in paradigm.items():
+            if form[3] or form[4]:
+                continue
+            for i, v in enumerate(words):
+                cont = clitic_class(lexicons, clitic_classes,
+                                    clitic_conts.get((form, i)))
+                posses = poss_conts.get((form, i))
+                if posses is not None:
+                    items = [((), "", cont)]
+                    for poss, suffix, j in posses:
+                        x = form[:3] + (poss, "")
+                        items.append((("+" + poss,), suffix,
+                                      clitic_class(lexicons, clitic_classes,
+                                                   clitic_conts.get((x, j)))))
+                    cont = shared_class(lexicons, poss_classes, "Poss",
+                                        tuple(items))
+                endings.append((form_tags(form), v[len(stem):], cont))
+        for (form, prefix), items in splits.items():
+            cont = shared_class(lexicons, poss_classes, "Poss", tuple(items))
+            endings.append((form_tags(form), prefix[len(stem):], cont))
+        for form, j in clitic_rest:
+            endings.append((form_tags(form), paradigm[form][j][len(stem):],
+                            "#"))
+        if not endings:
+            continue
+        stem_code, code = encode_paradigm(args)
+        if code is None:
+            code = args["template_name"]
+            k = (code, None, pos)
+        else:
+            k = (code, tuple(stem_code.split(SEPARATOR)[1:]), pos)
+        variants = classes.get(k)
+        if variants is None:
+            variants = {}
+            classes[k] = variants
+        x = tuple(endings)
+        name = variants.get(x)
+        if name is None:
+            name = code
+            n = 1
+            while name in lexicons:
+                n += 1
+                name = "{}_{}".format(code, n)
+            variants[x] = name
+            lexicons[name] = endings
+        root.append((tuple(lemma), stem, name))
+    return lexicons
+
+
+def lexc_escape(v):
+    """Escapes the special characters of lexc in ``v``."""
+    return "".join("%" + ch if ch in LEXC_SPECIAL else ch for ch in v)
+
+
+def lexc_symbols(symbols):
+    """Returns the lexc notation for a tuple of symbols (characters and
+    multicharacter tags)."""
+    return "".join(x if len(x) > 1 else lexc_escape(x) for x in symbols)
+
+
+def export_lexc(entries, f, **kwargs):
+    """Writes the inflected forms of ``entries`` (see fst_lexicons()) as
+    lexc continuation classes into the text file ``f``.  Returns a
+    dictionary of statistics: lexicons and entries."""
+    lexicons = fst_lexicons(entries, **kwargs)
+    tags = set(x for items in lexicons.values()
+               for upper, lower, cont in items
+               for x in upper if len(x) > 1)
+    f.write("Multichar_Symbols\n")
+    for tag in sorted(tags):
+        f.write(" {}\n".format(tag))
+    num = 0
+    for name, items in lexicons.items():
+        f.write("\nLEXICON {}\n".format(lexc_escape(name)))
+        for upper, lower, cont in items:
+            upper = lexc_symbols(upper)
+            lower = lexc_escape(lower)
+            cont = cont if cont == "#" else lexc_escape(cont)
+            if upper == lower:
+                f.write("{} {} ;\n".format(upper, cont))
+            else:
+                f.write("{}:{} {} ;\n".format(upper or "0", lower or "0",
+                                              cont))
+            num += 1
+    return {"lexicons": len(lexicons), "entries": num}
+
+
+def att_symbol(x):
+    """Returns the AT&T notation for the symbol ``x``."""
+    return ATT_SYMBOLS.get(x, x)
+
+
+def export_att(entries, f, **kwargs):
+    """Writes the inflected forms of ``entries`` (see fst_lexicons()) as an
+    AT&T format transducer into the text file ``f``.  The input side of the
+    transducer is the lemma and tags and the output side the inflected
+    form; state 0 is the start state.  Returns a dictionary of statistics:
+    states and arcs."""
+    lexicons = fst_lexicons(entries, **kwargs)
+    states = {name: i for i, name in enumerate(lexicons)}
+    final = len(states)
+    num_states = final + 1
+    num_arcs = 0
+    for name, items in lexicons.items():
+        for upper, lower, cont in items:
+            dst = final if cont == "#" else states[cont]
+            pairs = list(itertools.zip_longest(upper, lower, fillvalue=""))
+            if not pairs:
+                pairs = [("", "")]
+            src = states[name]
+            for i, (a, b) in enumerate(pairs):
+                if i == len(pairs) - 1:
+                    nxt = dst
+                else:
+                    nxt = num_states
+                    num_states += 1
+                f.write("{}\t{}\t{}\t{}\n".format(src, nxt, att_symbol(a),
+                                                  att_symbol(b)))
+                num_arcs += 1
+                src = nxt
+    f.write("{}\n".format(final))
+    return {"states": num_states, "arcs": num_arcs}
@@ -4,6 +4,12 @@
 #
 # Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
 
+import os
+import types
+import marshal
+import hashlib
+import itertools
+
 # Names of comparative forms for adjectives (the empty string means positive,
 # or normal form).
 COMPARATIVE_FORMS = (
@@ -143,11 +149,79 @@ CLITIC_FORMS = ("",
                 #"kinkOhAn",
 )
 
+# Form tuples (vform, comp, case, poss, clitic) can also be represented as
+# integers (form IDs), which are faster to hash and more compact to store.
+# Each component is stored as its index in the corresponding tuple above,
+# in a bit field of FORM_ID_BITS bits.  The verb form is in the most
+# significant bits and the clitic in the least significant bits.
+FORM_ID_FIELDS = (VERB_FORMS, COMPARATIVE_FORMS, CASE_FORMS,
+                  POSSESSIVE_FORMS, CLITIC_FORMS)
+FORM_ID_BITS = tuple(max(1, (len(x) - 1).bit_length())
+                     for x in FORM_ID_FIELDS)
+
+# Mappings from names to their indexes for each component of form IDs.
+# These are also used for checking names, as they are faster to search
+# than the tuples.
+form_id_indexes = tuple({name: i for i, name in enumerate(x)}
+                        for x in FORM_ID_FIELDS)
+(VERB_FORM_INDEXES, COMPARATIVE_FORM_INDEXES, CASE_FORM_INDEXES,
+ POSSESSIVE_FORM_INDEXES, CLITIC_FORM_INDEXES) = form_id_indexes
+
+# Cache of decoded form IDs
+decoded_forms = {}
+
+
+def encode_form(form):
+    """Returns the form ID (an integer) for the form (vform, comp, case,
+    poss, clitic).  Raises ValueError if the form is not valid."""
+    if len(form) != 5:
+        raise ValueError("invalid form {!r}".format(form))
+    form_id = 0
+    for name, indexes, bits in zip(form, form_id_indexes, FORM_ID_BITS):
+        i = indexes.get(name)
+        if i is None:
+            raise ValueError("invalid form {!r}".format(form))
+        form_id = (form_id << bits) | i
+    return form_id
+
+
+def decode_form(form_id):
+    """Returns the form tuple (vform, comp, case, poss, clitic) for the
+    form ID ``form_id`` (see encode_form()).  Raises ValueError if the form
+    ID is not valid."""
+    form = decoded_forms.get(form_id)
+    if form is not None:
+        return form
+    if not isinstance(form_id, int) or form_id < 0:
+        raise ValueError("invalid form ID {!r}".format(form_id))
+    x = form_id
+    parts = []
+    for names, bits in zip(reversed(FORM_ID_FIELDS), reversed(FORM_ID_BITS)):
+        i = x & ((1 << bits) - 1)
+        if i >= len(names):
+            raise ValueError("invalid form ID {!r}".format(form_id))
+        parts.append(names[i])
+        x >>= bits
+    if x:
+        raise ValueError("invalid form ID {!r}".format(form_id))
+    form = tuple(reversed(parts))
+    decoded_forms[form_id] = form
+    return form
+
+
 ######################################################################
 # The rest of file is about enumerating 5-tuples representing
 # inflected forms.
 ######################################################################
 
+# Parts-of-speech inflected like nouns, like personal pronouns, and not
+# inflected at all.  Other known parts-of-speech are "adj", "verb" and "adv".
+NOMINAL_POS = ("noun", "name", "num", "letter", "pron-qnt", "pron-refl",
+               "pron-interr", "postp", "prep", "digit")
+PRONOUN_POS = ("pron", "pron-pers")
+UNINFLECTED_POS = ("conj", "intj", "suffix", "clitic", "punct")
+ALL_POS = NOMINAL_POS + PRONOUN_POS + ("adj", "verb", "adv") + UNINFLECTED_POS
+
 # Cache of all forms for combinations of part-of-speech and other parameters
 # restricting which forms are posible.
 all_forms_cache = {}
@@ -159,11 +233,37 @@ def all_forms_list(*args, **kwargs):
     key = (args, tuple(sorted(kwargs.items())))
     if key in all_forms_cache:
         return all_forms_cache[key]
-    forms = tuple(x for x in all_forms_iter(*args, **kwargs))
+    pos = args[0] if args else kwargs.get("pos")
+    if pos in ALL_POS:
+        # Any combination of restrictions is quickly enumerated from the
+        # bitsets of the part-of-speech
+        forms = bitset_forms(pos, forms_bitset(*args, **kwargs))
+    else:
+        forms = tuple(x for x in all_forms_iter(*args, **kwargs))
     all_forms_cache[key] = forms
     return forms
 
 
+# Cache of form positions for form_positions(), indexed by the arguments of
+# all_forms_list()
+form_positions_cache = {}
+
+
+def form_positions(*args, **kwargs):
+    """Returns a read-only mapping from each form in all_forms_list(*args,
+    **kwargs) to its index in that list.  Together with the list, this
+    allows storing the forms of a word in a flat list indexed by position.
+    This caches the result."""
+    key = (args, tuple(sorted(kwargs.items())))
+    positions = form_positions_cache.get(key)
+    if positions is None:
+        forms = all_forms_list(*args, **kwargs)
+        positions = types.MappingProxyType(
+            {form: i for i, form in enumerate(forms)})
+        form_positions_cache[key] = positions
+    return positions
+
+
 def all_forms_iter(pos, transitive=True,
                    no_comp=False, no_case=False, no_poss=False,
                    no_clitic=False):
@@ -176,8 +276,7 @@ def all_forms_iter(pos, transitive=True,
     poss_forms = [""] if no_poss else POSSESSIVE_FORMS
     clitic_forms = [""] if no_clitic else CLITIC_FORMS
 
-    if pos in ("noun", "name", "num", "letter", "pron-qnt", "pron-refl",
-               "pron-interr", "postp", "prep", "digit"):
+    if pos in NOMINAL_POS:
         for case in case_forms:
             for poss in poss_forms:
                 if case in ("acc-sg", "acc-pl"):
@@ -188,7 +287,7 @@ def all_forms_iter(pos, transitive=True,
                     if clitic == "kA":
                         continue
                     yield ("", "", case, poss, clitic)
-    elif pos in ("pron", "pron-pers"):
+    elif pos in PRONOUN_POS:
         for case in case_forms:
             for clitic in clitic_forms:
                 if clitic in ("s", "kA"):
@@ -276,7 +375,7 @@ def all_forms_iter(pos, transitive=True,
                         #    continue
                         for clitic in clitic_forms:
                             yield (vform, comp, case, poss, clitic)
-    elif pos in ("conj", "intj", "suffix", "clitic", "punct"):
+    elif pos in UNINFLECTED_POS:
         yield ("", "", "", "", "")
     elif pos == "adv":
         for clitic in clitic_forms:
@@ -287,3 +386,317 @@ def all_forms_iter(pos, transitive=True,
     else:
         print("all_forms_iter: unimplemented pos:", pos)
         yield ("", "", "", "", "")
+
+
+# Cache of form IDs for all_form_ids()
+all_form_ids_cache = {}
+
+
+def all_form_ids(*args, **kwargs):
+    """Like all_forms_list(), but returns a tuple of form IDs (see
+    encode_form()).  This caches the result."""
+    key = (args, tuple(sorted(kwargs.items())))
+    if key in all_form_ids_cache:
+        return all_form_ids_cache[key]
+    ids = tuple(encode_form(x) for x in all_forms_list(*args, **kwargs))
+    all_form_ids_cache[key] = ids
+    return ids
+
+
+######################################################################
+# Bitsets of forms.  All forms that any combination of the restrictions
+# of all_forms_iter() allows for a part-of-speech are numbered
+# consecutively, and sets of forms are represented as integers with the
+# bits of their positions set.  Set operations on forms are then bitwise
+# operations on integers.
+######################################################################
+
+# Restrictions of all_forms_iter() and their default values
+FORM_FLAGS = (("transitive", True), ("no_comp", False), ("no_case", False),
+              ("no_poss", False), ("no_clitic", False))
+
+# Form tables for parts-of-speech, indexed by part-of-speech.  Parts-of-speech
+# with the same forms share the same table.
+form_tables = {}
+
+# Version of the persisted form tables.  Increment this whenever FormTable
+# changes in a way that affects the persisted data, so that stale files are
+# not used.
+FORM_TABLES_VERSION = 1
+
+# Environment variable specifying the directory for persisted form tables
+# (the same directory is used for the code cache of wiktfinnish.codegen)
+CACHE_ENV = "WIKTFINNISH_CACHE"
+
+# True once form tables have been loaded from (or saved to) CACHE_ENV
+form_tables_loaded = False
+
+
+class FormTable(object):
+    """All forms allowed for a part-of-speech by any combination of the
+    restrictions of all_forms_iter(), with bitsets for querying them.
+    ``forms`` is a tuple of forms in the order of all_forms_iter() (each
+    combination of restrictions yields its forms in this order),
+    ``positions`` is a read-only mapping from each form to its index in
+    ``forms``, ``flag_bits`` maps (flag, value) to the bitset of forms
+    allowed with the restriction set to the value, and ``field_bits``
+    contains a dictionary for each component of forms (as in
+    FORM_ID_FIELDS), mapping the value of the component to the bitset of
+    forms having that value."""
+    __slots__ = ("forms", "positions", "flag_bits", "field_bits")
+
+    def __init__(self, forms, flag_bits, field_bits=None):
+        self.forms = forms
+        self.positions = types.MappingProxyType(
+            {form: i for i, form in enumerate(forms)})
+        self.flag_bits = flag_bits
+        if field_bits is None:
+            field_bits = tuple(
+                {name: positions_bitset(idxs)
+                 for name, idxs in field_positions(forms, i).items()}
+                for i in range(len(FORM_ID_FIELDS)))
+        self.field_bits = field_bits
+
+    def all_bits(self):
+        """Returns the bitset of all forms in the table."""
+        return (1 << len(self.forms)) - 1
+
+    def data(self):
+        """Returns the contents of the table as a value that can be
+        serialized with marshal and passed to FormTable(*data)."""
+        return (self.forms, self.flag_bits, self.field_bits)
+
+
+def field_positions(forms, i):
+    """Returns a dictionary mapping each value of the component ``i`` of
+    ``forms`` to a list of the indexes of the forms having that value."""
+    ret = {}
+    for idx, form in enumerate(forms):
+        name = form[i]
+        if name not in ret:
+            ret[name] = []
+        ret[name].append(idx)
+    return ret
+
+
+def positions_bitset(positions):
+    """Returns a bitset with the bits of ``positions`` set."""
+    if not positions:
+        return 0
+    n = max(positions) + 1
+    bits = bytearray(b"0" * n)
+    for i in positions:
+        bits[n - 1 - i] = 49  # "1"
+    return int(bytes(bits), 2)
+
+
+def merge_forms(universe, forms):
+    """Merges ``forms`` into the list ``universe`` so that both remain
+    subsequences of the result.  Forms missing from ``universe`` are
+    inserted after the form preceding them in ``forms``."""
+    indexes = {form: i for i, form in enumerate(universe)}
+    ret = []
+    j = 0
+    for form in forms:
+        i = indexes.get(form)
+        if i is None:
+            ret.append(form)
+            continue
+        assert i >= j  # Otherwise no consistent order exists
+        ret.extend(universe[j:i + 1])
+        j = i + 1
+    ret.extend(universe[j:])
+    return ret
+
+
+def build_form_table(pos):
+    """Builds the FormTable for the part-of-speech ``pos`` by enumerating
+    the forms for all combinations of restrictions."""
+    assert pos in ALL_POS
+    combos = {}
+    for values in itertools.product((False, True), repeat=len(FORM_FLAGS)):
+        kwargs = {flag: value for (flag, dflt), value in
+                  zip(FORM_FLAGS, values)}
+        combos[values] = tuple(all_forms_iter(pos, **kwargs))
+    dflt_values = tuple(dflt for flag, dflt in FORM_FLAGS)
+    universe = list(combos[dflt_values])
+    seen = set(universe)
+    for forms in combos.values():
+        if not seen.issuperset(forms):
+            universe = merge_forms(universe, forms)
+            seen.update(forms)
+    universe = tuple(universe)
+    positions = {form: i for i, form in enumerate(universe)}
+    # The forms allowed with a restriction set to a value are the union of
+    # the forms of all combinations having that value.  The restrictions
+    # interact (e.g., no_poss adds some verb forms without possessive
+    # suffix), so these cannot be computed from the restrictions alone.
+    flag_bits = {}
+    for values, forms in combos.items():
+        bits = positions_bitset([positions[x] for x in forms])
+        for (flag, dflt), value in zip(FORM_FLAGS, values):
+            k = (flag, value)
+            flag_bits[k] = flag_bits.get(k, 0) | bits
+    return FormTable(universe, flag_bits)
+
+
+def add_form_table(pos, table):
+    """Stores ``table`` as the FormTable of ``pos``, sharing an existing
+    table with the same forms if there is one.  Returns the stored table."""
+    for other in form_tables.values():
+        if (other.forms == table.forms and
+            other.flag_bits == table.flag_bits):
+            table = other
+            break
+    form_tables[pos] = table
+    return table
+
+
+def form_tables_hash():
+    """Returns a hash identifying the current form names, restrictions and
+    all_forms_iter() code.  This is used for checking that persisted form
+    tables are up to date."""
+    h = hashlib.sha1()
+    h.update(str(FORM_TABLES_VERSION).encode("utf-8"))
+    h.update(repr((FORM_ID_FIELDS, ALL_POS, FORM_FLAGS)).encode("utf-8"))
+    code = all_forms_iter.__code__
+    h.update(code.co_code)
+    h.update(repr((code.co_consts, code.co_names)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def save_form_tables(path):
+    """Builds the form tables for all known parts-of-speech (unless already
+    built) and atomically writes them to the file ``path``.  Worker
+    processes can then load them with load_form_tables() instead of
+    enumerating the forms again."""
+    tables = []
+    index = {}
+    for pos in ALL_POS:
+        table = form_table(pos)
+        for i, other in enumerate(tables):
+            if other is table:
+                break
+        else:
+            i = len(tables)
+            tables.append(table)
+        index[pos] = i
+    data = marshal.dumps((form_tables_hash(), index,
+                          tuple(x.data() for x in tables)))
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_form_tables(path):
+    """Loads form tables saved by save_form_tables() from the file ``path``.
+    Returns True if the tables were loaded, and False if the file does not
+    exist, cannot be read, or was saved from different definitions of the
+    forms."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        h, index, tables = marshal.loads(data)
+    except (OSError, EOFError, ValueError, TypeError):
+        return False
+    if h != form_tables_hash():
+        return False
+    tables = [FormTable(*x) for x in tables]
+    for pos, i in index.items():
+        form_tables[pos] = tables[i]
+    return True
+
+
+def form_tables_path(cache_dir):
+    """Returns the path of the persisted form tables in ``cache_dir``."""
+    return os.path.join(cache_dir, "forms-" + form_tables_hash() + ".bin")
+
+
+def form_table(pos):
+    """Returns the FormTable for the part-of-speech ``pos``, or None if it
+    is not a known part-of-speech.  If the WIKTFINNISH_CACHE environment
+    variable is set, all tables are loaded from that directory on first use
+    (or built and saved there if they have not been saved yet).  Otherwise
+    the table is built when first needed.  The table is cached."""
+    global form_tables_loaded
+    table = form_tables.get(pos)
+    if table is not None or pos not in ALL_POS:
+        return table
+    cache_dir = os.environ.get(CACHE_ENV, None)
+    if cache_dir and not form_tables_loaded:
+        form_tables_loaded = True
+        path = form_tables_path(cache_dir)
+        if load_form_tables(path):
+            return form_tables[pos]
+        table = add_form_table(pos, build_form_table(pos))
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            save_form_tables(path)
+        except OSError:
+            pass  # Cache directory not writable; just don't save
+        return table
+    return add_form_table(pos, build_form_table(pos))
+
+
+def known_table(pos):
+    """Returns the FormTable for ``pos``.  Raises ValueError if ``pos`` is
+    not a known part-of-speech."""
+    table = form_table(pos)
+    if table is None:
+        raise ValueError("unknown part-of-speech {!r}".format(pos))
+    return table
+
+
+def forms_bitset(pos, transitive=True, no_comp=False, no_case=False,
+                 no_poss=False, no_clitic=False):
+    """Returns the bitset of the forms that all_forms_iter() returns for the
+    part-of-speech and restrictions.  Raises ValueError if ``pos`` is not a
+    known part-of-speech."""
+    table = known_table(pos)
+    flag_bits = table.flag_bits
+    return (flag_bits["transitive", bool(transitive)] &
+            flag_bits["no_comp", bool(no_comp)] &
+            flag_bits["no_case", bool(no_case)] &
+            flag_bits["no_poss", bool(no_poss)] &
+            flag_bits["no_clitic", bool(no_clitic)])
+
+
+def component_bitset(pos, vform=None, comp=None, case=None, poss=None,
+                     clitic=None):
+    """Returns the bitset of the forms of the part-of-speech ``pos`` having
+    the given components (vform, comp, case, poss, clitic).  Components that
+    are None are not restricted.  Combine with forms_bitset() to restrict
+    the forms further, e.g., forms_bitset("verb") & component_bitset("verb",
+    clitic="hAn") contains all verb forms with the clitic hAn.  Raises
+    ValueError if ``pos`` is not a known part-of-speech."""
+    table = known_table(pos)
+    bits = table.all_bits()
+    for names, name in zip(table.field_bits, (vform, comp, case, poss,
+                                              clitic)):
+        if name is not None:
+            bits &= names.get(name, 0)
+    return bits
+
+
+# Translation of binary digits to bytes 0 and 1, for bitset_mask()
+BINARY_DIGITS = bytes.maketrans(b"01", b"\0\1")
+
+
+def bitset_mask(bits):
+    """Returns a bytes object containing 1 for the bits set in ``bits``
+    and 0 for the other bits up to the highest bit set, for use with
+    itertools.compress()."""
+    return bin(bits)[:1:-1].encode("ascii").translate(BINARY_DIGITS)
+
+
+def bitset_forms(pos, bits):
+    """Returns a tuple of the forms in the bitset ``bits`` of the
+    part-of-speech ``pos``, in the order of all_forms_iter()."""
+    forms = known_table(pos).forms
+    return tuple(itertools.compress(forms, bitset_mask(bits)))
+
+
+def bitset_form_ids(pos, bits):
+    """Like bitset_forms(), but returns a tuple of form IDs."""
+    return tuple(encode_form(x) for x in bitset_forms(pos, bits))
@@ -4,6 +4,8 @@
 # Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
 
 import re
+import functools
+import itertools
 from wiktfinnish import nounspecs
 from wiktfinnish import verbspecs
 from wiktfinnish import formnames
@@ -135,155 +137,541 @@ def last_char_to_aou(word):
     return "ä"
 
 
-def process_template(template, args, ill_sg_vowel=None):
-    """Processes a single inflection template.  This handles certain special
-    characters in the template.  See nounspecs.py for a description of the
-    special characters."""
-    parts = []
-    delparts = []
+# Opcodes for compiled inflection templates.  Each template string from
+# nounspecs.py/verbspecs.py is compiled into a tuple of (opcode, operand)
+# pairs by compile_template(), and the compiled program is then executed
+# by run_template().  The interpreter relies on the numeric order of the
+# opcodes (e.g., OP_ILLATIVE through OP_U are handled together).
+OP_LITERAL = 0     # Append operand string
+OP_ARG = 1         # Append argument; operand is (int key, str key)
+OP_ARG_WEAK = 2    # Like OP_ARG, but for "3": empty value becomes EMPTY_CHAR
+OP_PARTITIVE = 3   # "9": par_sg_a or last deleted char, then argument 9
+OP_ILLATIVE = 4    # "@"
+OP_A = 5           # "A"
+OP_O = 6           # "O"
+OP_U = 7           # "U"
+OP_D = 8           # "D"
+OP_I = 9           # "I"
+OP_DROP_LAST = 10  # "-"
+OP_DROP_PREV = 11  # "/"
+
+# Mapping from special template characters to opcodes (digits handled
+# separately).
+template_opcodes = {
+    "@": OP_ILLATIVE,
+    "A": OP_A,
+    "O": OP_O,
+    "U": OP_U,
+    "D": OP_D,
+    "I": OP_I,
+    "-": OP_DROP_LAST,
+    "/": OP_DROP_PREV,
+}
+
+# Cache of compiled templates, indexed by the template string.  The same
+# template strings are shared by many declensions and conjugations, so this
+# stays small (a few thousand entries).
+compiled_templates = {}
+
+
+def compile_template(template):
+    """Compiles an inflection template into a tuple of (opcode, operand)
+    pairs that can be executed by run_template().  Compiled templates are
+    cached, so each distinct template is parsed only once."""
+    program = compiled_templates.get(template)
+    if program is not None:
+        return program
+    ops = []
+    literal = []
     for x in template:
-        if x.isdigit():
-            k = int(x)
-            if k in args:
-                v = args[k]
-            else:
-                v = args.get(x, "")
-            if v == "(')":
-                v = ""
+        if x.isdigit() or x in template_opcodes:
+            if literal:
+                ops.append((OP_LITERAL, "".join(literal)))
+                literal = []
             if x == "9":
+                ops.append((OP_PARTITIVE, (9, x)))
+            elif x == "3":
+                ops.append((OP_ARG_WEAK, (3, x)))
+            elif x.isdigit():
+                ops.append((OP_ARG, (int(x), x)))
+            else:
+                ops.append((template_opcodes[x], None))
+        else:
+            literal.append(x)
+    if literal:
+        ops.append((OP_LITERAL, "".join(literal)))
+    program = tuple(ops)
+    compiled_templates[template] = program
+    return program
+
+
+def scan_vowel_state(s):
+    """Returns (back, vowel, acute) for the string ``s``.  ``back`` is
+    True if the last vowel affecting vowel harmony is a/o/u, False if it is
+    y/ä/ö, and None if there is no such vowel.  ``vowel`` is the last
+    vowel in lowercase (None if no vowels), and ``acute`` is True if the
+    string contains é.  This is not cached (see vowel_state())."""
+    back = None
+    vowel = None
+    acute = False
+    for ch in reversed(s):
+        if back is None and ch in "aouAOUyäöYÄÖ":
+            back = ch in "aouAOU"
+        if vowel is None and ch in "aeiouyåäöAEIOUYÅÄÖ":
+            vowel = ch.lower()
+        if ch in "éÉ":
+            acute = True
+    return back, vowel, acute
+
+
+@functools.lru_cache(maxsize=65536)
+def vowel_state(s):
+    """Same as scan_vowel_state(), but cached.  This is used for template
+    fragments (literals, arguments and suffixes), which are few and repeat
+    often.  Whole words rarely repeat and would only evict the fragments
+    from the cache; use scan_vowel_state() or word_back() for them."""
+    return scan_vowel_state(s)
+
+
+def word_back(word):
+    """Returns the vowel harmony of ``word`` as scan_vowel_state()[0]
+    would, i.e., True for a/o/u, False for y/ä/ö and None if there is no
+    such vowel.  This is used for whole words and is not cached; it
+    usually only looks at the last few characters."""
+    for ch in reversed(word):
+        if ch in "aouAOU":
+            return True
+        if ch in "yäöYÄÖ":
+            return False
+    return None
+
+
+@functools.lru_cache(maxsize=65536)
+def append_vowel_state(state, s):
+    """Returns the vowel state (see vowel_state()) after appending ``s``
+    to a string whose vowel state is ``state``.  This is cached, as there
+    are only a few distinct states."""
+    back, vowel, acute = vowel_state(s)
+    if back is None:
+        back = state[0]
+    if vowel is None:
+        vowel = state[1]
+    return back, vowel, acute or state[2]
+
+
+def parts_vowel_state(parts):
+    """Computes the vowel state for a list of string parts.  This scans
+    backwards and usually only looks at the last few parts."""
+    back = None
+    vowel = None
+    acute = False
+    for s in reversed(parts):
+        b, v, a = vowel_state(s)
+        if back is None:
+            back = b
+        if vowel is None:
+            vowel = v
+        acute = acute or a
+        if back is not None and vowel is not None:
+            break
+    return back, vowel, acute
+
+
+# Vowel state of the empty string
+EMPTY_VOWEL_STATE = (None, None, False)
+
+
+def last_char(parts):
+    """Returns the last character in a list of string parts, or None if
+    they are all empty."""
+    for s in reversed(parts):
+        if s:
+            return s[-1]
+    return None
+
+
+def execute_template(program, args, ill_sg_vowel, parts, delparts, state):
+    """Executes the operations of a compiled template, appending to the
+    list of characters ``parts`` and the list of deleted characters
+    ``delparts``.  ``state`` is the vowel state of ``parts`` (see
+    vowel_state()), or None if it has not been computed.  Returns the new
+    vowel state (possibly None), or False if the template cannot be applied
+    to the arguments."""
+    # Template arguments of normalized arguments (see ParadigmArgs) are
+    # looked up by position
+    positional = args.positional if type(args) is ParadigmArgs else None
+    for op, val in program:
+        if op == OP_LITERAL:
+            parts.extend(val)
+            if state is not None:
+                state = append_vowel_state(state, val)
+        elif op <= OP_PARTITIVE:
+            k, x = val
+            if positional is not None:
+                v = positional[k]
+            else:
+                if k in args:
+                    v = args[k]
+                else:
+                    v = args.get(x, "")
+                if v == "(')":
+                    v = ""
+            if op == OP_PARTITIVE:
                 if "par_sg_a" in args:
-                    parts.append(args["par_sg_a"])
+                    a = args["par_sg_a"]
                 else:
                     if not delparts:
-                        return None
-                    parts.append(delparts[-1])
-            if x == "3" and not v:
+                        return False
+                    a = delparts[-1]
+                parts.append(a)
+                if state is not None:
+                    state = append_vowel_state(state, a)
+            elif op == OP_ARG_WEAK and not v:
                 # XXX what exactly was this kludge for...?  I'm not sure if
                 # this is now handled by other means (default value for last
                 # argument).
                 v = EMPTY_CHAR
-            for y in v:
-                parts.append(y)
-        elif x == "@":
-            if ill_sg_vowel is not None:
-                parts.append(ill_sg_vowel)
+            parts.extend(v)
+            if state is not None:
+                state = append_vowel_state(state, v)
+        elif op <= OP_U:
+            # Vowel harmony or illative vowel.  Deleted parts count as
+            # following the word.
+            if state is None:
+                state = parts_vowel_state(parts)
+            if delparts:
+                delstate = parts_vowel_state(delparts)
             else:
-                p = "".join(parts + delparts)
-                m = re.search(r"([aeiouyåäöAEIOUYÅÄÖ])"
-                              r"[^aeiouyåäöAEIOUYÅÄÖ]*$",
-                              p)
-                if m:
-                    parts.append(m.group(1).lower())
+                delstate = EMPTY_VOWEL_STATE
+            if op == OP_ILLATIVE:
+                if ill_sg_vowel is not None:
+                    v = ill_sg_vowel
                 else:
-                    m = re.search(r"[éÉ]"
-                                  r"[^aeiouyåäöAEIOUYÅÄÖ]*$",
-                                  p)
-                    if m:
-                        parts.append("e")
-                    elif p:
-                        ch = last_char_to_vowel(p[-1])
-                        parts.append(ch)
-                    else:
-                        return None
-        elif x == "A":
-            a = args.get("par_sg_a", None)
-            if a:
-                parts.append(a)
-            else:
-                p = "".join(parts + delparts)
-                parts.append(word_to_aae(p))
-        elif x == "O":
-            p = "".join(parts + delparts)
-            if needs_aou(p):
-                parts.append("o")
-            else:
-                parts.append("ö")
-        elif x == "U":
-            p = "".join(parts + delparts)
-            if needs_aou(p):
-                parts.append("u")
-            else:
-                parts.append("y")
-        elif x == "D":
-            p = "".join(parts)
-            if not p:
-                return None
-            if p[-1] in "rnml":
-                parts.append(p[-1])
+                    v = delstate[1] or state[1]
+                    if v is None:
+                        if state[2] or delstate[2]:
+                            v = "e"
+                        else:
+                            p = last_char(delparts) or last_char(parts)
+                            if p is None:
+                                return False
+                            v = last_char_to_vowel(p)
             else:
-                parts.append("d")
-        elif x == "I":
+                back = delstate[0]
+                if back is None:
+                    back = state[0]
+                if op == OP_A:
+                    v = args.get("par_sg_a", None)
+                    if not v:
+                        v = "a" if back else "ä"
+                elif op == OP_O:
+                    v = "o" if back else "ö"
+                else:
+                    v = "u" if back else "y"
+            parts.append(v)
+            state = append_vowel_state(state, v)
+        elif op == OP_D:
+            p = last_char(parts)
+            if p is None:
+                return False
+            if p not in "rnml":
+                p = "d"
+            parts.append(p)
+            if state is not None:
+                state = append_vowel_state(state, p)
+        elif op == OP_I:
             # Inserts either previously removed character or "e" if it was
             # "i".
             if not delparts:
-                return None
+                return False
             if delparts[-1] == "i":
-                parts.append("e")
+                v = "e"
             else:
-                parts.append(delparts[-1])
-        elif x == "-":
+                v = delparts[-1]
+            parts.append(v)
+            if state is not None:
+                state = append_vowel_state(state, v)
+        elif op == OP_DROP_LAST:
             # Drop last, move to delparts so it counts for gradation
             if not parts:
-                return None
+                return False
             p = parts.pop()
             if p not in "aeiouyäöp":  # Must be vowel or p
-                return None
+                return False
             delparts.append(p)
-        elif x == "/":
+            state = None
+        else:
             # Drop second to last
             if len(parts) < 2:
-                return None
+                return False
             p = parts.pop()
             if p not in "aeiouyäö":  # Must be vowel
-                return None
+                return False
             p2 = parts.pop()
             if p2 not in "aeiouyäö":  # Must be vowel
-                return None
+                return False
             parts.append(p)
-        else:
-            parts.append(x)
+            state = None
+    return state
+
+
+def run_template(program, args, ill_sg_vowel=None):
+    """Executes a template compiled by compile_template() using the
+    declension/conjugation arguments ``args``.  Returns the resulting
+    word form, or None if the template cannot be applied to the
+    arguments.
+
+    The vowel state of the word (see vowel_state()) is computed when the
+    first vowel harmony or illative operation is encountered, by scanning
+    backwards over the parts built so far, and is then carried forward as
+    parts are appended.  Thus the word is never rebuilt mid-template."""
+    parts = []
+    if execute_template(program, args, ill_sg_vowel, parts, [],
+                        None) is False:
+        return None
     v = "".join(parts)
-    if v.find(EMPTY_CHAR) >= 0:
-        for ch in "aeiouyäöAEIOUYÄÖ":
-            v = re.sub("([aeiouyäöAEIOUYÄÖ]" + ch + ")" + EMPTY_CHAR +
-                       "(" + ch + ")", r"\1'\2", v)
-        v = re.sub(EMPTY_CHAR, "", v)
+    if EMPTY_CHAR in v:
+        v = insert_apostrophes(v)
     return v
 
 
-def add_possessive(results, form, poss):
-    """Adds a possessive suffix to each result."""
-    if not poss:
-        return results
+# Operations that may be part of a stem (see split_template())
+STEM_OPS = (OP_ARG, OP_ARG_WEAK, OP_DROP_LAST, OP_DROP_PREV)
 
-    # Add possessive suffix
-    suffixes = nounspecs.possessive_suffixes[poss]
+# Cache of templates split into stem and suffix, indexed by the template
+# string
+split_templates = {}
+
+
+def split_template(template):
+    """Splits the template into a stem part consisting of the initial
+    arguments and deletions (e.g., "134" or "12-") and the rest of the
+    template.  Returns (stem, stem_program, suffix_program, simple), where
+    stem is the template string of the stem part (empty if the template
+    does not begin with an argument) and ``simple`` is True if the suffix
+    can be executed by execute_suffix().  The result is cached."""
+    ret = split_templates.get(template)
+    if ret is not None:
+        return ret
+    program = compile_template(template)
+    i = 0
+    while i < len(program) and program[i][0] in STEM_OPS:
+        i += 1
+    suffix = program[i:]
+    simple = all(op not in (OP_PARTITIVE, OP_DROP_LAST, OP_DROP_PREV)
+                 for op, val in suffix)
+    # Each stem operation comes from a single character of the template
+    ret = (template[:i], program[:i], suffix, simple)
+    split_templates[template] = ret
+    return ret
+
+
+def execute_suffix(program, args, ill_sg_vowel, word, delparts, state,
+                   delstate):
+    """Executes the suffix part of a template (see split_template()) on
+    the stem ``word``.  This is equivalent to execute_template(), but works
+    on strings and requires that the program has no deletions or "9".
+    ``state`` and ``delstate`` are the vowel states of ``word`` and of
+    ``delparts``.  Returns the resulting word, or None if the template
+    cannot be applied to the arguments."""
+    # Template arguments of normalized arguments (see ParadigmArgs) are
+    # looked up by position
+    positional = args.positional if type(args) is ParadigmArgs else None
+    # The vowel state is valid for word[:valid] and is only brought up to
+    # date when needed
+    valid = len(word)
+    for op, val in program:
+        if op == OP_LITERAL:
+            word += val
+        elif op <= OP_ARG_WEAK:
+            k, x = val
+            if positional is not None:
+                v = positional[k]
+            else:
+                if k in args:
+                    v = args[k]
+                else:
+                    v = args.get(x, "")
+                if v == "(')":
+                    v = ""
+            if op == OP_ARG_WEAK and not v:
+                v = EMPTY_CHAR
+            word += v
+        elif op <= OP_U:
+            if valid < len(word):
+                state = append_vowel_state(state, word[valid:])
+                valid = len(word)
+            if op == OP_ILLATIVE:
+                if ill_sg_vowel is not None:
+                    v = ill_sg_vowel
+                else:
+                    v = delstate[1] or state[1]
+                    if v is None:
+                        if state[2] or delstate[2]:
+                            v = "e"
+                        else:
+                            p = (delparts[-1] if delparts else
+                                 word[-1] if word else None)
+                            if p is None:
+                                return None
+                            v = last_char_to_vowel(p)
+            else:
+                back = delstate[0]
+                if back is None:
+                    back = state[0]
+                if op == OP_A:
+                    v = args.get("par_sg_a", None)
+                    if not v:
+                        v = "a" if back else "ä"
+                elif op == OP_O:
+                    v = "o" if back else "ö"
+                else:
+                    v = "u" if back else "y"
+            word += v
+        elif op == OP_D:
+            if not word:
+                return None
+            p = word[-1]
+            if p not in "rnml":
+                p = "d"
+            word += p
+        else:
+            assert op == OP_I
+            if not delparts:
+                return None
+            if delparts[-1] == "i":
+                v = "e"
+            else:
+                v = delparts[-1]
+            word += v
+    return word
+
+
+def run_template_stems(template, args, stems, ill_sg_vowel=None):
+    """Like run_template(), but takes the template string and uses the stem
+    table ``stems`` (a dictionary) for the word.  Stems (the initial
+    arguments and deletions of the template, including gradation) are
+    computed only once per word and stored in the table, and only the
+    rest of the template is executed for each form.  The same table must
+    only be used with the same ``args``."""
+    stem, stem_program, program, simple = split_template(template)
+    if not stem:
+        return run_template(program, args, ill_sg_vowel=ill_sg_vowel)
+    entry = stems.get(stem)
+    if entry is None:
+        parts = []
+        delparts = []
+        state = execute_template(stem_program, args, None, parts, delparts,
+                                 None)
+        if state is False:
+            entry = False
+        else:
+            if state is None:
+                state = parts_vowel_state(parts)
+            if delparts:
+                delstate = parts_vowel_state(delparts)
+            else:
+                delstate = EMPTY_VOWEL_STATE
+            entry = ("".join(parts), tuple(delparts), state, delstate,
+                     tuple(parts))
+        stems[stem] = entry
+    if entry is False:
+        return None
+    if simple:
+        v = execute_suffix(program, args, ill_sg_vowel, entry[0], entry[1],
+                           entry[2], entry[3])
+        if v is None:
+            return None
+    else:
+        parts = list(entry[4])
+        if execute_template(program, args, ill_sg_vowel, parts,
+                            list(entry[1]), entry[2]) is False:
+            return None
+        v = "".join(parts)
+    if EMPTY_CHAR in v:
+        v = insert_apostrophes(v)
+    return v
+
+
+def insert_apostrophes(v):
+    """Removes EMPTY_CHAR markers from ``v``.  A marker between two identical
+    vowels that follow another vowel is replaced by an apostrophe (e.g.,
+    liu'un), otherwise it is simply deleted.  This is done in a single pass
+    over the parts between the markers."""
+    pieces = v.split(EMPTY_CHAR)
+    result = [pieces[0]]
+    for i in range(1, len(pieces)):
+        prev = pieces[i - 1]
+        piece = pieces[i]
+        if (len(prev) >= 2 and piece and piece[0] == prev[-1] and
+            prev[-1] in "aeiouyäöAEIOUYÄÖ" and
+            prev[-2] in "aeiouyäöAEIOUYÄÖ"):
+            result.append("'")
+        result.append(piece)
+    return "".join(result)
+
+
+def process_template(template, args, ill_sg_vowel=None):
+    """Processes a single inflection template.  This handles certain special
+    characters in the template.  See nounspecs.py for a description of the
+    special characters."""
+    return run_template(compile_template(template), args,
+                        ill_sg_vowel=ill_sg_vowel)
+
+
+def harmonize_suffix(suffix, back):
+    """Replaces the vowel harmony characters A, O and U in ``suffix`` by
+    back or front vowels.  ``back`` is the vowel harmony of the word to
+    which the suffix is attached (see vowel_state()).  This can only be
+    used for suffixes that contain no other special characters."""
+    if back:
+        return suffix.replace("A", "a").replace("O", "o").replace("U", "u")
+    return suffix.replace("A", "ä").replace("O", "ö").replace("U", "y")
+
+
+# Forms that take a possessive suffix beginning with a lengthened vowel
+# (e.g., talossaan).
+POSS_VOWEL_FORMS = set([
+    "ine-sg", "ine-pl", "ela-sg", "ela-pl",
+    "all-sg", "all-pl", "ade-sg", "ade-pl",
+    "abl-sg", "abl-pl", "tra-sg", "tra-pl",
+    "ess-sg", "ess-pl", "abe-sg", "abe-pl",
+    "ptv-sg", "ptv-pl", "cmt",
+    "inf1-long", "inf2", "inf3", "inf4", "inf5"])
+
+
+def harmonized_suffixes(suffixes):
+    """Returns a tuple of ``suffixes`` (a string or list of strings) with
+    vowel harmony resolved for front and back vowels, and whether they
+    depend on vowel harmony."""
     if isinstance(suffixes, str):
         suffixes = [suffixes]
-    results2 = []
-    for suffix in suffixes:
-        for v in results:
-            parts = list(x for x in v)
+    front = tuple(harmonize_suffix(x, False) for x in suffixes)
+    back = tuple(harmonize_suffix(x, True) for x in suffixes)
+    return front, back, front != back
+
+
+# Possessive suffixes with vowel harmony resolved (see
+# harmonized_suffixes()), indexed by possessive suffix name
+possessive_variants = {k: harmonized_suffixes(v)
+                       for k, v in nounspecs.possessive_suffixes.items()}
+
+
+def possessive_words(results, backs, form, poss):
+    """Adds the possessive suffix ``poss`` to each of ``results`` for
+    ``form``.  ``backs`` contains for each result whether it takes back
+    vowel suffixes (see word_back()).  Returns a dictionary mapping the
+    resulting words, in order, to whether they take back vowel suffixes.
+    Several suffixes may produce the same word; only the first is kept."""
+    front, back, harmonic = possessive_variants[poss]
+    results2 = {}
+    for i in range(len(front)):
+        for v, b in zip(results, backs):
+            suffix = back[i] if b else front[i]
             if suffix[0] != "@":
-                for x in suffix:
-                    if x == "A":
-                        p = "".join(parts)
-                        m = re.search("([aouAOU])[^yäöYÄÖ]*$", p)
-                        if m:
-                            parts.append("a")
-                        else:
-                            parts.append("ä")
-                    else:
-                        parts.append(x)
-                v = "".join(parts)
+                v += suffix
             else:
-                if form not in (
-                        "ine-sg", "ine-pl", "ela-sg", "ela-pl",
-                        "all-sg", "all-pl", "ade-sg", "ade-pl",
-                        "abl-sg", "abl-pl", "tra-sg", "tra-pl",
-                        "ess-sg", "ess-pl", "abe-sg", "abe-pl",
-                        "ptv-sg", "ptv-pl", "cmt",
-                        "inf1-long", "inf2", "inf3", "inf4", "inf5"):
+                if form not in POSS_VOWEL_FORMS:
                     continue
                 if len(v) < 2 or v[-1] not in "aeiouyäö":
                     continue
@@ -291,31 +679,52 @@ def add_possessive(results, form, poss):
                     continue
                 v += v[-1]
                 v += suffix[1:]
-            if v:
-                results2.append(v)
+            if v and v not in results2:
+                results2[v] = b
     return results2
 
 
+def add_possessive(results, form, poss):
+    """Adds a possessive suffix to each result."""
+    if not poss:
+        return results
+    if possessive_variants[poss][2]:
+        backs = [word_back(v) for v in results]
+    else:
+        backs = itertools.repeat(False)
+    return list(possessive_words(results, backs, form, poss))
+
+
+# Clitics with vowel harmony resolved.  This maps each clitic to a tuple
+# of its front and back vowel forms.
+clitic_suffixes = {x: (harmonize_suffix(x, False), harmonize_suffix(x, True))
+                   for x in formnames.CLITIC_FORMS if x}
+
+
 def add_clitic(results, clitic):
     """Adds a clitic to the results."""
     if not clitic or clitic == "__dummy__":  # dummy used tatufin/makemorph.py
         return results
 
+    return clitic_words(results, map(word_back, results), clitic)
+
+
+def clitic_words(results, backs, clitic):
+    """Adds the clitic ``clitic`` to each of ``results``.  ``backs``
+    contains for each result whether it takes back vowel suffixes (see
+    word_back()).  Returns a list of the resulting words."""
+    suffixes = clitic_suffixes.get(clitic)
+    if suffixes is None:
+        suffixes = (harmonize_suffix(clitic, False),
+                    harmonize_suffix(clitic, True))
     results2 = []
-    for v in results:
-        args = {"1": v}
-        ret = process_template("1" + clitic, args)
+    for v, b in zip(results, backs):
         if v:
-            results2.append(ret)
+            results2.append(v + suffixes[1 if b else 0])
         if clitic == "kOs" and v[-1] not in "bcdfghjklmpqrstvwxz":
-            ret = process_template("1" + "ks", args)
-            if ret:
-                results2.append(ret)
+            results2.append(v + "ks")
         if clitic == "kOs" and v[-1] == "t":
-            args = {"1": v[:-1]}
-            ret = process_template("1" + "ks", args)
-            if ret:
-                results2.append(ret)
+            results2.append(v[:-1] + "ks")
     return results2
 
 
@@ -335,23 +744,12 @@ def clean_exception(v):
     return v.strip()
 
 
-def inflect_using(decls, name, args, form, use_poss, use_clitic):
-    """Inflects the word indicated by the declension/conjugation specification
-    into the form ``form`` using the inflection type ``name`` and
-    type specifications in ``decls``.  ``use_poss`` indicates whether
-    a possessive suffix or clitic follows, and ``use_clitic`` indicates
-    whether a clitic follows.  This function is used for both nominals
-    and verbs."""
-    # Map some legacy declension names that are redirects in wiktionary
-    if name in nounspecs.decl_name_map:
-        name = nounspecs.decl_name_map[name]
-
-    # Look up the inflection data for the declension/conjugation
-    decl = decls.get(name, None)
-    if decl is None:
-        # print("Unrecognized declension/conjugation name:", name)
-        return []
-
+def default_args(decl, args):
+    """Fills in defaulted arguments for the declension/conjugation ``decl``
+    and merges extra stem arguments.  Returns ``args`` itself if nothing
+    needs to be changed, otherwise a modified copy."""
+    if type(args) is ParadigmArgs and args.decl is decl:
+        return args  # Already normalized for this declension
     # Default last argument to a/ä if it does not exist (it is missing from
     # various declensions in Wikipedia)
     nargs = decl.get("nargs", None)
@@ -366,10 +764,15 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
             # are used by the template, and the expectation seems to be that
             # the last one is the ae argument and the others are merged into
             # the stem.
-            for i in range(nargs + 1, 20):
-                if i not in args and str(i) not in args:
-                    break
-            i -= 1
+            present = set()
+            for k in args:
+                if isinstance(k, int):
+                    present.add(k)
+                elif isinstance(k, str) and k.isdigit():
+                    present.add(int(k))
+            i = nargs
+            while i < 18 and i + 1 in present:
+                i += 1
             if i > nargs:
                 # This declension has more arguments than it takes
                 #print("DECLENSION HAS TOO MANY ARGS:", name, args)
@@ -393,57 +796,176 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
                             pass
                     args[1] = stem
                     args[2] = aae
+    return args
+
+
+# Key for the parts of a compound word in its stem table (see
+# inflect_using() and split_parts())
+SPLIT_KEY = ("split",)
+
+
+def split_parts(decls, decl, args, cache=False):
+    """Splits the arguments of a compound word whose declension ``decl``
+    has "split" into the arguments of its parts.  Returns a list of
+    (name, args, last_part, stems, cache) for the parts.  If ``cache`` is
+    True, ``stems`` is a stem table and ``cache`` a dictionary for the
+    results of the part, indexed by (form, use_poss, use_clitic), and the
+    arguments are normalized (see ParadigmArgs) when possible; otherwise
+    they are None."""
+    split = decl["split"]
+    assert isinstance(split, (list, tuple))
+    assert len(split) % 2 == 0
+    parts = []
+    for i in range(0, len(split), 2):
+        last_part = i == len(split) - 2
+        start = split[i]
+        new_name = split[i + 1]
+        end = 100 if last_part else split[i + 2]
+        new_args = {}
+        for x, v in args.items():
+            if isinstance(x, int):
+                if x < start or x >= end:
+                    continue
+                new_args[str(x - start + 1)] = v
+            elif isinstance(x, str) and x.isdigit():
+                x = int(x)
+                if x < start or x >= end:
+                    continue
+                new_args[str(x - start + 1)] = v
+            elif (x in ("par_sg_a", "ill_sg_vowel", "ill_sg_vowel2") and
+                  not last_part):
+                # Put ill_sg_a only in last one (KLUDGE!)
+                pass
+            else:
+                new_args[x] = v
+        defargs = decls.get(new_name, {}).get("default", {})
+        for x, v in defargs.items():
+            if x not in new_args:
+                #print("Adding default arg", x, v, new_args)
+                new_args[x] = v
+        if cache:
+            new_args["template_name"] = new_name
+            try:
+                new_args = ParadigmArgs(new_args)
+            except TypeError:
+                pass  # Some argument value is not hashable
+            parts.append((new_name, new_args, last_part, {}, {}))
+        else:
+            parts.append((new_name, new_args, last_part, None, None))
+    return parts
+
+
+def split_product(rets, space):
+    """Generates the forms of a compound word from the list of results
+    ``rets`` for each of its parts, by joining each combination of the
+    alternatives of the parts with ``space``.  A part without results
+    discards the combinations of the parts before it."""
+    groups = []
+    for ret in rets:
+        if not ret:
+            groups = []
+        else:
+            groups.append(ret)
+    if not groups:
+        return
+    for combination in itertools.product(*groups):
+        yield space.join(combination)
+
+
+# Backends for expanding the templates of a word when all of its forms are
+# generated using a stem table (see inflect_using()).  "interpreter" (the
+# default) runs the templates of each form as they are needed.
+# "generated" computes all template forms of the word at once using the
+# functions generated by codegen.py; it must be selected explicitly with
+# set_template_backend().
+TEMPLATE_BACKENDS = ("interpreter", "generated")
+
+# The selected backend (see set_template_backend())
+template_backend = "interpreter"
+
+# Key for the template forms of the word in its stem table.  The value is a
+# dictionary mapping template keys (e.g., "ine-sg" or "gen-pl-poss") to
+# lists of word forms, as returned by codegen.template_forms(), or False if
+# the templates are expanded by the interpreter.  Template keys missing from
+# the dictionary are expanded by the interpreter.
+FORMS_KEY = ("forms",)
+
+
+def set_template_backend(backend):
+    """Selects the backend for expanding templates (see
+    TEMPLATE_BACKENDS).  Stem tables created before this keep the forms
+    computed by the previous backend."""
+    global template_backend
+    assert backend in TEMPLATE_BACKENDS
+    template_backend = backend
 
-    results = []
+
+def generated_function(name):
+    """Returns the generated function computing all template forms of the
+    declension/conjugation ``name``, or None if templates are expanded by
+    the interpreter.  The functions are loaded by
+    codegen.paradigm_function()."""
+    if template_backend != "generated":
+        return None
+    from wiktfinnish import codegen  # codegen imports this module
+    return codegen.paradigm_function(name)
+
+
+def inflect_using(decls, name, args, form, use_poss, use_clitic,
+                  stems=None):
+    """Inflects the word indicated by the declension/conjugation specification
+    into the form ``form`` using the inflection type ``name`` and
+    type specifications in ``decls``.  ``use_poss`` indicates whether
+    a possessive suffix or clitic follows, and ``use_clitic`` indicates
+    whether a clitic follows.  ``stems`` is an optional stem table (see
+    run_template_stems()) for this word and declension; if it is given,
+    the templates are expanded by the selected backend (see
+    TEMPLATE_BACKENDS).  This function is used for both nominals and
+    verbs."""
+    # Map some legacy declension names that are redirects in wiktionary
+    if name in nounspecs.decl_name_map:
+        name = nounspecs.decl_name_map[name]
+
+    # Look up the inflection data for the declension/conjugation
+    decl = decls.get(name, None)
+    if decl is None:
+        # print("Unrecognized declension/conjugation name:", name)
+        return []
+
+    args = default_args(decl, args)
 
     # Check if it is a declension for compound words that inflect from multiple
     # locations.
     if "split" in decl and (form != "" or "word" not in args):
-        split = decl["split"]
-        assert isinstance(split, (list, tuple))
-        assert len(split) % 2 == 0
-        space = args.get("space", " ")
-        for i in range(0, len(split), 2):
-            last_part = i == len(split) - 2
-            start = split[i]
-            new_name = split[i + 1]
-            end = 100 if last_part else split[i + 2]
-            new_args = {}
-            for x, v in args.items():
-                if isinstance(x, int):
-                    if x < start or x >= end:
-                        continue
-                    new_args[str(x - start + 1)] = v
-                elif isinstance(x, str) and x.isdigit():
-                    x = int(x)
-                    if x < start or x >= end:
-                        continue
-                    new_args[str(x - start + 1)] = v
-                elif (x in ("par_sg_a", "ill_sg_vowel", "ill_sg_vowel2") and
-                      not last_part):
-                    # Put ill_sg_a only in last one (KLUDGE!)
-                    pass
-                else:
-                    new_args[x] = v
-            defargs = decls.get(new_name, {}).get("default", {})
-            for x, v in defargs.items():
-                if x not in new_args:
-                    #print("Adding default arg", x, v, new_args)
-                    new_args[x] = v
-            #print("split:", new_name, new_args, form)
-            ret = inflect_using(decls, new_name, new_args, form,
-                                last_part and use_poss,
-                                last_part and use_clitic)
-            #print("split ret:", ret)
-            if not results:
-                results.extend(ret)
+        if stems is None:
+            parts = split_parts(decls, decl, args)
+        else:
+            # The parts and their results are cached in the stem table
+            parts = stems.get(SPLIT_KEY)
+            if parts is None:
+                parts = split_parts(decls, decl, args, cache=True)
+                stems[SPLIT_KEY] = parts
+        rets = []
+        for new_name, new_args, last_part, part_stems, cache in parts:
+            part_poss = last_part and use_poss
+            part_clitic = last_part and use_clitic
+            if cache is None:
+                ret = inflect_using(decls, new_name, new_args, form,
+                                    part_poss, part_clitic)
             else:
-                new_results = []
-                for x in results:
-                    for y in ret:
-                        new_results.append(x + space + y)
-                results = new_results
-        return results
+                k = (form, part_poss, part_clitic)
+                ret = cache.get(k)
+                if ret is None:
+                    ret = inflect_using(decls, new_name, new_args, form,
+                                        part_poss, part_clitic,
+                                        stems=part_stems)
+                    cache[k] = ret
+            rets.append(ret)
+        return list(split_product(rets, args.get("space", " ")))
+
+    # The results are collected as the keys of a dictionary, which keeps them
+    # in insertion order without duplicates
+    results = {}
 
     def add_exception(v):
         # Some exception forms contain [[...]] or multiple words.
@@ -489,10 +1011,9 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
                     v = v[:-1]
 
             # Add the value to the results.
-            if v not in results:
-                results.append(v)
+            results[v] = None
 
-    formarg = re.sub("-", "_", form)
+    formarg = form.replace("-", "_")
     v = args.get(formarg, None)
     if v is not None:
         # Exception defined for this form
@@ -509,18 +1030,20 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
             if v:
                 add_exception(v)
     else:
-        templates = False
-        if use_clitic and not use_poss:
-            # Try to find special clitic-only template (used for abbreviations)
-            templates = decl.get(form + "-clitic", False)
-        if templates is False and use_poss:
-            # Try -poss template first if possessive suffix
-            templates = decl.get(form + "-poss", False)
-        if templates is False:
-            # Otherwise just use the default template
-            templates = decl.get(form, None)
+        key, templates = template_key(decl, form, use_poss, use_clitic)
         if not templates:
             return []
+        if stems is not None:
+            # Use the template forms computed for the whole word, if any
+            forms = stems.get(FORMS_KEY)
+            if forms is None:
+                func = generated_function(name)
+                forms = False if func is None else func(args)
+                stems[FORMS_KEY] = forms
+            if forms:
+                ret = forms.get(key)
+                if ret is not None:
+                    return list(ret)
         if isinstance(templates, str):
             templates = [templates]
 
@@ -534,35 +1057,117 @@ def inflect_using(decls, name, args, form, use_poss, use_clitic):
 
         # Generate word forms for each template
         for template in templates:
-            v = process_template(template, args, ill_sg_vowel=ill_sg_vowel)
-            if v and v not in results:
-                results.append(v)
+            if stems is not None:
+                v = run_template_stems(template, args, stems,
+                                       ill_sg_vowel=ill_sg_vowel)
+            else:
+                program = compile_template(template)
+                v = run_template(program, args, ill_sg_vowel=ill_sg_vowel)
+            if v:
+                results[v] = None
             # Kludge to handle certain words with two vowel choices in ill-sg
             if ill_sg_vowel2 is not None:
-                v = process_template(template, args, ill_sg_vowel=ill_sg_vowel2)
-                if v and v not in results:
-                    results.append(v)
-    return results
+                v = run_template(compile_template(template), args,
+                                 ill_sg_vowel=ill_sg_vowel2)
+                if v:
+                    results[v] = None
+    return list(results)
 
 
-def inflect_nominal(name, args, form, comp="", poss="",
-                    clitic="", force_n=False):
-    """Inflects the word whose declension/conjugation information is in
-    ``args`` to the form indicated by ``form``.  ``poss`` indicates
-    optional possessive suffix form(s).  Returns None if the
-    form is invalid for the word."""
+def template_key(decl, form, use_poss, use_clitic):
+    """Returns (key, templates) for the templates that inflect_using()
+    uses for ``form`` in the declension/conjugation ``decl`` when the word
+    has no exception for the form.  ``use_poss`` and ``use_clitic`` are
+    as for inflect_using().  ``templates`` is None or empty if the form
+    does not exist."""
+    templates = False
+    if use_clitic and not use_poss:
+        # Try to find special clitic-only template (used for abbreviations)
+        key = form + "-clitic"
+        templates = decl.get(key, False)
+    if templates is False and use_poss:
+        # Try -poss template first if possessive suffix
+        key = form + "-poss"
+        templates = decl.get(key, False)
+    if templates is False:
+        # Otherwise just use the default template
+        key = form
+        templates = decl.get(form, None)
+    return key, templates
 
-    if name not in nounspecs.noun_decls and name not in nounspecs.decl_name_map:
-        if name not in undef_decl_warned:
-            undef_decl_warned.add(name)
-            # print("inflect_nominal: unrecognized declension", name,
-            #       "for", args)
-        return []
-    assert form in formnames.CASE_FORMS
-    assert comp in formnames.COMPARATIVE_FORMS
-    assert poss in formnames.POSSESSIVE_FORMS
-    assert clitic in formnames.CLITIC_FORMS or clitic == "__dummy__"
 
+def has_exception(args, form):
+    """Returns True if ``args`` gives an exception value (e.g., "gen_pl")
+    for ``form``, which inflect_using() then uses instead of the
+    templates."""
+    if args.get(form.replace("-", "_"), None) is not None:
+        return True
+    return (form in argument_name_map and
+            any(x in args for x in argument_name_map[form]))
+
+
+def has_clitic_template(decls, name, form):
+    """Returns True if inflect_using() may inflect ``form`` differently
+    when only a clitic follows, i.e., if the declension/conjugation
+    ``name`` has a special clitic template for the form or is split into
+    parts.  Otherwise the form is the same with and without clitics."""
+    decl = decls.get(nounspecs.decl_name_map.get(name, name))
+    if decl is None:
+        return False
+    return "split" in decl or form + "-clitic" in decl
+
+
+def nominal_poss(args, form, poss):
+    """Returns the possessive suffix actually used for the nominal form
+    ``form``.  Comitative always takes a possessive suffix, except for
+    adjectives, pronouns and numerals."""
+    if args.get("pos") not in ("adj", "pron", "num"):
+        if form == "cmt" and not poss:
+            poss = "3x"
+    return poss
+
+
+@functools.lru_cache(maxsize=65536)
+def comparison_nominal(comp, x):
+    """Returns (name, args) for declining the comparison form ``x`` of
+    type ``comp`` ("comp", "sup" or "hkO") as a nominal, with args as
+    ParadigmArgs.  This is cached, as the same comparison forms are
+    declined into every case."""
+    if comp == "comp":
+        assert x.endswith("mpi")
+        x = x[:-3]
+        name = "fi-decl-vanhempi"
+    elif comp == "sup":
+        assert x.endswith("in")
+        x = x[:-2]
+        name = "fi-decl-sisin"
+    else:
+        assert comp == "hkO"
+        assert x.endswith("hko") or x.endswith("hkö")
+        name = "fi-decl-valo"
+    args = {"1": x, "5": word_to_aae(x), "template_name": name}
+    return name, ParadigmArgs(args)
+
+
+def comparison_nominals(name, args, comp, stems=None):
+    """Inflects the nominal ``name`` with arguments ``args`` into the
+    comparison ``comp`` ("comp", "sup" or "hkO"), and returns the
+    nominals to be declined for its cases as a list of (name, args).
+    ``stems`` is an optional stem table for the word."""
+    results = inflect_using(nounspecs.noun_decls, name, args, comp,
+                            False, False, stems=stems)
+    return [comparison_nominal(comp, x) for x in results]
+
+
+def nominal_base(name, args, form, comp, use_poss, use_clitic,
+                 force_n=False, stems=None, comparisons=None):
+    """Inflects a nominal into the comparison ``comp`` and case ``form``,
+    without possessive suffix or clitic.  ``use_poss`` and
+    ``use_clitic`` indicate whether a possessive suffix or clitic will
+    follow.  ``stems`` is an optional stem table for the word, and
+    ``comparisons`` an optional dictionary for caching its comparison
+    forms (see comparison_nominals()).  The possessive suffix and clitic
+    can then be added using add_suffixes()."""
     # If the word only occurs in singular/plural, refuse to generate forms
     # that conflict with that.
     if not force_n and "n" in args:
@@ -582,11 +1187,6 @@ def inflect_nominal(name, args, form, comp="", poss="",
         if form.endswith("-sg"):
             return []
 
-    # In comitative, force possessive suffix if not adj and none provided
-    if args.get("pos") not in ("adj", "pron", "num"):
-        if form == "cmt" and not poss:
-            poss = "3x"
-
     # Only allow comparison for forms treated as adjectives.
     if comp != "" and args.get("pos") != "adj":
         print("Comparative/superlative without pos=adj:", args)
@@ -596,35 +1196,32 @@ def inflect_nominal(name, args, form, comp="", poss="",
     if comp in ("manner", "comp-manner", "sup-manner"):
         # Inflect using comparison into manner
         results = inflect_using(nounspecs.noun_decls, name, args, comp,
-                                False, False)
+                                False, False, stems=stems)
     elif comp != "":
-        # Inflect using comparison and case
-        results1 = inflect_using(nounspecs.noun_decls, name, args, comp,
-                                 False, False)
+        # Inflect using comparison and case.  The comparison form is
+        # declined as a nominal of its own.
+        if comparisons is None:
+            nominals = comparison_nominals(name, args, comp, stems=stems)
+            nominals = [x + (None,) for x in nominals]
+        else:
+            nominals = comparisons.get(comp)
+            if nominals is None:
+                nominals = comparison_nominals(name, args, comp, stems=stems)
+                nominals = [x + ({},) for x in nominals]
+                comparisons[comp] = nominals
         results = []
-        for x in results1:
-            if comp == "comp":
-                assert x.endswith("mpi")
-                x = x[:-3]
-                name = "fi-decl-vanhempi"
-            elif comp == "sup":
-                assert x.endswith("in")
-                x = x[:-2]
-                name = "fi-decl-sisin"
-            elif comp == "hkO":
-                assert x.endswith("hko") or x.endswith("hkö")
-                name = "fi-decl-valo"
-            args = {"1": x, "5": word_to_aae(x)}
-            ret = inflect_using(nounspecs.noun_decls, name, args, form,
-                                poss != "", clitic != "")
+        for x_name, x_args, x_stems in nominals:
+            ret = inflect_using(nounspecs.noun_decls, x_name, x_args, form,
+                                use_poss, use_clitic, stems=x_stems)
             results.extend(ret)
+        return results
     else:
         # Inflect using case only
         results = inflect_using(nounspecs.noun_decls, name, args, form,
-                                poss != "", clitic != "")
+                                use_poss, use_clitic, stems=stems)
 
         # Handle i=0 for nominative singular
-        if form == "" and args.get("i") == "0" and not poss:
+        if form == "" and args.get("i") == "0" and not use_poss:
             results2 = []
             for v in results:
                 assert v.endswith("i")
@@ -637,15 +1234,198 @@ def inflect_nominal(name, args, form, comp="", poss="",
         for v in results:
             results2.append(v + "e")
         results = results2
+    return results
+
 
+def add_suffixes(results, form, poss, clitic):
+    """Adds the possessive suffix ``poss`` and clitic ``clitic`` to
+    each result for ``form``."""
     # Add possessive suffix
     results = add_possessive(results, form, poss)
-
     # Add any clitic or other suffix.
     results = add_clitic(results, clitic)
     return results
 
 
+def inflect_nominal(name, args, form, comp="", poss="",
+                    clitic="", force_n=False):
+    """Inflects the word whose declension/conjugation information is in
+    ``args`` to the form indicated by ``form``.  ``poss`` indicates
+    optional possessive suffix form(s).  Returns None if the
+    form is invalid for the word."""
+
+    if name not in nounspecs.noun_decls and name not in nounspecs.decl_name_map:
+        if name not in undef_decl_warned:
+            undef_decl_warned.add(name)
+            # print("inflect_nominal: unrecognized declension", name,
+            #       "for", args)
+        return []
+    assert form in formnames.CASE_FORM_INDEXES
+    assert comp in formnames.COMPARATIVE_FORM_INDEXES
+    assert poss in formnames.POSSESSIVE_FORM_INDEXES
+    assert clitic in formnames.CLITIC_FORM_INDEXES or clitic == "__dummy__"
+
+    # In comitative, force possessive suffix if not adj and none provided
+    poss = nominal_poss(args, form, poss)
+
+    results = nominal_base(name, args, form, comp, poss != "", clitic != "",
+                           force_n=force_n)
+    return add_suffixes(results, form, poss, clitic)
+
+
+# Verb forms that are inflected further as nominals
+NOMINAL_VFORMS = ("pres-part", "pres-pass-part", "agnt-part",
+                  "nega-part", "past-part", "past-pass-part",
+                  "inf2", "inf2-pass", "inf3", "inf3-pass", "inf4",
+                  "jA")
+
+
+def verbal_args(name, args):
+    """Returns the arguments actually used for inflecting the verb
+    ``name``."""
+    # Default fi-conj-kumajaa to arg2 "a" (needed for "vipajaa").  This is
+    # an excepton to the normal default rule in inflect_using().
+    if name == "fi-conj-kumajaa" and "2" not in args and 2 not in args:
+        args = args.copy()
+        args[2] = "a"
+    return args
+
+
+def verbal_poss(vform, poss):
+    """Returns the possessive suffix actually used for the verb form
+    ``vform``.  The long first infinitive and fifth infinitive always take
+    a possessive suffix."""
+    if not poss and vform in ("inf1-long", "inf5"):
+        poss = "3x"
+    return poss
+
+
+def verbal_nominal(vform, v, name=None):
+    """Returns (name, args) for inflecting the verb form ``v`` of type
+    ``vform`` (one of NOMINAL_VFORMS) as a nominal, or None if ``v``
+    is not a valid form of that type.  ``name`` is the conjugation of the
+    verb, which is printed with invalid forms."""
+    if vform in ("pres-part", "pres-pass-part", "agnt-part"):
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        name = "fi-decl-koira"
+        args = {"1": v[:-1], "2": "", "3": "",
+                "4": word_to_aae(v),
+                "pos": "adj"}
+    elif vform == "past-part":
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        name = "fi-decl-kuollut"
+        args = {"1": v[:-2], "2": word_to_aae(v),
+                "pos": "adj"}
+    elif vform == "past-pass-part":
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        name = "fi-decl-valo"
+        if v.endswith("ttu") or v.endswith("tty"):
+            args = {"1": v[:-3], "2": "tt", "3": "t",
+                    "4": "u" if needs_aou(v) else "y",
+                    "5": word_to_aae(v),
+                    "pos": "adj"}
+        else:
+            if v[-3] in "rnml":
+                weak = v[-3]
+            else:
+                weak = "d"
+            args = {"1": v[:-2], "2": "t", "3": weak,
+                    "4": "u" if needs_aou(v) else "y",
+                    "5": word_to_aae(v),
+                    "pos": "adj"}
+    elif vform in ("inf2", "inf2-pass"):
+        if len(v) < 5:
+            print("Invalid", vform, v, name)
+            return None
+        assert v[-4:] in ("essa", "essä")
+        name = "fi-decl-inf2"
+        args = {"1": v[:-3],
+                "2": v[-1]}
+    elif vform == "agnt-part":
+        if len(v) < 3:
+            print("Invalid", vform, v, name)
+            return None
+        assert v[-2:] in ("ma", "mä")
+        name = "fi-decl-koira"
+        args = {"1": v, "2": v[-1]}
+    elif vform == "inf3":
+        if len(v) < 6:
+            print("Invalid", vform, v, name)
+            return None
+        assert v[-5:] in ("massa", "mässä")
+        name = "fi-decl-inf3"
+        args = {"1": v[:-3],
+                "2": v[-1]}
+    elif vform == "inf3-pass":
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        assert v[-3:] in ("man", "män")
+        name = "fi-decl-inf3"
+        args = {"1": v[:-1],
+                "2": v[-1]}
+    elif vform == "inf4":
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        assert v.endswith("nen")
+        name = "fi-decl-nainen"
+        args = {"1": v[:-3],
+                "2": word_to_aae(v)}
+    elif vform == "jA":
+        if len(v) < 4:
+            print("Invalid", vform, v, name)
+            return None
+        assert v.endswith("ja") or v.endswith("jä")
+        name = "fi-decl-kulkija"
+        args = {"1": v[:-1], "2": v[-1]}
+    else:
+        assert vform == "nega-part"
+        name = "fi-decl-onneton"
+        args = {"1": v[:-3], "2": word_to_aae(v),
+                "pos": "adj"}
+    return name, args
+
+
+@functools.lru_cache(maxsize=65536)
+def derived_nominal(vform, v, name=None):
+    """Like verbal_nominal(), but returns the arguments as ParadigmArgs
+    (with defaulted arguments filled in).  This is cached, so that the
+    nominal declension of each participle and infinitive is only
+    constructed once, however many cases, comparisons, possessive
+    suffixes and clitics are generated from it."""
+    x = verbal_nominal(vform, v, name)
+    if x is None:
+        return None
+    name, args = x
+    return name, ParadigmArgs(args, template_name=name)
+
+
+def verbal_nominals(name, args, vform, use_poss=False, use_clitic=False):
+    """Inflects the verb ``name`` with arguments ``args`` into the verb form
+    ``vform`` (one of NOMINAL_VFORMS), and returns the nominals derived
+    from it as a list of (name, args).  This is the first stage of
+    inflecting participles and infinitives; the second stage inflects the
+    returned nominals using inflect_nominal().  ``use_poss`` and
+    ``use_clitic`` indicate whether a possessive suffix or clitic will be
+    added in the second stage."""
+    results = inflect_using(verbspecs.verb_conjs, name,
+                            verbal_args(name, args), vform,
+                            use_poss, use_clitic)
+    nominals = []
+    for v in results:
+        x = derived_nominal(vform, v, name)
+        if x is not None:
+            nominals.append(x)
+    return nominals
+
+
 def inflect_verbal(name, args, vform, comp="", case="",
                    poss="", clitic=""):
     """Inflects the word whose declension/conjugation information is in
@@ -658,129 +1438,134 @@ def inflect_verbal(name, args, vform, comp="", case="",
             # print("inflect_verbal: unrecognized verb conjucation", name,
             #       "for", args)
         return []
-    assert vform in formnames.VERB_FORMS
-    assert poss in formnames.POSSESSIVE_FORMS
-    assert comp in formnames.COMPARATIVE_FORMS
-    assert clitic in formnames.CLITIC_FORMS or clitic == "__dummy__"
+    assert vform in formnames.VERB_FORM_INDEXES
+    assert poss in formnames.POSSESSIVE_FORM_INDEXES
+    assert comp in formnames.COMPARATIVE_FORM_INDEXES
+    assert clitic in formnames.CLITIC_FORM_INDEXES or clitic == "__dummy__"
 
     if not vform:
         vform = "inf1"
 
-    if not poss and vform in ("inf1-long", "inf5"):
-        poss = "3x"
+    poss = verbal_poss(vform, poss)
 
-    # Default fi-conj-kumajaa to arg2 "a" (needed for "vipajaa").  This is
-    # an excepton to the normal default rule in inflect_using().
-    if name == "fi-conj-kumajaa" and "2" not in args and 2 not in args:
-        args = args.copy()
-        args[2] = "a"
+    if case or vform in NOMINAL_VFORMS:
+        # Derive nominals from the verb form and inflect them.
+        results = []
+        for x in verbal_nominals(name, args, vform, case != "" or poss != "",
+                                 clitic != ""):
+            ret = inflect_nominal(x[0], x[1], case, comp=comp,
+                                  poss=poss, clitic=clitic)
+            results.extend(ret)
+        return results
 
     # Inflect the form using templates.
+    args = verbal_args(name, args)
     results = inflect_using(verbspecs.verb_conjs, name, args, vform,
-                            case != "" or
                             poss != "", clitic != "")
+    return add_suffixes(results, vform, poss, clitic)
 
-    if case or vform in ("pres-part", "pres-pass-part", "agnt-part",
-                         "nega-part", "past-part", "past-pass-part",
-                         "inf2", "inf2-pass", "inf3", "inf3-pass", "inf4",
-                         "jA"):
-        results2 = []
-        for v in results:
-            if vform in ("pres-part", "pres-pass-part", "agnt-part"):
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                name = "fi-decl-koira"
-                args = {"1": v[:-1], "2": "", "3": "",
-                        "4": word_to_aae(v),
-                        "pos": "adj"}
-            elif vform == "past-part":
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                name = "fi-decl-kuollut"
-                args = {"1": v[:-2], "2": word_to_aae(v),
-                        "pos": "adj"}
-            elif vform == "past-pass-part":
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                name = "fi-decl-valo"
-                if v.endswith("ttu") or v.endswith("tty"):
-                    args = {"1": v[:-3], "2": "tt", "3": "t",
-                            "4": "u" if needs_aou(v) else "y",
-                            "5": word_to_aae(v),
-                            "pos": "adj"}
-                else:
-                    if v[-3] in "rnml":
-                        weak = v[-3]
-                    else:
-                        weak = "d"
-                    args = {"1": v[:-2], "2": "t", "3": weak,
-                            "4": "u" if needs_aou(v) else "y",
-                            "5": word_to_aae(v),
-                            "pos": "adj"}
-            elif vform in ("inf2", "inf2-pass"):
-                if len(v) < 5:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v[-4:] in ("essa", "essä")
-                name = "fi-decl-inf2"
-                args = {"1": v[:-3],
-                        "2": v[-1]}
-            elif vform == "agnt-part":
-                if len(v) < 3:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v[-2:] in ("ma", "mä")
-                name = "fi-decl-koira"
-                args = {"1": v, "2": v[-1]}
-            elif vform == "inf3":
-                if len(v) < 6:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v[-5:] in ("massa", "mässä")
-                name = "fi-decl-inf3"
-                args = {"1": v[:-3],
-                        "2": v[-1]}
-            elif vform == "inf3-pass":
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v[-3:] in ("man", "män")
-                name = "fi-decl-inf3"
-                args = {"1": v[:-1],
-                        "2": v[-1]}
-            elif vform == "inf4":
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v.endswith("nen")
-                name = "fi-decl-nainen"
-                args = {"1": v[:-3],
-                        "2": word_to_aae(v)}
-            elif vform == "jA":
-                if len(v) < 4:
-                    print("Invalid", vform, v, name, args)
-                    continue
-                assert v.endswith("ja") or v.endswith("jä")
-                name = "fi-decl-kulkija"
-                args = {"1": v[:-1], "2": v[-1]}
-            else:
-                assert vform == "nega-part"
-                name = "fi-decl-onneton"
-                args = {"1": v[:-3], "2": word_to_aae(v),
-                        "pos": "adj"}
-            ret = inflect_nominal(name, args, case, comp=comp,
-                                  poss=poss, clitic=clitic)
-            results2.extend(ret)
-        return results2
-    else:
-        # Add possessive suffix
-        results = add_possessive(results, vform, poss)
-        # Add any clitic or other suffix.
-        results = add_clitic(results, clitic)
-        return results
+
+class ParadigmArgs(dict):
+    """Immutable, hashable conjugation/declension arguments.  This can be
+    used anywhere an ``args`` dictionary is accepted.  Argument names that
+    are digits are stored as integers; get() and ``in`` also accept them
+    as strings.  If the arguments specify a known template_name, defaulted
+    arguments are filled in (see default_args()) when the object is
+    created, so that this does not need to be done (and the arguments
+    copied) again for every form.  Use copy() to obtain a modifiable
+    dictionary.
+
+    ``positional`` is a tuple of the values of the template arguments
+    1-9 (index 0 is unused), with missing values as empty strings.  The
+    template interpreter uses it instead of looking up each argument by
+    both its integer and string name."""
+    __slots__ = ("decl", "positional", "_hash")
+
+    def __init__(self, args=(), **kwargs):
+        data = {}
+        for k, v in dict(args, **kwargs).items():
+            if isinstance(k, str) and k.isdigit():
+                k = int(k)
+                if k in data:
+                    continue  # Integer name takes precedence
+            data[k] = v
+        name = data.get("template_name")
+        name = nounspecs.decl_name_map.get(name, name)
+        decl = nounspecs.noun_decls.get(name)
+        if decl is None:
+            decl = verbspecs.verb_conjs.get(name)
+            if decl is not None:
+                data = verbal_args(name, data)
+        if decl is not None:
+            data = default_args(decl, data)
+        dict.__init__(self, data)
+        # The attributes are set here only (see __setattr__())
+        object.__setattr__(self, "decl", decl)
+        positional = []
+        for k in range(10):
+            v = data.get(k, "")
+            if v == "(')":
+                v = ""
+            positional.append(v)
+        object.__setattr__(self, "positional", tuple(positional))
+        object.__setattr__(self, "_hash",
+                           hash(tuple(sorted(data.items(),
+                                             key=lambda x: str(x[0])))))
+
+    def __hash__(self):
+        return self._hash
+
+    def __contains__(self, k):
+        if dict.__contains__(self, k):
+            return True
+        return isinstance(k, str) and k.isdigit() and \
+            dict.__contains__(self, int(k))
+
+    def __missing__(self, k):
+        if isinstance(k, str) and k.isdigit():
+            return self[int(k)]
+        raise KeyError(k)
+
+    def get(self, k, default=None):
+        if dict.__contains__(self, k):
+            return dict.__getitem__(self, k)
+        if isinstance(k, str) and k.isdigit():
+            return dict.get(self, int(k), default)
+        return default
+
+    def copy(self):
+        """Returns the arguments as a normal (modifiable) dictionary."""
+        return dict(self)
+
+    def __reduce__(self):
+        return (ParadigmArgs, (dict(self),))
+
+    def __repr__(self):
+        return "ParadigmArgs({})".format(dict.__repr__(self))
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("ParadigmArgs is immutable")
+
+    __setitem__ = _immutable
+    __delitem__ = _immutable
+    __setattr__ = _immutable
+    __delattr__ = _immutable
+    __ior__ = _immutable
+    clear = _immutable
+    pop = _immutable
+    popitem = _immutable
+    setdefault = _immutable
+    update = _immutable
+
+
+def normalize_args(args):
+    """Converts conjugation/declension arguments (e.g., from wiktextract,
+    with string argument names) into the canonical ParadigmArgs form.  The
+    result can be passed to all functions that take ``args`` and is
+    faster to inflect when generating multiple forms of the word."""
+    if type(args) is ParadigmArgs:
+        return args
+    return ParadigmArgs(args)
 
 
 def inflect(args, form, force_n=False):
@@ -788,9 +1573,10 @@ def inflect(args, form, force_n=False):
     a word of class args["template_name"], having
     conjugation/declension arguments ``args`` into the form indicated
     by ``form``.  The form is indicated by (vform, comp, case, poss,
-    clitic).  This returns a list of inflected forms, the most
-    preferred one first.  If ``force_n`` is True, generates requested
-    number regardless of limitations specified in ``args``."""
+    clitic), or by the corresponding form ID (see
+    formnames.encode_form()).  This returns a list of inflected forms,
+    the most preferred one first.  If ``force_n`` is True, generates
+    requested number regardless of limitations specified in ``args``."""
     name = args["template_name"]
     if name not in CONJ_DECL_NAMES:
         if name not in undef_decl_warned:
@@ -798,14 +1584,18 @@ def inflect(args, form, force_n=False):
             print("UNDEFINED DECLENSION/CONJUGATION:", name)
         return []
     assert isinstance(args, dict)
-    assert isinstance(form, (list, tuple))
-    assert len(form) == 5
-    vform, comp, case, poss, clitic = form
-    assert vform in formnames.VERB_FORMS
-    assert comp in formnames.COMPARATIVE_FORMS
-    assert case in formnames.CASE_FORMS
-    assert poss in formnames.POSSESSIVE_FORMS
-    assert clitic in formnames.CLITIC_FORMS or clitic == "__dummy__"
+    if isinstance(form, int):
+        # Form IDs are checked when they are decoded
+        vform, comp, case, poss, clitic = formnames.decode_form(form)
+    else:
+        assert isinstance(form, (list, tuple))
+        assert len(form) == 5
+        vform, comp, case, poss, clitic = form
+        assert vform in formnames.VERB_FORM_INDEXES
+        assert comp in formnames.COMPARATIVE_FORM_INDEXES
+        assert case in formnames.CASE_FORM_INDEXES
+        assert poss in formnames.POSSESSIVE_FORM_INDEXES
+        assert clitic in formnames.CLITIC_FORM_INDEXES or clitic == "__dummy__"
     if vform:
         return inflect_verbal(name, args, vform, comp=comp, case=case,
                               poss=poss, clitic=clitic)
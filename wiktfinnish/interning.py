@@ -0,0 +1,72 @@
+# Optional interning of inflected forms.  When the forms of a whole lexicon
+# are kept in memory, the same surface strings are generated many times
+# (e.g., the same word form for several form tuples, or identical forms of
+# different words), and each is a separate string object.  An Interner keeps
+# one canonical copy of each string and keeps statistics on how much memory
+# this saves.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import sys
+
+
+class Interner(object):
+    """A table of canonical copies of inflected forms.  Pass it as the
+    ``interner`` argument of inflect_paradigm(), compact_paradigm() or
+    inflect_batch() to share identical forms between the results.  Unlike
+    sys.intern(), the strings are freed when the Interner is no longer
+    used.  The table can be cleared once the results have been built; the
+    results keep sharing the canonical copies."""
+    __slots__ = ("strings", "lookups", "hits", "saved")
+
+    def __init__(self):
+        self.strings = {}
+        self.lookups = 0
+        self.hits = 0
+        self.saved = 0
+
+    def intern(self, v):
+        """Returns the canonical copy of the string ``v``."""
+        self.lookups += 1
+        x = self.strings.setdefault(v, v)
+        if x is not v:
+            self.hits += 1
+            self.saved += sys.getsizeof(v)
+        return x
+
+    def intern_list(self, lst):
+        """Returns a new list containing the canonical copies of the
+        strings in ``lst``."""
+        strings = self.strings
+        ret = list(lst)
+        for i, v in enumerate(ret):
+            x = strings.setdefault(v, v)
+            if x is not v:
+                ret[i] = x
+                self.hits += 1
+                self.saved += sys.getsizeof(v)
+        self.lookups += len(ret)
+        return ret
+
+    def clear(self):
+        """Removes all strings and resets statistics."""
+        self.strings.clear()
+        self.lookups = 0
+        self.hits = 0
+        self.saved = 0
+
+    def stats(self):
+        """Returns a dictionary of statistics: lookups, hits (the number of
+        strings replaced by a canonical copy), size (the number of distinct
+        strings), saved_bytes (the memory of the replaced strings, which
+        would otherwise be kept), table_bytes (the memory used by the
+        table itself) and hit_rate."""
+        return {"lookups": self.lookups,
+                "hits": self.hits,
+                "size": len(self.strings),
+                "saved_bytes": self.saved,
+                "table_bytes": sys.getsizeof(self.strings),
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0}
+
+    def __len__(self):
+        return len(self.strings)
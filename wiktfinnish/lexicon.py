@@ -0,0 +1,273 @@
+# Binary lexicon of inflected forms.  build_lexicon() inflects a set of
+# entries and writes a file containing the sorted inflected forms (surfaces),
+# each with a list of (lemma, paradigm, form ID) records.  Lexicon reads the
+# file using mmap and looks up words by binary search, so that the file is
+# not loaded into memory and its pages are shared by all processes using it.
+#
+# The file consists of a header, the tables below as arrays of 32-bit
+# unsigned integers in native byte order, and a pool of UTF-8 strings.
+# Strings are referenced by (offset, length) in the pool.
+#
+#   surfaces    (string offset, string length, first record) for each
+#               surface in UTF-8 byte order, followed by (0, 0, number of
+#               records)
+#   records     (lemma index, paradigm index, form ID) for each inflected
+#               form, grouped by surface
+#   lemmas      (string offset, string length) for each lemma
+#   paradigms   (offset, length) of the stem, the encoded paradigm and the
+#               part-of-speech, as returned by stem.encode_paradigm(), for
+#               each paradigm.  The stem and encoded paradigm are null
+#               (offset NULL_OFFSET) for entries whose paradigm cannot be
+#               encoded.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import mmap
+import array
+import struct
+from wiktfinnish.formnames import decode_form
+from wiktfinnish.paradigm import iter_paradigm
+from wiktfinnish.stem import encode_paradigm
+
+# Identifies lexicon files
+LEXICON_MAGIC = b"WFLX"
+
+# Version of the file format.  Increment this whenever the format changes.
+LEXICON_VERSION = 2
+
+# Header: magic, version, number of surfaces, records, lemmas and
+# paradigms, and the offset of the string pool.  The tables follow the
+# header in the order above.
+LEXICON_HEADER = struct.Struct("=4s6I")
+
+# Number of integers in each entry of the tables
+SURFACE_INTS = 3
+RECORD_INTS = 3
+LEMMA_INTS = 2
+PARADIGM_INTS = 6
+
+# String offset of null strings (None)
+NULL_OFFSET = 0xffffffff
+
+
+class StringPool(object):
+    """Pool of UTF-8 encoded strings for writing a lexicon.  Each distinct
+    string is stored once."""
+    __slots__ = ("data", "refs")
+
+    def __init__(self):
+        self.data = io.BytesIO()
+        self.refs = {}
+
+    def add(self, v):
+        """Adds the string ``v`` (str or UTF-8 bytes) to the pool and
+        returns (offset, length).  None is stored as (NULL_OFFSET, 0)."""
+        if v is None:
+            return (NULL_OFFSET, 0)
+        ref = self.refs.get(v)
+        if ref is None:
+            b = v.encode("utf-8") if isinstance(v, str) else v
+            ref = (self.data.tell(), len(b))
+            self.data.write(b)
+            self.refs[v] = ref
+        return ref
+
+
+def build_lexicon(entries, path, **kwargs):
+    """Inflects ``entries``, a sequence of (lemma, args, pos), into all forms
+    (restricted by keyword arguments as for all_forms_list()) and writes a
+    lexicon of the inflected forms into the file ``path``.  Each entry is
+    stored with its paradigm encoded using stem.encode_paradigm(); entries
+    whose paradigm cannot be encoded (e.g., pronouns, exception templates
+    and compound declensions) are stored with a null stem and encoded
+    paradigm.  Returns a dictionary of statistics: entries, unencoded,
+    surfaces, records, lemmas and paradigms."""
+    lemmas = {}
+    paradigms = {}
+    surfaces = {}
+    num = 0
+    unencoded = 0
+    for lemma, args, pos in entries:
+        num += 1
+        stem, code = encode_paradigm(args)
+        if code is None:
+            unencoded += 1
+        lemma_idx = lemmas.setdefault(lemma, len(lemmas))
+        paradigm_idx = paradigms.setdefault((stem, code, pos),
+                                            len(paradigms))
+        for form_id, v in iter_paradigm(args, pos, ids=True, **kwargs):
+            records = surfaces.get(v)
+            if records is None:
+                records = []
+                surfaces[v] = records
+            records.append((lemma_idx, paradigm_idx, form_id))
+
+    # Build the tables.  Surfaces are sorted by their UTF-8 encoding, as
+    # lookups compare the encoded strings.
+    pool = StringPool()
+    surface_ints = array.array("I")
+    record_ints = array.array("I")
+    for b, v in sorted((v.encode("utf-8"), v) for v in surfaces):
+        surface_ints.extend(pool.add(b))
+        surface_ints.append(len(record_ints) // RECORD_INTS)
+        for record in surfaces[v]:
+            record_ints.extend(record)
+    surface_ints.extend((0, 0, len(record_ints) // RECORD_INTS))
+    lemma_ints = array.array("I")
+    for lemma in lemmas:
+        lemma_ints.extend(pool.add(lemma))
+    paradigm_ints = array.array("I")
+    for k in paradigms:
+        for v in k:
+            paradigm_ints.extend(pool.add(v))
+
+    # Write the file
+    tables = (surface_ints, record_ints, lemma_ints, paradigm_ints)
+    pool_offset = LEXICON_HEADER.size + sum(len(x) * x.itemsize
+                                            for x in tables)
+    header = LEXICON_HEADER.pack(LEXICON_MAGIC, LEXICON_VERSION,
+                                 len(surfaces), len(record_ints) //
+                                 RECORD_INTS, len(lemmas), len(paradigms),
+                                 pool_offset)
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(header)
+        for x in tables:
+            x.tofile(f)
+        f.write(pool.data.getvalue())
+    os.replace(tmp, path)
+    return {"entries": num,
+            "unencoded": unencoded,
+            "surfaces": len(surfaces),
+            "records": len(record_ints) // RECORD_INTS,
+            "lemmas": len(lemmas),
+            "paradigms": len(paradigms)}
+
+
+class Lexicon(object):
+    """A lexicon file written by build_lexicon(), opened using mmap.
+    Raises ValueError if the file is not a lexicon file of the current
+    version (written on a machine with the same byte order)."""
+    __slots__ = ("file", "mm", "ints", "num_surfaces", "num_records",
+                 "num_lemmas", "num_paradigms", "records_start",
+                 "lemmas_start", "paradigms_start", "pool_offset")
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0,
+                                access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("not a lexicon file: {}".format(path))
+        try:
+            (magic, version, self.num_surfaces, self.num_records,
+             self.num_lemmas, self.num_paradigms,
+             self.pool_offset) = LEXICON_HEADER.unpack_from(self.mm)
+        except struct.error:
+            magic = version = None
+        if magic != LEXICON_MAGIC or version != LEXICON_VERSION:
+            self.mm.close()
+            self.file.close()
+            raise ValueError("not a lexicon file of version {}: {}"
+                             "".format(LEXICON_VERSION, path))
+        self.ints = memoryview(self.mm)[LEXICON_HEADER.size:
+                                        self.pool_offset].cast("I")
+        self.records_start = (self.num_surfaces + 1) * SURFACE_INTS
+        self.lemmas_start = (self.records_start +
+                             self.num_records * RECORD_INTS)
+        self.paradigms_start = (self.lemmas_start +
+                                self.num_lemmas * LEMMA_INTS)
+
+    def string(self, offset, length):
+        """Returns the string at ``offset`` in the string pool, or None
+        if ``offset`` is NULL_OFFSET."""
+        if offset == NULL_OFFSET:
+            return None
+        start = self.pool_offset + offset
+        return self.mm[start:start + length].decode("utf-8")
+
+    def find(self, word):
+        """Returns the index of the surface ``word``, or -1 if it is not
+        in the lexicon."""
+        key = word.encode("utf-8")
+        ints = self.ints
+        mm = self.mm
+        base = self.pool_offset
+        lo = 0
+        hi = self.num_surfaces
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = mid * SURFACE_INTS
+            start = base + ints[i]
+            if mm[start:start + ints[i + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.num_surfaces:
+            i = lo * SURFACE_INTS
+            start = base + ints[i]
+            if mm[start:start + ints[i + 1]] == key:
+                return lo
+        return -1
+
+    def lemma(self, idx):
+        """Returns the lemma at index ``idx``."""
+        i = self.lemmas_start + idx * LEMMA_INTS
+        return self.string(self.ints[i], self.ints[i + 1])
+
+    def paradigm(self, idx):
+        """Returns (stem, encoded paradigm, pos) for the paradigm at index
+        ``idx``.  The stem and encoded paradigm can be decoded with
+        stem.decode_paradigm(); they are None if the paradigm of the entry
+        could not be encoded."""
+        ints = self.ints
+        i = self.paradigms_start + idx * PARADIGM_INTS
+        return (self.string(ints[i], ints[i + 1]),
+                self.string(ints[i + 2], ints[i + 3]),
+                self.string(ints[i + 4], ints[i + 5]))
+
+    def lookup(self, word):
+        """Returns a list of (lemma, (stem, encoded paradigm, pos), form)
+        for each analysis of the inflected form ``word``.  The list is
+        empty if the word is not in the lexicon."""
+        idx = self.find(word)
+        if idx < 0:
+            return []
+        ints = self.ints
+        i = idx * SURFACE_INTS
+        ret = []
+        for r in range(ints[i + 2], ints[i + SURFACE_INTS + 2]):
+            j = self.records_start + r * RECORD_INTS
+            ret.append((self.lemma(ints[j]), self.paradigm(ints[j + 1]),
+                        decode_form(ints[j + 2])))
+        return ret
+
+    def surfaces(self):
+        """Generates the surfaces in the lexicon in UTF-8 byte order."""
+        ints = self.ints
+        for idx in range(self.num_surfaces):
+            i = idx * SURFACE_INTS
+            yield self.string(ints[i], ints[i + 1])
+
+    def __contains__(self, word):
+        return self.find(word) >= 0
+
+    def __len__(self):
+        return self.num_surfaces
+
+    def close(self):
+        """Closes the lexicon file."""
+        if self.ints is not None:
+            self.ints.release()
+            self.ints = None
+            self.mm.close()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,742 @@
+# Code for generating all inflected forms of a word at once.  This shares
+# the work that is common to many forms (looking up the declension,
+# defaulting arguments, inflecting the base form for the case or verb form)
+# and only adds the possessive suffixes and clitics separately for each
+# form.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import array
+from wiktfinnish import nounspecs
+from wiktfinnish import verbspecs
+from wiktfinnish import formnames
+from wiktfinnish.formnames import all_forms_list, all_form_ids, form_positions
+from wiktfinnish.inflect import (CONJ_DECL_NAMES, NOMINAL_VFORMS, inflect,
+                                 undef_decl_warned, inflect_using,
+                                 has_clitic_template, has_exception,
+                                 template_key, nominal_poss,
+                                 nominal_base, possessive_words, clitic_words,
+                                 clitic_suffixes, word_back, FORMS_KEY,
+                                 verbal_args, verbal_poss, derived_nominal,
+                                 comparison_nominal,
+                                 normalize_args)
+
+# Cache of forms grouped by the part before the clitic, indexed by the
+# arguments of all_forms_list()
+form_groups_cache = {}
+
+
+def group_forms(forms):
+    """Groups ``forms`` by the form before the clitic is added.  This
+    returns a list of ((vform, comp, case, poss, use_clitic), [(form,
+    clitic, suffixes), ...]), where suffixes is the clitic with vowel
+    harmony resolved (see inflect.clitic_suffixes), or None if the clitic
+    must be added using clitic_words().  The forms may also be form IDs (see
+    formnames.encode_form()), which are then returned as such."""
+    groups = {}
+    for form in forms:
+        if isinstance(form, int):
+            vform, comp, case, poss, clitic = formnames.decode_form(form)
+        else:
+            vform, comp, case, poss, clitic = form
+        k = (vform, comp, case, poss, clitic != "")
+        if k not in groups:
+            groups[k] = []
+        suffixes = None if clitic == "kOs" else clitic_suffixes.get(clitic)
+        groups[k].append((form, clitic, suffixes))
+    return list(groups.items())
+
+
+def form_groups(pos, ids=False, **kwargs):
+    """Returns the forms from all_forms_list() grouped by the form before
+    the clitic is added (see group_forms()).  If ``ids`` is True, the forms
+    are returned as form IDs.  The result is cached."""
+    key = (pos, ids, tuple(sorted(kwargs.items())))
+    groups = form_groups_cache.get(key)
+    if groups is not None:
+        return groups
+    if ids:
+        groups = group_forms(all_form_ids(pos, **kwargs))
+    else:
+        groups = group_forms(all_forms_list(pos, **kwargs))
+    form_groups_cache[key] = groups
+    return groups
+
+
+def iter_heads(name, args, groups, force_n=False, stems=None, bases=None):
+    """Inflects the word of class ``name`` (which must be in
+    CONJ_DECL_NAMES), having conjugation/declension arguments ``args``,
+    into the forms in ``groups`` (see group_forms()) before their clitics
+    are added.  This generates (key, group, words, backs) for each group,
+    where words is a list of the inflected forms and backs contains for
+    each of them 1 if it takes back vowel suffixes and 0 otherwise.  Each
+    base case or verb form is inflected only once, and possessive suffixes
+    are added once for each base form; the vowel harmony of the base forms
+    is carried over to the forms with possessive suffixes.  The same lists
+    may be generated for several groups, and must not be modified.
+    ``stems`` is an optional stem table for the word (see
+    inflect_using()), and ``bases`` optionally maps group keys to the base
+    forms for the groups, before possessive suffixes, as (words, backs)
+    computed in advance (see class_bases()).  For verbs, it may also map
+    nominals derived from verb forms (see derived_nominal()) to such
+    mappings for them, with the verb form and its possessive suffix
+    removed from the group keys."""
+    # Base forms without possessive suffix and clitic, as (words, backs),
+    # indexed by (nominal key, case, comp, use_poss, use_clitic), where the
+    # nominal key is None for the word itself and (name, args) for nominals
+    # derived from verb forms.
+    nominal_bases = {}
+    # Verb forms before nominal inflection, as (words, backs), indexed by
+    # (vform, use_poss, use_clitic)
+    verbal_bases = {}
+    # Base forms with possessive suffixes added, as (words, backs), indexed
+    # by (id of base, case or verb form, possessive suffix).  The bases are
+    # kept in nominal_bases and verbal_bases.
+    poss_heads = {}
+    # Stem tables for nominals derived from verb forms, indexed by the
+    # nominal key (name, args) returned by derived_nominal()
+    derived_stems = {}
+    # Stem table for the word (see run_template_stems())
+    if stems is None:
+        stems = {}
+    # Comparison forms to be declined, indexed by nominal key (see the
+    # ``comparisons`` argument of nominal_base())
+    comparisons = {}
+    vargs = verbal_args(name, args)
+
+    def harmonies(words):
+        return words, [1 if word_back(v) else 0 for v in words]
+
+    def possessive(head, form, poss):
+        if not poss:
+            return head
+        k = (id(head), form, poss)
+        ret = poss_heads.get(k)
+        if ret is None:
+            words = possessive_words(head[0], head[1], form, poss)
+            ret = (list(words), list(words.values()))
+            poss_heads[k] = ret
+        return ret
+
+    def nominal(key, name, args, stems, case, comp, poss, use_clitic,
+                force_n):
+        # Templates for clitics are only used without possessive suffixes
+        # (see inflect_using()), and only exist for a few forms, so the
+        # base is usually the same with and without clitics
+        use_poss = poss != ""
+        if use_clitic and (use_poss or
+                           (not comp and
+                            not has_clitic_template(nounspecs.noun_decls,
+                                                    name, case))):
+            use_clitic = False
+        k = (key, case, comp, use_poss, use_clitic)
+        head = nominal_bases.get(k)
+        if head is None:
+            comps = comparisons.get(key)
+            if comps is None:
+                comps = {}
+                comparisons[key] = comps
+            head = harmonies(nominal_base(name, args, case, comp, use_poss,
+                                          use_clitic, force_n=force_n,
+                                          stems=stems, comparisons=comps))
+            nominal_bases[k] = head
+        return possessive(head, case, poss)
+
+    def verbal(vform, comp, case, poss, use_clitic):
+        if not vform:
+            vform = "inf1"
+        poss = verbal_poss(vform, poss)
+        use_poss = case != "" or poss != ""
+        k = (vform, use_poss,
+             use_clitic and not use_poss and
+             has_clitic_template(verbspecs.verb_conjs, name, vform))
+        head = verbal_bases.get(k)
+        if head is None:
+            head = harmonies(inflect_using(verbspecs.verb_conjs, name, vargs,
+                                           vform, use_poss, k[2],
+                                           stems=stems))
+            verbal_bases[k] = head
+        if not case and vform not in NOMINAL_VFORMS:
+            return possessive(head, vform, poss)
+        words = []
+        backs = []
+        for v in head[0]:
+            x = derived_nominal(vform, v, name)
+            if x is None:
+                continue
+            x_bases = bases.get(x)
+            if x_bases:
+                x_head = x_bases.get(("", comp, case, poss, use_clitic))
+                if x_head is not None:
+                    x_words, x_backs = possessive(
+                        x_head, case, nominal_poss(x[1], case, poss))
+                    words.extend(x_words)
+                    backs.extend(x_backs)
+                    continue
+            x_stems = derived_stems.get(x)
+            if x_stems is None:
+                x_stems = {}
+                derived_stems[x] = x_stems
+            x_words, x_backs = nominal(x, x[0], x[1], x_stems, case, comp,
+                                       nominal_poss(x[1], case, poss),
+                                       use_clitic, False)
+            words.extend(x_words)
+            backs.extend(x_backs)
+        return words, backs
+
+    if bases is None:
+        bases = {}
+    if name in verbspecs.verb_conjs:
+        for k, group in groups:
+            vform, comp, case, poss, use_clitic = k
+            head = bases.get(k)
+            if head is not None:
+                head = possessive(head, vform, verbal_poss(vform, poss))
+                yield k, group, head[0], head[1]
+            elif vform:
+                words, backs = verbal(vform, comp, case, poss, use_clitic)
+                yield k, group, words, backs
+            else:
+                yield k, group, [], []
+        return
+
+    # Comitative takes a possessive suffix, except for adjectives, pronouns
+    # and numerals (see nominal_poss())
+    cmt_poss = nominal_poss(args, "cmt", "")
+    # Inflected forms as (words, backs), indexed by (case, comp, poss,
+    # use_clitic), where use_clitic is False with possessive suffixes (the
+    # forms are then the same with and without clitics)
+    heads = {}
+    for k, group in groups:
+        vform, comp, case, poss, use_clitic = k
+        if vform:
+            yield k, group, [], []
+            continue
+        if not poss and case == "cmt":
+            poss = cmt_poss
+        head = bases.get(k)
+        if head is not None:
+            head = possessive(head, case, poss)
+            yield k, group, head[0], head[1]
+            continue
+        hk = (case, comp, poss, use_clitic and not poss)
+        head = heads.get(hk)
+        if head is None:
+            head = nominal(None, name, args, stems, case, comp, poss,
+                           use_clitic, force_n)
+            heads[hk] = head
+        yield k, group, head[0], head[1]
+
+
+def iter_groups(name, args, groups, force_n=False, stems=None, bases=None):
+    """Inflects the word of class ``name`` (which must be in
+    CONJ_DECL_NAMES), having conjugation/declension arguments ``args``,
+    into the forms in ``groups`` (see group_forms()).  This generates
+    (form, results) for each form, one group at a time.  The same results
+    list may be generated for several forms, and must not be modified.
+    ``stems`` and ``bases`` are as for iter_heads()."""
+    for k, group, words, backs in iter_heads(name, args, groups,
+                                             force_n=force_n, stems=stems,
+                                             bases=bases):
+        if not k[4]:
+            for form, clitic, suffixes in group:
+                yield form, words
+            continue
+        for form, clitic, suffixes in group:
+            if suffixes is None:
+                yield form, clitic_words(words, backs, clitic)
+            else:
+                yield form, [v + suffixes[b]
+                             for v, b in zip(words, backs) if v]
+
+
+def inflect_groups(name, args, groups, results, force_n=False,
+                   interner=None, stems=None, bases=None):
+    """Like iter_groups(), but stores the inflected forms in the dictionary
+    ``results``, indexed by form.  If ``interner`` is given (see
+    interning.Interner), the inflected forms are replaced by their
+    canonical copies."""
+    if interner is not None:
+        for form, ret in iter_groups(name, args, groups, force_n=force_n,
+                                     stems=stems, bases=bases):
+            results[form] = interner.intern_list(ret)
+        return
+    for k, group, words, backs in iter_heads(name, args, groups,
+                                             force_n=force_n, stems=stems,
+                                             bases=bases):
+        if not k[4]:
+            for form, clitic, suffixes in group:
+                results[form] = list(words)
+        elif len(words) == 1 and words[0]:
+            # Usual case: a single base word
+            v = words[0]
+            b = backs[0]
+            for form, clitic, suffixes in group:
+                if suffixes is None:
+                    results[form] = clitic_words(words, backs, clitic)
+                else:
+                    results[form] = [v + suffixes[b]]
+        elif len(words) == 2 and words[0] and words[1]:
+            # Two alternative base words (e.g., plural genitives)
+            v1, v2 = words
+            b1, b2 = backs
+            for form, clitic, suffixes in group:
+                if suffixes is None:
+                    results[form] = clitic_words(words, backs, clitic)
+                else:
+                    results[form] = [v1 + suffixes[b1], v2 + suffixes[b2]]
+        else:
+            for form, clitic, suffixes in group:
+                if suffixes is None:
+                    results[form] = clitic_words(words, backs, clitic)
+                else:
+                    results[form] = [v + suffixes[b]
+                                     for v, b in zip(words, backs) if v]
+
+
+def check_name(name):
+    """Returns True if ``name`` is a known conjugation/declension.
+    Otherwise prints a warning (once for each name) and returns False."""
+    if name in CONJ_DECL_NAMES:
+        return True
+    if name not in undef_decl_warned:
+        undef_decl_warned.add(name)
+        print("UNDEFINED DECLENSION/CONJUGATION:", name)
+    return False
+
+
+def inflect_paradigm(args, pos, force_n=False, ids=False, interner=None,
+                     **kwargs):
+    """Inflects the word of class args["template_name"], having
+    conjugation/declension arguments ``args``, into all forms valid for
+    the part-of-speech ``pos``.  Keyword arguments restrict the forms as
+    for all_forms_list().  Returns a dictionary mapping each form
+    (vform, comp, case, poss, clitic) to the list that inflect() would
+    return for it.  If ``ids`` is True, the dictionary is indexed by form
+    IDs (see formnames.encode_form()) instead.  If ``interner`` is given
+    (see interning.Interner), identical inflected forms are shared between
+    all results using the same interner."""
+    assert isinstance(args, dict)
+    try:
+        args = normalize_args(args)
+    except TypeError:
+        pass  # Some argument value is not hashable; use args as they are
+    if ids:
+        forms = all_form_ids(pos, **kwargs)
+    else:
+        forms = all_forms_list(pos, **kwargs)
+    name = args["template_name"]
+    if not check_name(name):
+        return {form: [] for form in forms}
+    results = dict.fromkeys(forms)
+    inflect_groups(name, args, form_groups(pos, ids=ids, **kwargs), results,
+                   force_n=force_n, interner=interner)
+    return results
+
+
+def iter_paradigm(args, pos, force_n=False, ids=False, **kwargs):
+    """Like inflect_paradigm(), but generates (form, word) for each
+    inflected form of the word instead of returning a dictionary.  Forms
+    are generated in the order of all_forms_list(), except that forms
+    differing only in their clitic are generated together.  Only the work
+    shared between forms is kept in memory while generating the forms.
+    If ``ids`` is True, forms are generated as form IDs."""
+    assert isinstance(args, dict)
+    try:
+        args = normalize_args(args)
+    except TypeError:
+        pass  # Some argument value is not hashable; use args as they are
+    name = args["template_name"]
+    if not check_name(name):
+        return
+    for form, ret in iter_groups(name, args,
+                                 form_groups(pos, ids=ids, **kwargs),
+                                 force_n=force_n):
+        for v in ret:
+            yield form, v
+
+
+def iter_inflect(args, forms, force_n=False):
+    """Inflects the word of class args["template_name"], having
+    conjugation/declension arguments ``args``, into each form in
+    ``forms`` (an iterable of (vform, comp, case, poss, clitic) or form
+    IDs), and generates (form, word) for each inflected form.  The forms are
+    inflected one at a time as the results are consumed."""
+    assert isinstance(args, dict)
+    try:
+        args = normalize_args(args)
+    except TypeError:
+        pass  # Some argument value is not hashable; use args as they are
+    for form in forms:
+        for v in inflect(args, form, force_n=force_n):
+            yield form, v
+
+
+class Paradigm(object):
+    """All inflected forms of a word, stored compactly.  ``forms`` is the
+    tuple of forms (see all_forms_list()) and ``positions`` maps each form
+    to its index in it (see form_positions()); these are shared by all
+    paradigms of the same part-of-speech.  The inflected forms are stored
+    in the flat list ``words``, with the alternatives for the form at index
+    i in words[offsets[i]:offsets[i + 1]].  Paradigms are read-only and
+    can be indexed by form tuples and form IDs, like the dictionaries
+    returned by inflect_paradigm()."""
+    __slots__ = ("forms", "positions", "words", "offsets")
+
+    def __init__(self, forms, positions, words, offsets):
+        assert len(offsets) == len(forms) + 1
+        self.forms = forms
+        self.positions = positions
+        self.words = words
+        self.offsets = offsets
+
+    def position(self, form):
+        """Returns the index of ``form`` (a form tuple or form ID).  Raises
+        KeyError if the form is not in the paradigm."""
+        if isinstance(form, int):
+            try:
+                form = formnames.decode_form(form)
+            except ValueError:
+                raise KeyError(form)
+        return self.positions[tuple(form)]
+
+    def __getitem__(self, form):
+        """Returns a list of the inflected forms for ``form``."""
+        i = self.positions.get(form)
+        if i is None:
+            i = self.position(form)
+        offsets = self.offsets
+        return self.words[offsets[i]:offsets[i + 1]]
+
+    def get(self, form, default=None):
+        """Returns a list of the inflected forms for ``form``, or
+        ``default`` if the form is not in the paradigm."""
+        try:
+            return self[form]
+        except KeyError:
+            return default
+
+    def preferred(self, form):
+        """Returns the first (preferred) inflected form for ``form``, or
+        None if the word has no such form.  Raises KeyError if the form is
+        not in the paradigm."""
+        i = self.positions.get(form)
+        if i is None:
+            i = self.position(form)
+        offsets = self.offsets
+        start = offsets[i]
+        if start == offsets[i + 1]:
+            return None
+        return self.words[start]
+
+    def __contains__(self, form):
+        try:
+            self.position(form)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.forms)
+
+    def __len__(self):
+        return len(self.forms)
+
+    def items(self):
+        """Generates (form, words) for each form, where words is a list of
+        the inflected forms."""
+        words = self.words
+        offsets = self.offsets
+        for i, form in enumerate(self.forms):
+            yield form, words[offsets[i]:offsets[i + 1]]
+
+
+def compact_paradigm(args, pos, force_n=False, interner=None, **kwargs):
+    """Like inflect_paradigm(), but returns the inflected forms as a
+    Paradigm, which uses much less memory than a dictionary.  ``interner``
+    is as for inflect_paradigm()."""
+    assert isinstance(args, dict)
+    try:
+        args = normalize_args(args)
+    except TypeError:
+        pass  # Some argument value is not hashable; use args as they are
+    forms = all_forms_list(pos, **kwargs)
+    positions = form_positions(pos, **kwargs)
+    results = [()] * len(forms)
+    name = args["template_name"]
+    if check_name(name):
+        for form, ret in iter_groups(name, args,
+                                     form_groups(pos, **kwargs),
+                                     force_n=force_n):
+            results[positions[form]] = ret
+    words = []
+    offsets = array.array("I", [0])
+    for ret in results:
+        words.extend(ret)
+        offsets.append(len(words))
+    if interner is not None:
+        words = interner.intern_list(words)
+    return Paradigm(forms, positions, words, offsets)
+
+
+# Classes with fewer words than this are inflected one word at a time by
+# inflect_batch(); computing the template forms of small classes together
+# does not pay off.
+BATCH_MIN_WORDS = 4
+
+# NumPy is only used by inflect_batch() for classes with at least this many
+# words, as the overhead of its string operations is then amortized.
+NUMPY_MIN_WORDS = 64
+
+
+# Arguments that make nominal_base() change or drop the forms of the
+# word; the base forms of words having them are not computed in advance
+BASE_ARGS = ("n", "nopl", "nosg", "i", "e")
+
+
+def class_bases(name, args_list, groups, use_numpy=None):
+    """Computes the base forms (see iter_heads()) for the forms in
+    ``groups`` (see group_forms()) of all words of the
+    conjugation/declension ``name`` having arguments ``args_list`` at
+    once.  The template forms of all the words are computed together
+    using vectorized.batch_template_forms(), which uses NumPy as specified
+    by ``use_numpy`` (by default, only for large classes).  The comparison
+    forms of adjectives and the nominals derived from verb forms are
+    likewise declined together for all words, grouped by their
+    declension.  Returns a list containing (stems, bases) for each word,
+    to be passed to iter_heads().  Forms that have exceptions are left
+    for iter_heads() to inflect as usual."""
+    n = len(args_list)
+    x = nounspecs.decl_name_map.get(name, name)
+    verb = x in verbspecs.verb_conjs
+    decls = verbspecs.verb_conjs if verb else nounspecs.noun_decls
+    decl = decls.get(x)
+    if n < BATCH_MIN_WORDS or not decl or "split" in decl:
+        return [(None, None)] * n
+
+    # Find the groups whose base forms come directly from templates, as
+    # (key, case or verb form, possessive suffix, template keys indexed by
+    # whether a possessive suffix follows).  Verb forms inflected as
+    # nominals (participles and infinitives) are in derived_plan, as (verb
+    # form, template key, key of the group of the nominal), and comparison
+    # forms declined as nominals in comp_plan, as (key, comparison, key of
+    # the group of the nominal).
+    plan = []
+    derived_plan = []
+    comp_plan = []
+    for k, group in groups:
+        vform, comp, case, poss, use_clitic = k
+        if verb:
+            if not vform:
+                continue
+            poss = verbal_poss(vform, poss)
+            if case or vform in NOMINAL_VFORMS:
+                use_poss = case != "" or poss != ""
+                key = template_key(decl, vform, use_poss,
+                                   use_clitic and not use_poss and
+                                   has_clitic_template(decls, name,
+                                                       vform))[0]
+                derived_plan.append((vform, key,
+                                     ("", comp, case, poss, use_clitic)))
+                continue
+            x = vform
+        else:
+            if vform:
+                continue
+            if comp:
+                # Comitative without possessive suffix depends on the word
+                # (see nominal_poss()), and manner forms are not declined
+                if (comp in ("comp", "sup", "hkO") and
+                        (poss or case != "cmt")):
+                    comp_plan.append((k, comp,
+                                      ("", "", case, poss, use_clitic)))
+                continue
+            x = case
+        if poss:
+            choices = (True,)
+        elif x == "cmt" and not verb:
+            # Depends on the word (see nominal_poss())
+            choices = (False, True)
+        else:
+            choices = (False,)
+        keys = {}
+        for use_poss in choices:
+            keys[use_poss] = template_key(
+                decl, x, use_poss,
+                use_clitic and not use_poss and
+                has_clitic_template(decls, name, x))[0]
+        plan.append((k, x, poss, keys))
+    comp_keys = {comp: template_key(decl, comp, False, False)[0]
+                 for k, comp, nk in comp_plan}
+
+    # Imported here, as importing NumPy is slow
+    from wiktfinnish import vectorized
+    if use_numpy is None:
+        use_numpy = vectorized.np is not None and n >= NUMPY_MIN_WORDS
+    if verb:
+        args_list = [verbal_args(name, args) for args in args_list]
+    keys = set(key for k, x, poss, keys in plan for key in keys.values())
+    keys.update(key for vform, key, nk in derived_plan)
+    keys.update(comp_keys.values())
+    rets = vectorized.batch_template_forms(name, args_list,
+                                           use_numpy=use_numpy, keys=keys)
+    # Keys of the groups of the nominals derived from each verb form, or of
+    # the comparison forms (indexed by "")
+    nested_groups = {}
+    for vform, key, nk in derived_plan:
+        nested_groups.setdefault(vform, {})[(nk, None)] = None
+    for k, comp, nk in comp_plan:
+        nested_groups.setdefault("", {})[(nk, None)] = None
+    tables = []
+    # The nominals derived from verb forms or comparison forms of all
+    # words, indexed by (declension, verb form or ""), and (bases,
+    # nominals) for each word, where nominals maps the verb form or
+    # comparison to the nominals
+    nested = {}
+    word_nested = []
+    for args, forms in zip(args_list, rets):
+        stems = {FORMS_KEY: forms}
+        if not verb and any(x in args for x in BASE_ARGS):
+            tables.append((stems, None))
+            continue
+        # Exceptions are given by named arguments; most words only have
+        # positional arguments besides template_name
+        named = sum(1 for x in args if isinstance(x, str)) > 1
+        cmt_poss = "" if verb else nominal_poss(args, "cmt", "")
+        heads = {}
+        bases = {}
+        for k, x, poss, keys in plan:
+            if not poss and x == "cmt" and not verb:
+                poss = cmt_poss
+            key = keys[poss != ""]
+            head = heads.get(key)
+            if head is None:
+                words = forms.get(key)
+                if words is None or (named and has_exception(args, x)):
+                    continue
+                head = (words, [1 if word_back(v) else 0 for v in words])
+                heads[key] = head
+            bases[k] = head
+        tables.append((stems, bases))
+        nominals = {}
+        for vform, key, nk in derived_plan:
+            if vform in nominals:
+                continue
+            words = forms.get(key)
+            if words is None or (named and has_exception(args, vform)):
+                continue
+            xs = [x for x in (derived_nominal(vform, v, name)
+                              for v in words)
+                  if x is not None]
+            nominals[vform] = xs
+        if comp_plan and args.get("pos") == "adj":
+            for comp, key in comp_keys.items():
+                words = forms.get(key)
+                if words is None or (named and has_exception(args, comp)):
+                    continue
+                nominals[comp] = [comparison_nominal(comp, v)
+                                  for v in words]
+        if nominals:
+            for src, xs in nominals.items():
+                if src in comp_keys:
+                    src = ""
+                for x in xs:
+                    nested.setdefault((x[0], src), {})[x] = None
+            word_nested.append((bases, nominals))
+    if not nested:
+        return tables
+
+    # Compute the base forms of the nested nominals of each declension
+    # together
+    x_bases = {}
+    for (x_name, src), xs in nested.items():
+        xs = list(xs)
+        x_tables = class_bases(x_name, [x[1] for x in xs],
+                               list(nested_groups[src]), use_numpy=use_numpy)
+        for x, (x_stems, x_base) in zip(xs, x_tables):
+            if x_base:
+                x_bases.setdefault(x, {}).update(x_base)
+    for bases, nominals in word_nested:
+        for xs in nominals.values():
+            for x in xs:
+                if x in x_bases:
+                    bases[x] = x_bases[x]
+        # The comparison forms are declined here; the derived nominals are
+        # looked up by iter_heads() for each verb form
+        for k, comp, nk in comp_plan:
+            xs = nominals.get(comp)
+            if xs is None:
+                continue
+            words = []
+            backs = []
+            for x in xs:
+                head = x_bases.get(x, {}).get(nk)
+                if head is None:
+                    break
+                words.extend(head[0])
+                backs.extend(head[1])
+            else:
+                bases[k] = (words, backs)
+    return tables
+
+
+def inflect_batch(entries, forms, force_n=False, interner=None,
+                  use_numpy=None):
+    """Inflects many words into the same forms.  ``entries`` is a sequence
+    of conjugation/declension arguments (each including "template_name")
+    and ``forms`` a sequence of forms (vform, comp, case, poss, clitic) or
+    form IDs.  Returns a list containing, for each entry, a dictionary
+    mapping each form to the list that inflect() would return for it.
+
+    The forms are checked and grouped only once, and the entries are
+    grouped by conjugation/declension.  The template forms of each class
+    and their base forms are computed for all of its words at once (see
+    class_bases()), after which exceptions, possessive suffixes and
+    clitics are handled for each word.  ``use_numpy`` is as for
+    class_bases(), and ``interner`` as for inflect_paradigm()."""
+    forms = list(forms)
+    for form in forms:
+        if isinstance(form, int):
+            formnames.decode_form(form)  # Checks the form ID
+            continue
+        assert isinstance(form, (list, tuple))
+        assert len(form) == 5
+        vform, comp, case, poss, clitic = form
+        assert vform in formnames.VERB_FORM_INDEXES
+        assert comp in formnames.COMPARATIVE_FORM_INDEXES
+        assert case in formnames.CASE_FORM_INDEXES
+        assert poss in formnames.POSSESSIVE_FORM_INDEXES
+        assert clitic in formnames.CLITIC_FORM_INDEXES or clitic == "__dummy__"
+    forms = [form if isinstance(form, int) else tuple(form)
+             for form in forms]
+    groups = group_forms(forms)
+
+    # Group the entries by class
+    classes = {}
+    num = 0
+    for args in entries:
+        assert isinstance(args, dict)
+        try:
+            args = normalize_args(args)
+        except TypeError:
+            pass  # Some argument value is not hashable; use args as they are
+        name = args["template_name"]
+        if name not in classes:
+            classes[name] = []
+        classes[name].append((num, args))
+        num += 1
+
+    results = [None] * num
+    for name, members in classes.items():
+        if not check_name(name):
+            for i, args in members:
+                results[i] = {form: [] for form in forms}
+            continue
+        tables = class_bases(name, [args for i, args in members], groups,
+                             use_numpy=use_numpy)
+        for (i, args), (stems, bases) in zip(members, tables):
+            ret = dict.fromkeys(forms)
+            inflect_groups(name, args, groups, ret, force_n=force_n,
+                           interner=interner, stems=stems, bases=bases)
+            results[i] = ret
+    return results
@@ -0,0 +1,66 @@
+# Tests for the inflect() cache
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish import inflect, InflectCache
+from wiktfinnish.cache import args_key
+
+valo = {"template_name": "fi-decl-valo",
+        "1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+
+
+class CacheTests(unittest.TestCase):
+
+    def test_args_key(self):
+        self.assertEqual(args_key({1: "val", "2": "a"}),
+                         args_key({"1": "val", 2: "a"}))
+        self.assertNotEqual(args_key({1: "val", "1": "x"}),
+                            args_key({"1": "val"}))
+
+    def test_hits(self):
+        cache = InflectCache(maxsize=10)
+        form = ("", "", "ine-pl", "", "")
+        self.assertEqual(cache.inflect(valo, form), ["valoissa"])
+        self.assertEqual(cache.inflect(dict(valo), form), ["valoissa"])
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_copies(self):
+        cache = InflectCache()
+        form = ("", "", "gen-sg", "", "")
+        ret = cache.inflect(valo, form)
+        ret.append("x")
+        self.assertEqual(cache.inflect(valo, form), inflect(valo, form))
+
+    def test_lru(self):
+        cache = InflectCache(maxsize=2)
+        f1 = ("", "", "ine-sg", "", "")
+        f2 = ("", "", "ela-sg", "", "")
+        f3 = ("", "", "ill-sg", "", "")
+        cache.inflect(valo, f1)
+        cache.inflect(valo, f2)
+        cache.inflect(valo, f1)
+        cache.inflect(valo, f3)  # Evicts f2
+        self.assertEqual(cache.evictions, 1)
+        cache.inflect(valo, f1)
+        self.assertEqual(cache.hits, 2)
+        cache.inflect(valo, f2)
+        self.assertEqual(cache.misses, 4)
+
+    def test_fifo(self):
+        cache = InflectCache(maxsize=2, policy="fifo")
+        f1 = ("", "", "ine-sg", "", "")
+        f2 = ("", "", "ela-sg", "", "")
+        f3 = ("", "", "ill-sg", "", "")
+        cache.inflect(valo, f1)
+        cache.inflect(valo, f2)
+        cache.inflect(valo, f1)
+        cache.inflect(valo, f3)  # Evicts f1
+        cache.inflect(valo, f1)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.evictions, 2)
+        self.assertEqual(len(cache), 2)
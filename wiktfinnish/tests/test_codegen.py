@@ -0,0 +1,90 @@
+# Tests for the generated inflection functions
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import tempfile
+import unittest
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish import codegen
+from wiktfinnish.formnames import CACHE_ENV
+from wiktfinnish.inflect import set_template_backend, generated_function
+from wiktfinnish.paradigm import inflect_paradigm
+
+# Arguments used for checking each declension/conjugation against the
+# template interpreter.  These are not real words, but they exercise
+# gradation, apostrophes, vowel harmony and the ill-sg kludges.
+sample_args = [
+    {"1": "kal", "2": "t", "3": "d", "4": "a", "5": "a", "6": "a"},
+    {"1": "liu", "2": "k", "3": "", "4": "u", "5": "a", "6": "a"},
+    {"1": "lä", "2": "mp", "3": "mm", "4": "ö", "5": "ä"},
+    {"1": "", "2": "", "3": ""},
+    {"1": "SAK", "ill_sg_vowel": "i", "ill_sg_vowel2": "e",
+     "par_sg_a": "a"},
+    {"1": "café", "2": "rr", "3": "é", "4": "ä"},
+]
+
+
+class CodegenTests(unittest.TestCase):
+
+    def test_forms(self):
+        forms = codegen.template_forms("fi-decl-valo",
+                                       {"1": "liu", "2": "k", "3": "'",
+                                        "4": "u", "5": "a"})
+        self.assertEqual(forms["gen-sg"], ["liu'un"])
+        self.assertEqual(forms["ill-sg"], ["liukuun"])
+        self.assertEqual(forms["ins-sg"], [])
+        forms = codegen.template_forms("fi-decl-palvelu",
+                                       {"1": "palvelu", "2": "a"})
+        self.assertEqual(forms["gen-pl"],
+                         ["palvelujen", "palveluiden", "palveluitten"])
+        self.assertEqual(codegen.template_forms("fi-decl-nonexistent", {}),
+                         None)
+
+    def test_verify(self):
+        for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+            for name in decls:
+                for args in sample_args:
+                    self.assertEqual(codegen.verify(name, args), [])
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            funcs = codegen.load_functions(tmpdir)
+            self.assertTrue(any(x.endswith(".py")
+                                for x in os.listdir(tmpdir)))
+            funcs2 = codegen.load_functions(tmpdir)
+            args = {"1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+            self.assertEqual(funcs["fi-decl-valo"](args),
+                             funcs2["fi-decl-valo"](args))
+
+    def test_backend(self):
+        words = [({"template_name": "fi-decl-valo",
+                   "1": "liu", "2": "k", "3": "", "4": "u", "5": "a"},
+                  "noun"),
+                 ({"template_name": "fi-decl-palvelu", "pos": "adj",
+                   "1": "palvelu", "2": "a"}, "adj"),
+                 ({"template_name": "fi-conj-sanoa",
+                   "1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"},
+                  "verb")]
+        old = os.environ.get(CACHE_ENV, None)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ[CACHE_ENV] = tmpdir
+            try:
+                # A cache directory does not select the generated code
+                self.assertIsNone(generated_function("fi-decl-valo"))
+                refs = [inflect_paradigm(args, pos) for args, pos in words]
+                set_template_backend("generated")
+                self.assertIs(generated_function("fi-decl-valo"),
+                              codegen.paradigm_function("fi-decl-valo"))
+                # Legacy names are mapped as for the interpreter
+                self.assertIs(generated_function("fi-decl-kauneus"),
+                              codegen.paradigm_function("fi-decl-kauneus"))
+                self.assertIsNotNone(generated_function("fi-decl-kauneus"))
+                for (args, pos), ref in zip(words, refs):
+                    self.assertEqual(inflect_paradigm(args, pos), ref)
+            finally:
+                set_template_backend("interpreter")
+                if old is None:
+                    del os.environ[CACHE_ENV]
+                else:
+                    os.environ[CACHE_ENV] = old
@@ -0,0 +1,94 @@
+# Tests for minimal acyclic automata of inflected forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import tempfile
+import unittest
+from wiktfinnish import (Dawg, DawgBuilder, build_dawg, forms_dawg,
+                         sorted_forms, sorted_words, iter_paradigm)
+
+entries = [
+    ("valo", {"template_name": "fi-decl-valo",
+              "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "noun"),
+    ("vahti", {"template_name": "fi-decl-risti",
+               "1": "vah", "2": "t", "3": "d", "4": "a"}, "noun"),
+    ("sanoa", {"template_name": "fi-conj-sanoa",
+               "1": "sano", "2": "", "3": "", "4": "a"}, "verb"),
+]
+
+
+class DawgTests(unittest.TestCase):
+
+    def test_build(self):
+        words = ["tap", "taps", "top", "tops"]
+        dawg = build_dawg(words)
+        self.assertEqual(len(dawg), 4)
+        self.assertEqual(list(dawg), words)
+        for w in words:
+            self.assertIn(w, dawg)
+        for w in ("", "t", "ta", "tapss", "tip", "x"):
+            self.assertNotIn(w, dawg)
+        # Start, t, a/o, p (final), s (final)
+        self.assertEqual(dawg.num_states(), 5)
+        self.assertEqual(dawg.num_edges(), 5)
+        self.assertEqual(list(dawg.iter_prefix("to")), ["top", "tops"])
+        self.assertEqual(list(dawg.iter_prefix("taps")), ["taps"])
+        self.assertEqual(list(dawg.iter_prefix("x")), [])
+        # Duplicates are ignored, empty word is allowed
+        dawg = build_dawg(["", "a", "a", "äö"])
+        self.assertEqual(list(dawg), ["", "a", "äö"])
+        self.assertIn("", dawg)
+        self.assertEqual(len(build_dawg([])), 0)
+        self.assertNotIn("", build_dawg([]))
+        builder = DawgBuilder()
+        builder.add("b")
+        with self.assertRaises(ValueError):
+            builder.add("a")
+
+    def test_serialize(self):
+        dawg = build_dawg(["kala", "kalat", "kissa", "kissat", "koira"])
+        data = dawg.to_bytes()
+        dawg2 = Dawg.from_bytes(data)
+        self.assertEqual(list(dawg2), list(dawg))
+        self.assertEqual(len(dawg2), 5)
+        self.assertIn("kissat", dawg2)
+        with self.assertRaises(ValueError):
+            Dawg.from_bytes(b"junk")
+        with self.assertRaises(ValueError):
+            Dawg.from_bytes(data[:-1])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "forms.dawg")
+            dawg.save(path)
+            self.assertEqual(list(Dawg.load(path)), list(dawg))
+
+    def test_sorted_words(self):
+        words = ["b", "a\rb", "c", "a", "b", "", "a\r", "ä"]
+        for chunk_size in (1, 2, 3, 100):
+            self.assertEqual(list(sorted_words(words, chunk_size)),
+                             sorted(set(words)))
+            # Newlines are rejected whether or not the chunk is spilled
+            with self.assertRaises(ValueError):
+                list(sorted_words(words + ["a\nb"], chunk_size))
+
+    def test_forms(self):
+        dawg = forms_dawg(entries, no_clitic=True)
+        surfaces = set(v for lemma, args, pos in entries
+                       for form, v in iter_paradigm(args, pos,
+                                                    no_clitic=True))
+        self.assertEqual(len(dawg), len(surfaces))
+        self.assertEqual(list(dawg), sorted(surfaces))
+        self.assertIn("valoissani", dawg)
+        self.assertNotIn("valoissanikin", dawg)
+        self.assertEqual(list(dawg.iter_prefix("vahdeissa")),
+                         sorted(v for v in surfaces
+                                if v.startswith("vahdeissa")))
+        # Shared suffixes make the automaton much smaller than a trie
+        self.assertLess(dawg.num_states(),
+                        sum(len(v) for v in surfaces) // 4)
+        # Sorting in chunks spilled into files gives the same forms
+        self.assertEqual(list(sorted_forms(entries, chunk_size=100,
+                                           no_clitic=True)),
+                         sorted(surfaces))
+        dawg2 = forms_dawg(entries, chunk_size=100, no_clitic=True)
+        self.assertEqual(dawg2.to_bytes(), dawg.to_bytes())
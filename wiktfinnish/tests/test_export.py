@@ -0,0 +1,203 @@
+# Tests for exporting inflected forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from wiktfinnish import (iter_paradigm, decode_paradigm, inflect,
+                         all_forms_list)
+from wiktfinnish.export import export_sqlite, export_lexc, export_att
+
+entries = [
+    ("valo", {"template_name": "fi-decl-valo",
+              "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "noun"),
+    ("vahti", {"template_name": "fi-decl-risti",
+               "1": "vah", "2": "t", "3": "d", "4": "a"}, "noun"),
+    ("sanoa", {"template_name": "fi-conj-sanoa",
+               "1": "sano", "2": "", "3": "", "4": "a"}, "verb"),
+    ("se", {"template_name": "fi-decl-pron", "1s": "[[se]]",
+            "2s": "[[sen]]"}, "pron"),
+]
+
+
+# Sample lexicon for the finite-state exports
+fst_entries = [
+    ("valo", {"template_name": "fi-decl-valo",
+              "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "noun"),
+    ("talo", {"template_name": "fi-decl-valo",
+              "1": "tal", "2": "", "3": "", "4": "o", "5": "a"}, "noun"),
+    ("vahti", {"template_name": "fi-decl-risti",
+               "1": "vah", "2": "t", "3": "d", "4": "a"}, "noun"),
+    ("hänen", {"template_name": "fi-decl-pron", "1s": "[[hän]]",
+               "2s": "[[hänen]]"}, "noun"),
+    ("sanoa", {"template_name": "fi-conj-sanoa",
+               "1": "sano", "2": "", "3": "", "4": "a"}, "verb"),
+    ("kysyä", {"template_name": "fi-conj-sanoa",
+               "1": "kysy", "2": "", "3": "", "4": "ä"}, "verb"),
+]
+
+
+def inflect_pairs(entries, **kwargs):
+    """Returns the set of (lemma+tags, word) for ``entries`` using
+    inflect()."""
+    ret = set()
+    for lemma, args, pos in entries:
+        for form in all_forms_list(pos, **kwargs):
+            tags = "".join("+" + x for x in form if x)
+            for v in inflect(args, form):
+                ret.add((lemma + tags, v))
+    return ret
+
+
+def att_pairs(text):
+    """Returns the set of (input, output) for all paths of the acyclic AT&T
+    format transducer ``text``."""
+    arcs = {}
+    finals = set()
+    for line in text.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 1:
+            finals.add(int(parts[0]))
+            continue
+        src, dst, a, b = parts
+        a = "" if a == "@0@" else a.replace("@_SPACE_@", " ")
+        b = "" if b == "@0@" else b.replace("@_SPACE_@", " ")
+        arcs.setdefault(int(src), []).append((int(dst), a, b))
+    ret = set()
+    stack = [(0, "", "")]
+    while stack:
+        state, upper, lower = stack.pop()
+        if state in finals:
+            ret.add((upper, lower))
+        for dst, a, b in arcs.get(state, ()):
+            stack.append((dst, upper + a, lower + b))
+    return ret
+
+
+def lexc_unescape(v):
+    if v == "0":
+        return ""
+    parts = v.split("%")
+    return parts[0] + "".join(x or "%" for x in parts[1:])
+
+
+def lexc_pairs(text):
+    """Returns the set of (upper, lower) for all words of the lexc source
+    ``text`` (as written by export_lexc())."""
+    lexicons = {}
+    items = None
+    for line in text.splitlines():
+        if line.startswith("LEXICON "):
+            items = lexicons.setdefault(line[8:], [])
+            continue
+        if items is None or not line.endswith(" ;"):
+            continue
+        entry, cont = line[:-2].rsplit(" ", 1)
+        i = 0
+        while i < len(entry):
+            if entry[i] == "%":
+                i += 2
+            elif entry[i] == ":":
+                break
+            else:
+                i += 1
+        upper = lexc_unescape(entry[:i])
+        lower = upper if i >= len(entry) else lexc_unescape(entry[i + 1:])
+        items.append((upper, lower, cont))
+    ret = set()
+    stack = [("Root", "", "")]
+    while stack:
+        name, upper, lower = stack.pop()
+        for a, b, cont in lexicons[name]:
+            if cont == "#":
+                ret.add((upper + a, lower + b))
+            else:
+                stack.append((cont, upper + a, lower + b))
+    return ret
+
+
+class ExportTests(unittest.TestCase):
+
+    def test_sqlite(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "forms.db")
+            stats = export_sqlite(entries, path, batch_size=1000,
+                                  no_clitic=True)
+            expected = set()
+            for lemma, args, pos in entries:
+                for form, v in iter_paradigm(args, pos, no_clitic=True):
+                    expected.add((v, lemma) + form)
+            self.assertEqual(stats["lemmas"], 4)
+            self.assertEqual(stats["paradigms"], 3)
+            self.assertEqual(stats["words"], len(expected))
+            conn = sqlite3.connect(path)
+            try:
+                rows = conn.execute(
+                    "SELECT w.surface, l.lemma, f.verb_form, f.comparison, "
+                    "f.case_form, f.possessive, f.clitic FROM words w "
+                    "JOIN lemmas l ON l.id = w.lemma_id "
+                    "JOIN forms f ON f.id = w.form_id").fetchall()
+                self.assertEqual(set(rows), expected)
+                self.assertEqual(len(rows), len(expected))
+                rows = conn.execute(
+                    "SELECT l.stem, p.code, l.pos FROM words w "
+                    "JOIN lemmas l ON l.id = w.lemma_id "
+                    "JOIN paradigms p ON p.id = l.paradigm_id "
+                    "WHERE w.surface = ?", ("vahdeissamme",)).fetchall()
+                self.assertEqual(rows, [("vah|a", "NristiGt-d", "noun")])
+                args = decode_paradigm(*rows[0])
+                self.assertEqual(inflect(args, ("", "", "ine-pl", "1p", "")),
+                                 ["vahdeissamme"])
+                rows = conn.execute(
+                    "SELECT stem, paradigm_id FROM lemmas "
+                    "WHERE lemma = ?", ("se",)).fetchall()
+                self.assertEqual(rows, [(None, None)])
+                indexes = set(x[0] for x in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"))
+                self.assertIn("words_surface", indexes)
+                self.assertIn("words_lemma", indexes)
+                lemmas = conn.execute("SELECT * FROM lemmas").fetchall()
+                words = conn.execute("SELECT * FROM words").fetchall()
+            finally:
+                conn.close()
+            # Flushing after every entry gives the same rows
+            path = os.path.join(tmpdir, "forms2.db")
+            export_sqlite(entries, path, batch_size=1, no_clitic=True)
+            conn = sqlite3.connect(path)
+            try:
+                self.assertEqual(conn.execute("SELECT * FROM lemmas")
+                                 .fetchall(), lemmas)
+                self.assertEqual(conn.execute("SELECT * FROM words")
+                                 .fetchall(), words)
+            finally:
+                conn.close()
+
+    def test_fst(self):
+        for kwargs in ({}, {"no_poss": True, "no_case": True}):
+            entries = fst_entries
+            if not kwargs:
+                entries = [x for x in entries if x[2] != "verb"]
+            expected = inflect_pairs(entries, **kwargs)
+            f = io.StringIO()
+            stats = export_att(entries, f, **kwargs)
+            self.assertGreater(stats["arcs"], 0)
+            self.assertEqual(att_pairs(f.getvalue()), expected)
+            f = io.StringIO()
+            export_lexc(entries, f, **kwargs)
+            text = f.getvalue()
+            self.assertTrue(text.startswith("Multichar_Symbols\n"))
+            self.assertEqual(lexc_pairs(text), expected)
+            # Words of the same paradigm share the continuation class
+            self.assertIn("valo Nvalo ;\n", text)
+            self.assertIn("talo Nvalo ;\n", text)
+            self.assertNotIn("Nvalo_2", text)
+            # Possessive suffixes are in their own shared classes
+            i = text.index("LEXICON Nvalo\n")
+            lexicon = text[i:text.index("\n\n", i)]
+            self.assertNotIn("+1s", lexicon)
+            self.assertNotIn("+kin", lexicon)
+            if not kwargs:
+                self.assertIn("\nLEXICON Poss1\n", text)
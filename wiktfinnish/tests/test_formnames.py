@@ -2,8 +2,12 @@
 #
 # Copyright (c) 2018 Tatu Ylonen.  See https://ylonen.org
 
+import os
+import itertools
+import tempfile
 import unittest
 import wiktfinnish
+from wiktfinnish import formnames
 
 class TestDecode(unittest.TestCase):
 
@@ -194,3 +198,106 @@ class TestDecode(unittest.TestCase):
         assert len(y) > len(z)
         for form in z:
             assert form in y
+
+    def test_form_ids(self):
+        seen = set()
+        for pos in ("noun", "adj", "verb", "pron"):
+            for form in wiktfinnish.all_forms_list(pos):
+                form_id = wiktfinnish.encode_form(form)
+                assert isinstance(form_id, int)
+                assert wiktfinnish.decode_form(form_id) == form
+                seen.add((form, form_id))
+        assert len(set(x[1] for x in seen)) == len(seen)
+        assert wiktfinnish.encode_form(("", "", "", "", "")) == 0
+        assert (wiktfinnish.all_form_ids("noun") ==
+                tuple(wiktfinnish.encode_form(x)
+                      for x in wiktfinnish.all_forms_list("noun")))
+        for form in (("", "", "foo", "", ""), ("", "", ""),
+                     ("", "", "", "", "__dummy__")):
+            with self.assertRaises(ValueError):
+                wiktfinnish.encode_form(form)
+        for form_id in (-1, 1 << 30, 15, "0"):
+            with self.assertRaises(ValueError):
+                wiktfinnish.decode_form(form_id)
+
+    def test_inflect_ids(self):
+        args = {"template_name": "fi-decl-valo",
+                "1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+        form = ("", "", "ine-pl", "1s", "kin")
+        form_id = wiktfinnish.encode_form(form)
+        assert (wiktfinnish.inflect(args, form_id) ==
+                wiktfinnish.inflect(args, form) == ["valoissanikin"])
+        ret = wiktfinnish.inflect_paradigm(args, "noun", ids=True)
+        assert list(ret) == list(wiktfinnish.all_form_ids("noun"))
+        assert ret[form_id] == ["valoissanikin"]
+        ret = wiktfinnish.inflect_batch([args], [form_id, form])
+        assert ret[0] == {form_id: ["valoissanikin"],
+                          form: ["valoissanikin"]}
+        assert (list(wiktfinnish.iter_inflect(args, [form_id])) ==
+                [(form_id, "valoissanikin")])
+        cache = wiktfinnish.InflectCache()
+        assert cache.inflect(args, form_id) == ["valoissanikin"]
+        assert cache.inflect(args, form) == ["valoissanikin"]
+        assert cache.hits == 1
+
+    def test_bitsets(self):
+        for pos in formnames.ALL_POS:
+            for values in itertools.product((False, True), repeat=5):
+                kwargs = {flag: value for (flag, dflt), value in
+                          zip(formnames.FORM_FLAGS, values)}
+                bits = wiktfinnish.forms_bitset(pos, **kwargs)
+                assert (wiktfinnish.bitset_forms(pos, bits) ==
+                        tuple(wiktfinnish.all_forms_iter(pos, **kwargs)))
+        bits = (wiktfinnish.forms_bitset("verb") &
+                wiktfinnish.component_bitset("verb", clitic="hAn"))
+        forms = wiktfinnish.bitset_forms("verb", bits)
+        assert forms == tuple(x for x in wiktfinnish.all_forms_list("verb")
+                              if x[4] == "hAn")
+        assert ("pres-1sg", "", "", "", "hAn") in forms
+        assert (wiktfinnish.bitset_form_ids("verb", bits) ==
+                tuple(wiktfinnish.encode_form(x) for x in forms))
+        bits = wiktfinnish.component_bitset("noun", case="ine-pl", poss="1s")
+        assert (wiktfinnish.bitset_forms("noun", bits) ==
+                tuple(("", "", "ine-pl", "1s", x)
+                      for x in wiktfinnish.CLITIC_FORMS
+                      if x not in ("s", "kA")))
+        assert wiktfinnish.component_bitset("noun", vform="pres-1sg") == 0
+        with self.assertRaises(ValueError):
+            wiktfinnish.forms_bitset("bogus-nonex")
+        assert (wiktfinnish.all_forms_list("bogus-nonex") ==
+                (("", "", "", "", ""),))
+
+    def test_form_tables(self):
+        forms = wiktfinnish.all_forms_list("verb", no_clitic=True)
+        positions = wiktfinnish.form_positions("verb", no_clitic=True)
+        assert len(positions) == len(forms)
+        for i, form in enumerate(forms):
+            assert positions[form] == i
+        with self.assertRaises(TypeError):
+            positions[forms[0]] = 1
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "forms.bin")
+            assert not wiktfinnish.load_form_tables(path)
+            wiktfinnish.save_form_tables(path)
+            old = dict(formnames.form_tables)
+            formnames.form_tables.clear()
+            try:
+                assert wiktfinnish.load_form_tables(path)
+                assert set(formnames.form_tables) == set(formnames.ALL_POS)
+                assert (formnames.form_tables["noun"] is
+                        formnames.form_tables["name"])
+                for pos in ("noun", "adj", "verb"):
+                    table = formnames.form_tables[pos]
+                    assert table.forms == old[pos].forms
+                    assert table.flag_bits == old[pos].flag_bits
+                    assert table.field_bits == old[pos].field_bits
+                    bits = wiktfinnish.forms_bitset(pos, no_poss=True)
+                    assert (wiktfinnish.bitset_forms(pos, bits) ==
+                            tuple(wiktfinnish.all_forms_iter(pos,
+                                                             no_poss=True)))
+                with open(path, "r+b") as f:
+                    f.truncate(100)
+                assert not wiktfinnish.load_form_tables(path)
+            finally:
+                formnames.form_tables.clear()
+                formnames.form_tables.update(old)
@@ -0,0 +1,52 @@
+# Tests for interning inflected forms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish import (Interner, inflect_paradigm, compact_paradigm,
+                         inflect_batch, all_forms_list)
+
+valo = {"template_name": "fi-decl-valo",
+        "1": "val", "2": "", "3": "", "4": "o", "5": "a"}
+
+
+class InterningTests(unittest.TestCase):
+
+    def test_intern(self):
+        interner = Interner()
+        a = "".join(["val", "o"])
+        b = "".join(["va", "lo"])
+        self.assertIsNot(a, b)
+        self.assertIs(interner.intern(a), a)
+        self.assertIs(interner.intern(b), a)
+        lst = [b, "".join(["valo", "t"])]
+        ret = interner.intern_list(lst)
+        self.assertEqual(ret, lst)
+        self.assertIsNot(ret, lst)
+        self.assertIs(ret[0], a)
+        stats = interner.stats()
+        self.assertEqual(stats["lookups"], 4)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["size"], 2)
+        self.assertGreater(stats["saved_bytes"], 0)
+        interner.clear()
+        self.assertEqual(len(interner), 0)
+        self.assertEqual(interner.stats()["hits"], 0)
+
+    def test_paradigms(self):
+        interner = Interner()
+        ret1 = inflect_paradigm(valo, "noun", interner=interner)
+        self.assertEqual(ret1, inflect_paradigm(valo, "noun"))
+        ret2 = inflect_paradigm(dict(valo), "noun", interner=interner)
+        form = ("", "", "ine-pl", "1s", "kin")
+        self.assertIs(ret1[form][0], ret2[form][0])
+        # Results are still separate lists
+        ret2[form].append("x")
+        self.assertEqual(ret1[form], ["valoissanikin"])
+        p = compact_paradigm(valo, "noun", interner=interner)
+        self.assertIs(p[form][0], ret1[form][0])
+        forms = all_forms_list("noun", no_poss=True)
+        ret3 = inflect_batch([valo], forms, interner=interner)[0]
+        self.assertEqual(ret3, inflect_batch([valo], forms)[0])
+        form = ("", "", "ine-pl", "", "kin")
+        self.assertIs(ret3[form][0], ret1[form][0])
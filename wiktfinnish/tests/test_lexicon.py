@@ -0,0 +1,70 @@
+# Tests for binary lexicon files
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import os
+import tempfile
+import unittest
+from wiktfinnish import iter_paradigm, inflect, decode_paradigm
+from wiktfinnish.lexicon import build_lexicon, Lexicon
+
+entries = [
+    ("valo", {"template_name": "fi-decl-valo",
+              "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "noun"),
+    ("vahti", {"template_name": "fi-decl-risti",
+               "1": "vah", "2": "t", "3": "d", "4": "a"}, "noun"),
+    ("sanoa", {"template_name": "fi-conj-sanoa",
+               "1": "sano", "2": "", "3": "", "4": "a"}, "verb"),
+    ("minä", {"template_name": "fi-decl-pron", "1s": "[[minä]]",
+              "2s": "[[minun]]", "5s": "[[minussa]]"}, "pron"),
+]
+
+
+class LexiconTests(unittest.TestCase):
+
+    def test_lexicon(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "lexicon.bin")
+            stats = build_lexicon(entries, path, no_clitic=True)
+            self.assertEqual(stats["entries"], 4)
+            self.assertEqual(stats["unencoded"], 1)  # fi-decl-pron
+            self.assertEqual(stats["lemmas"], 4)
+            with Lexicon(path) as lexicon:
+                self.assertEqual(len(lexicon), stats["surfaces"])
+                surfaces = list(lexicon.surfaces())
+                self.assertEqual(surfaces,
+                                 sorted(surfaces,
+                                        key=lambda x: x.encode("utf-8")))
+                for lemma, args, pos in entries:
+                    for form, v in iter_paradigm(args, pos, no_clitic=True):
+                        self.assertIn(v, lexicon)
+                        ret = lexicon.lookup(v)
+                        self.assertTrue(any(x[0] == lemma and x[2] == form
+                                            for x in ret))
+                self.assertNotIn("vahdissakin", lexicon)  # No clitics
+                # Entries whose paradigm cannot be encoded have a null
+                # paradigm
+                self.assertEqual(lexicon.lookup("minä"),
+                                 [("minä", (None, None, "pron"),
+                                   ("", "", "", "", ""))])
+                self.assertEqual(lexicon.lookup("minussa"),
+                                 [("minä", (None, None, "pron"),
+                                   ("", "", "ine-sg", "", ""))])
+                self.assertEqual(lexicon.lookup("xyzzy"), [])
+                self.assertNotIn("", lexicon)
+                ret = lexicon.lookup("vahdeissamme")
+                self.assertEqual(len(ret), 1)
+                lemma, (stem, code, pos), form = ret[0]
+                self.assertEqual(lemma, "vahti")
+                self.assertEqual(form, ("", "", "ine-pl", "1p", ""))
+                args = decode_paradigm(stem, code, pos)
+                self.assertEqual(inflect(args, form), ["vahdeissamme"])
+
+    def test_invalid(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "lexicon.bin")
+            for data in (b"", b"WFLX", b"x" * 100):
+                with open(path, "wb") as f:
+                    f.write(data)
+                with self.assertRaises(ValueError):
+                    Lexicon(path)
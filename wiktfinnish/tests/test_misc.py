@@ -4,6 +4,15 @@
 
 import unittest
 from wiktfinnish import inflect, add_clitic, last_char_to_vowel, word_to_aae
+from wiktfinnish.inflect import compile_template, run_template, OP_LITERAL
+from wiktfinnish.inflect import vowel_state, scan_vowel_state, word_back
+from wiktfinnish.inflect import process_template
+from wiktfinnish.inflect import insert_apostrophes, EMPTY_CHAR
+from wiktfinnish.inflect import split_template, run_template_stems
+from wiktfinnish.inflect import split_product
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish import ParadigmArgs, normalize_args
+import pickle
 
 class MiscTests(unittest.TestCase):
 
@@ -38,3 +47,140 @@ class MiscTests(unittest.TestCase):
         self.assertEqual(word_to_aae("talviyö"), "ä")
         self.assertEqual(word_to_aae("tiili"), "ä")
         self.assertEqual(word_to_aae("veli"), "ä")
+
+    def test_compile_template(self):
+        prog = compile_template("134ss5")
+        self.assertIs(compile_template("134ss5"), prog)
+        self.assertEqual(len(prog), 5)
+        self.assertEqual(prog[3], (OP_LITERAL, "ss"))
+        args = {"1": "val", "2": "", "3": "", "4": "o", 5: "a"}
+        self.assertEqual(run_template(prog, args), "valossa")
+        self.assertEqual(run_template(compile_template("124@n"), args),
+                         "valoon")
+        self.assertEqual(run_template(compile_template("1-"), {"1": "x"}),
+                         None)
+
+    def test_vowel_state(self):
+        self.assertEqual(vowel_state("talo"), (True, "o", False))
+        self.assertEqual(vowel_state("tyttö"), (False, "ö", False))
+        self.assertEqual(vowel_state("kiire"), (None, "e", False))
+        self.assertEqual(vowel_state("SAK"), (True, "a", False))
+        self.assertEqual(vowel_state("café"), (True, "a", True))
+        self.assertEqual(vowel_state("xyz"), (False, "y", False))
+        self.assertEqual(vowel_state(""), (None, None, False))
+        for x in ("talo", "tyttö", "kiire", "SAK", "café", "xyz", ""):
+            self.assertEqual(scan_vowel_state(x), vowel_state(x))
+            self.assertEqual(word_back(x), vowel_state(x)[0])
+        # Harmony is determined by the last a/o/u/y/ä/ö even in long words
+        self.assertEqual(process_template("1kAAnkO", {"1": "kesäloma"}),
+                         "kesälomakaanko")
+        self.assertEqual(process_template("1kAAnkO", {"1": "olkapää"}),
+                         "olkapääkäänkö")
+        self.assertEqual(process_template("134hk5-O",
+                                          {"1": "lä", "3": "mm",
+                                           "4": "ö", "5": "ä"}),
+                         "lämmöhkö")
+
+    def test_insert_apostrophes(self):
+        self.assertEqual(insert_apostrophes("liu" + EMPTY_CHAR + "un"),
+                         "liu'un")
+        self.assertEqual(insert_apostrophes("ha" + EMPTY_CHAR + "an"),
+                         "haan")
+        self.assertEqual(insert_apostrophes("lie" + EMPTY_CHAR + "ssä"),
+                         "liessä")
+        self.assertEqual(insert_apostrophes("ruo" + EMPTY_CHAR + "on" +
+                                            EMPTY_CHAR + "kin"),
+                         "ruo'onkin")
+        self.assertEqual(insert_apostrophes(EMPTY_CHAR), "")
+
+    def test_split_template(self):
+        self.assertEqual(split_template("134ss5")[0], "134")
+        self.assertEqual(split_template("12-ssa")[0], "12-")
+        self.assertEqual(split_template("124@n")[0], "124")
+        self.assertEqual(split_template("sinu4")[0], "")
+        self.assertEqual(split_template("124k5-OOn")[3], False)
+
+    def test_stems(self):
+        for args in ({"1": "kal", "2": "t", "3": "d", "4": "a", "5": "a"},
+                     {"1": "liu", "2": "k", "3": "", "4": "u", "5": "a"},
+                     {"1": "SAK", "ill_sg_vowel": "i", "par_sg_a": "a"},
+                     {"1": "", "2": "", "3": ""},
+                     {"1": "café", "2": "rr", "3": "é", "4": "ä"}):
+            for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+                for name, decl in decls.items():
+                    stems = {}
+                    for k, v in decl.items():
+                        if k == "split" or not isinstance(v, (str, list)):
+                            continue
+                        for t in [v] if isinstance(v, str) else v:
+                            prog = compile_template(t)
+                            self.assertEqual(
+                                run_template_stems(t, args, stems),
+                                run_template(prog, args))
+
+    def test_paradigm_args(self):
+        args = ParadigmArgs({"template_name": "fi-decl-valo",
+                             "1": "val", "2": "", "3": "", "4": "o"})
+        self.assertEqual(args[1], "val")
+        self.assertEqual(args["1"], "val")
+        self.assertEqual(args.get("4"), "o")
+        self.assertTrue("1" in args and 1 in args)
+        self.assertEqual(args[5], "a")  # Defaulted last argument
+        self.assertEqual(hash(args), hash(ParadigmArgs(dict(args))))
+        self.assertEqual(args, ParadigmArgs(dict(args)))
+        self.assertEqual(len({args: 1, ParadigmArgs(args): 2}), 1)
+        with self.assertRaises(TypeError):
+            args["1"] = "x"
+        with self.assertRaises(TypeError):
+            args.update({"1": "x"})
+        with self.assertRaises(TypeError):
+            args.decl = None
+        with self.assertRaises(TypeError):
+            del args.positional
+        d = args.copy()
+        d[1] = "x"
+        self.assertEqual(args[1], "val")
+        self.assertEqual(pickle.loads(pickle.dumps(args)), args)
+        self.assertEqual(inflect(args, ("", "", "ine-pl", "", "")),
+                         ["valoissa"])
+        args = ParadigmArgs({"template_name": "fi-conj-kumajaa",
+                             "1": "vipaj"})
+        self.assertEqual(args[2], "a")
+
+    def test_normalize_args(self):
+        args = normalize_args({"template_name": "fi-decl-valo",
+                               "1": "liu", "2": "k", "3": "(')", "4": "u",
+                               "5": "a", "pos": "noun"})
+        self.assertIs(normalize_args(args), args)
+        self.assertEqual(args.positional[1], "liu")
+        self.assertEqual(args.positional[3], "")
+        self.assertEqual(args.positional[6], "")
+        self.assertEqual(args["pos"], "noun")
+        self.assertEqual(process_template("134ss5", args), "liu'ussa")
+        # Extra arguments are merged into the stem
+        args = normalize_args({"template_name": "fi-decl-palvelu",
+                               "1": "palve", "2": "lu", "3": "a"})
+        self.assertEqual(args.positional[1:4], ("palvelu", "a", ""))
+
+    def test_split_product(self):
+        self.assertEqual(list(split_product([["a", "b"], ["c", "d"]], " ")),
+                         ["a c", "a d", "b c", "b d"])
+        # A part without results discards the parts before it
+        self.assertEqual(list(split_product([["a"], [], ["c"]], "-")),
+                         ["c"])
+        self.assertEqual(list(split_product([["a"], []], "-")), [])
+        self.assertEqual(list(split_product([], "-")), [])
+        args = {"template_name": "fi-decl-käsi-kulkija",
+                1: "Uu", 2: "a", "space": "-", 3: "Kaledoni", 4: "a"}
+        self.assertEqual(inflect(args, ("", "", "ine-sg", "", "")),
+                         ["Uudessa-Kaledoniassa"])
+
+    def test_dedupe(self):
+        args = {"template_name": "fi-decl-valo",
+                "1": "val", "2": "", "3": "", "4": "o", "5": "a",
+                "gen_pl": "valojen, valoin, valojen"}
+        self.assertEqual(inflect(args, ("", "", "gen-pl", "", "")),
+                         ["valojen", "valoin"])
+        args = {"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"}
+        self.assertEqual(inflect(args, ("", "", "gen-pl", "", "")),
+                         ["palvelujen", "palveluiden", "palveluitten"])
@@ -0,0 +1,170 @@
+# Tests for generating full paradigms
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import io
+import unittest
+import contextlib
+from wiktfinnish import vectorized
+from wiktfinnish import (inflect, inflect_paradigm, inflect_batch,
+                         iter_paradigm, iter_inflect, all_forms_list,
+                         compact_paradigm, encode_form)
+from wiktfinnish.inflect import inflect_nominal, verbal_nominals
+from wiktfinnish.paradigm import BATCH_MIN_WORDS
+from wiktfinnish.tests.test_inflect import testcases
+
+paradigms = [
+    [{"template_name": "fi-decl-valo",
+      "1": "liu", "2": "k", "3": "'", "4": "u", "5": "a"}, "noun", {}],
+    [{"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"},
+     "noun", {}],
+    [{"template_name": "fi-decl-risti", "1": "het", "4": "ä", "i": "0"},
+     "noun", {}],
+    [{"template_name": "fi-decl-käsi-kulkija",
+      "1": "ve", "2": "ä", "3": "kulki", "4": "a"}, "noun", {}],
+    [{"template_name": "fi-decl-valo", "pos": "adj",
+      "1": "val", "2": "", "3": "", "4": "o", "5": "a"}, "adj",
+     {"no_clitic": True}],
+    [{"template_name": "fi-decl-risti", "pos": "adj",
+      "1": "pien", "2": "", "3": "", "4": "ä"}, "adj", {}],
+    [{"template_name": "fi-conj-sanoa",
+      "1": "luu", "2": "t", "3": "d", "4": "u", "5": "a"}, "verb",
+     {"no_poss": True}],
+    [{"template_name": "fi-conj-kumajaa", "1": "vipaj"}, "verb",
+     {"no_case": True}],
+]
+
+
+class ParadigmTests(unittest.TestCase):
+
+    def test_paradigms(self):
+        for args, pos, kwargs in paradigms:
+            forms = all_forms_list(pos, **kwargs)
+            ret = inflect_paradigm(args, pos, **kwargs)
+            self.assertEqual(list(ret), list(forms))
+            for form in forms:
+                self.assertEqual(ret[form], inflect(args, form))
+
+    def test_results_not_shared(self):
+        args = {"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"}
+        ret = inflect_paradigm(args, "noun")
+        ret[("", "", "gen-sg", "", "")].append("x")
+        self.assertEqual(ret[("", "", "gen-sg", "", "kin")],
+                         ["palvelunkin"])
+        self.assertEqual(inflect_paradigm(args, "noun"),
+                         {form: inflect(args, form)
+                          for form in all_forms_list("noun")})
+
+    def test_undefined(self):
+        ret = inflect_paradigm({"template_name": "fi-decl-nonexistent"},
+                               "noun", no_clitic=True)
+        self.assertTrue(ret)
+        self.assertTrue(all(v == [] for v in ret.values()))
+
+    def test_verbal_nominals(self):
+        args = {"template_name": "fi-conj-sanoa",
+                "1": "sa", "2": "n", "3": "n", "4": "o", "5": "a"}
+        ret = verbal_nominals("fi-conj-sanoa", args, "past-pass-part")
+        self.assertEqual([name for name, nargs in ret], ["fi-decl-valo"])
+        name, nargs = ret[0]
+        self.assertEqual(inflect_nominal(name, nargs, "ine-pl",
+                                         comp="comp", clitic="kin"),
+                         inflect(args, ("past-pass-part", "comp", "ine-pl",
+                                        "", "kin")))
+        # The derived nominals are shared between calls
+        ret2 = verbal_nominals("fi-conj-sanoa", args, "past-pass-part",
+                               use_poss=True)
+        self.assertIs(ret2[0][1], nargs)
+
+    def test_batch(self):
+        entries = [args for args, pos, kwargs in paradigms]
+        entries.insert(2, {"template_name": "fi-decl-nonexistent"})
+        entries.append({"template_name": "fi-decl-valo",
+                        "1": "la", "2": "nk", "3": "ng", "4": "o",
+                        "5": "a"})
+        forms = (all_forms_list("noun", no_poss=True) +
+                 all_forms_list("verb", no_case=True, no_clitic=True))
+        ret = inflect_batch(iter(entries), forms)
+        self.assertEqual(len(ret), len(entries))
+        for args, results in zip(entries, ret):
+            self.assertEqual(list(results), list(forms))
+            for form in forms:
+                self.assertEqual(results[form], inflect(args, form))
+
+    def test_batch_classes(self):
+        # Classes with several words have their base forms computed together
+        prefixes = ["", "esi", "yli", "koti"]
+        self.assertGreaterEqual(len(prefixes), BATCH_MIN_WORDS)
+        entries = []
+        for prefix in prefixes:
+            for lst in testcases:
+                args = dict(lst[1])
+                args["template_name"] = lst[0]
+                if isinstance(args.get("1"), str):
+                    args["1"] = prefix + args["1"]
+                entries.append(args)
+        entries.append({"template_name": "fi-decl-valo", "pos": "adj",
+                        "1": "val", "2": "", "3": "", "4": "o",
+                        "5": "a", "gen_pl": "valoin"})
+        forms = (list(all_forms_list("noun", no_clitic=True)) +
+                 list(all_forms_list("adj", no_poss=True, no_clitic=True)) +
+                 list(all_forms_list("verb", no_case=True,
+                                     no_clitic=True)) +
+                 [("inf1", "", "", "", "kin"), ("inf1-long", "", "", "1s", ""),
+                  ("pres-3sg", "", "", "", "kO"),
+                  ("pres-part", "", "ine-sg", "", "kin"),
+                  ("past-pass-part", "comp", "gen-pl", "3x", "")])
+        forms = list(dict.fromkeys(forms))
+        with contextlib.redirect_stdout(io.StringIO()):
+            ref = [{form: inflect(args, form) for form in forms}
+                   for args in entries]
+            for use_numpy in (False, True):
+                if use_numpy and vectorized.np is None:
+                    continue
+                ret = inflect_batch(entries, forms, use_numpy=use_numpy)
+                self.assertEqual(ret, ref)
+
+    def test_iter(self):
+        for args, pos, kwargs in paradigms:
+            forms = all_forms_list(pos, **kwargs)
+            ref = [(form, v) for form in forms for v in inflect(args, form)]
+            ret = list(iter_paradigm(args, pos, **kwargs))
+            self.assertEqual(sorted(ret), sorted(ref))
+            self.assertEqual(list(iter_inflect(args, iter(forms))), ref)
+        it = iter_paradigm({"template_name": "fi-decl-valo",
+                            "1": "val", "2": "", "3": "", "4": "o",
+                            "5": "a"}, "noun")
+        self.assertEqual(next(it), (("", "", "", "", ""), "valo"))
+        self.assertEqual(list(iter_paradigm(
+            {"template_name": "fi-decl-nonexistent"}, "noun")), [])
+
+    def test_compact(self):
+        for args, pos, kwargs in paradigms:
+            ret = inflect_paradigm(args, pos, **kwargs)
+            p = compact_paradigm(args, pos, **kwargs)
+            self.assertEqual(len(p), len(ret))
+            self.assertEqual(list(p), list(ret))
+            self.assertEqual(dict(p.items()), ret)
+            for form, v in ret.items():
+                self.assertEqual(p[form], v)
+                self.assertEqual(p[encode_form(form)], v)
+                self.assertEqual(p.preferred(form), v[0] if v else None)
+        args = {"template_name": "fi-decl-palvelu", "1": "palvelu", "2": "a"}
+        p = compact_paradigm(args, "noun", no_clitic=True)
+        form = ("", "", "ine-pl", "1s", "")
+        self.assertIn(form, p)
+        self.assertIn(encode_form(form), p)
+        self.assertEqual(p.preferred(form), "palveluissani")
+        form = ("", "", "ine-pl", "1s", "kin")
+        self.assertNotIn(form, p)
+        self.assertIsNone(p.get(form))
+        with self.assertRaises(KeyError):
+            p[form]
+        with self.assertRaises(KeyError):
+            p.preferred(1 << 30)
+        # The returned lists may be modified
+        p[("", "", "gen-sg", "", "")].append("x")
+        self.assertEqual(p[("", "", "gen-sg", "", "")], ["palvelun"])
+        p = compact_paradigm({"template_name": "fi-decl-nonexistent"},
+                             "noun", no_clitic=True)
+        self.assertTrue(all(v == [] for form, v in p.items()))
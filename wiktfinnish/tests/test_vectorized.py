@@ -0,0 +1,47 @@
+# Tests for computing template forms of many words at once
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+import unittest
+from wiktfinnish import nounspecs, verbspecs
+from wiktfinnish import codegen
+from wiktfinnish import vectorized
+from wiktfinnish.inflect import ParadigmArgs
+from wiktfinnish.tests.test_codegen import sample_args
+
+
+class VectorizedTests(unittest.TestCase):
+
+    def check(self, use_numpy):
+        for decls in (nounspecs.noun_decls, verbspecs.verb_conjs):
+            for name in decls:
+                args_list = sample_args + [ParadigmArgs(args,
+                                                        template_name=name)
+                                           for args in sample_args]
+                ret = vectorized.batch_template_forms(name, args_list,
+                                                      use_numpy=use_numpy)
+                if ret is None:
+                    # Declensions without templates, e.g., fi-decl-pron
+                    self.assertFalse(decls[name])
+                    continue
+                self.assertEqual(len(ret), len(args_list))
+                for args, forms in zip(args_list, ret):
+                    self.assertEqual(forms,
+                                     codegen.interpreted_forms(name, args))
+
+    def test_scalar(self):
+        self.check(False)
+
+    @unittest.skipIf(vectorized.np is None, "NumPy is not installed")
+    def test_numpy(self):
+        self.check(True)
+
+    def test_vectorizable(self):
+        self.assertTrue(vectorized.is_vectorizable(
+            vectorized.compile_template("1ss2")))
+        self.assertFalse(vectorized.is_vectorizable(
+            vectorized.compile_template("1-ssA")))
+
+    def test_unknown(self):
+        self.assertEqual(vectorized.batch_template_forms(
+            "fi-decl-nonexistent", [{}]), None)
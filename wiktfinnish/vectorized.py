@@ -0,0 +1,198 @@
+# Batch computation of template forms for many words of the same
+# declension/conjugation.  Most templates consist only of arguments and
+# literal text (e.g., "1ss2"), and for those the forms of all words can be
+# computed column-wise with NumPy string concatenation.  Templates with
+# vowel harmony, illative vowels, deletions and other operations that
+# depend on the individual word are run using the template interpreter.
+# NumPy is optional; without it all templates are interpreted, with the
+# same results.
+#
+# Copyright (c) 2018 Tatu Ylonen.  See LICENSE and https://ylonen.org
+
+from wiktfinnish import nounspecs
+from wiktfinnish import verbspecs
+from wiktfinnish.inflect import (EMPTY_CHAR, OP_LITERAL, OP_ARG, OP_ARG_WEAK,
+                                 compile_template, run_template_stems,
+                                 insert_apostrophes, default_args,
+                                 ParadigmArgs)
+from wiktfinnish.codegen import template_items
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Opcodes of templates that can be computed column-wise
+VECTOR_OPS = set([OP_LITERAL, OP_ARG, OP_ARG_WEAK])
+
+
+def is_vectorizable(program):
+    """Returns True if the compiled template ``program`` only consists of
+    arguments and literals, and can thus be computed column-wise."""
+    return all(op in VECTOR_OPS for op, val in program)
+
+
+def arg_column(args_list, k):
+    """Returns the values of the template argument ``k`` for each of the
+    arguments in ``args_list``, as run_template() would use them."""
+    col = []
+    x = str(k)
+    for args in args_list:
+        if type(args) is ParadigmArgs:
+            v = args.positional[k]
+        else:
+            if k in args:
+                v = args[k]
+            else:
+                v = args.get(x, "")
+            if v == "(')":
+                v = ""
+        col.append(v)
+    return col
+
+
+def vector_template(program, args_list, columns):
+    """Computes the template ``program`` (see is_vectorizable()) for each
+    of the arguments in ``args_list`` using NumPy.  ``columns`` caches the
+    argument columns as NumPy arrays.  Returns a list of word forms."""
+    result = None
+    for op, val in program:
+        if op == OP_LITERAL:
+            if result is None:
+                result = np.full(len(args_list), val)
+            else:
+                result = np.char.add(result, val)
+            continue
+        k = val[0]
+        key = (k, op)
+        col = columns.get(key)
+        if col is None:
+            col = np.array(arg_column(args_list, k), dtype=str)
+            if op == OP_ARG_WEAK:
+                col = np.where(col == "", EMPTY_CHAR, col)
+            columns[key] = col
+        if result is None:
+            result = col
+        else:
+            result = np.char.add(result, col)
+    if result is None:
+        return [""] * len(args_list)
+    if op_weak_used(program):
+        result = vector_apostrophes(result)
+    return result.tolist()
+
+
+def op_weak_used(program):
+    """Returns True if ``program`` may produce EMPTY_CHAR markers."""
+    return any(op == OP_ARG_WEAK for op, val in program)
+
+
+def char_codes(arr, idx):
+    """Returns the code points of the characters at the indices ``idx``
+    (an array) of the strings in the NumPy array ``arr``, with -1 where the
+    index is out of range."""
+    n = len(arr)
+    if arr.dtype.itemsize == 0:
+        return np.full(n, -1)
+    codes = np.ascontiguousarray(arr).view(np.uint32).reshape(n, -1)
+    ok = (idx >= 0) & (idx < np.char.str_len(arr))
+    return np.where(ok, codes[np.arange(n), np.where(ok, idx, 0)], -1)
+
+
+# Code points of vowels, for vector_apostrophes()
+VOWEL_CODES = [ord(x) for x in "aeiouyäöAEIOUYÄÖ"]
+
+
+def vector_apostrophes(result):
+    """Same as insert_apostrophes() for each string in the NumPy array
+    ``result``, which may contain EMPTY_CHAR markers."""
+    has = np.char.find(result, EMPTY_CHAR) >= 0
+    if not has.any():
+        return result
+    parts = np.char.partition(result, EMPTY_CHAR)
+    before = parts[:, 0]
+    after = parts[:, 2]
+    lens = np.char.str_len(before)
+    last = char_codes(before, lens - 1)
+    prev = char_codes(before, lens - 2)
+    first = char_codes(after, np.zeros(len(after), dtype=int))
+    apos = ((first == last) & np.isin(last, VOWEL_CODES) &
+            np.isin(prev, VOWEL_CODES))
+    joined = np.char.add(np.char.add(before, np.where(apos, "'", "")), after)
+    result = np.where(has, joined, result)
+    # Forms with several markers are rare; handle them one at a time
+    for i in np.flatnonzero(np.char.find(after, EMPTY_CHAR) >= 0):
+        result[i] = insert_apostrophes(str(parts[i, 0]) + EMPTY_CHAR +
+                                       str(parts[i, 2]))
+    return result
+
+
+def scalar_template(template, args_list, stems_list, ill_sg_vowels=None):
+    """Computes ``template`` for each of the arguments in ``args_list``
+    using the template interpreter.  ``stems_list`` contains a stem table
+    (see run_template_stems()) for each word, and ``ill_sg_vowels``
+    optionally the illative vowel for each word.  Returns a list of word
+    forms (None where the template cannot be applied)."""
+    if ill_sg_vowels is None:
+        return [run_template_stems(template, args, stems)
+                for args, stems in zip(args_list, stems_list)]
+    return [run_template_stems(template, args, stems, ill_sg_vowel=ill)
+            for args, stems, ill in zip(args_list, stems_list, ill_sg_vowels)]
+
+
+def batch_template_forms(name, args_list, use_numpy=None, keys=None):
+    """Computes all template forms of the declension/conjugation ``name``
+    for each of the arguments in ``args_list``.  Returns a list containing
+    a dictionary for each arguments, mapping template keys to lists of
+    word forms, as codegen.template_forms() would return for them, or None
+    if ``name`` is not a known declension/conjugation.  NumPy is used for
+    templates consisting of only arguments and literals if ``use_numpy``
+    is True, or if it is None (the default) and NumPy is installed.  If
+    ``keys`` is given, only the templates for the keys in it are
+    computed."""
+    name = nounspecs.decl_name_map.get(name, name)
+    decl = nounspecs.noun_decls.get(name) or verbspecs.verb_conjs.get(name)
+    if decl is None:
+        return None
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+    args_list = [default_args(decl, args) for args in args_list]
+    ill1s = [args.get("ill_sg_vowel", None) for args in args_list]
+    ill2s = [args.get("ill_sg_vowel2", None) for args in args_list]
+    have_ill = any(x is not None for x in ill1s + ill2s)
+    columns = {}
+    stems_list = [{} for args in args_list]
+    rets = [{} for args in args_list]
+    for k, templates in template_items(decl):
+        if keys is not None and k not in keys:
+            continue
+        # Compute each template for all words
+        cols = []
+        for template in templates:
+            if use_numpy and is_vectorizable(compile_template(template)):
+                cols.append(vector_template(compile_template(template),
+                                            args_list, columns))
+            elif k.startswith("ill-sg") and have_ill:
+                # Certain words have one or two vowel choices in ill-sg
+                cols.append(scalar_template(template, args_list, stems_list,
+                                            ill1s))
+                col = scalar_template(template, args_list, stems_list, ill2s)
+                cols.append([v if ill is not None else None
+                             for v, ill in zip(col, ill2s)])
+            else:
+                cols.append(scalar_template(template, args_list, stems_list))
+        # Collect the forms of each word
+        if len(cols) == 1:
+            for ret, v in zip(rets, cols[0]):
+                ret[k] = [v] if v else []
+            continue
+        for i, ret in enumerate(rets):
+            r = []
+            for col in cols:
+                v = col[i]
+                if v and v not in r:
+                    r.append(v)
+            ret[k] = r
+    return rets